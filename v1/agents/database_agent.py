@@ -1,8 +1,8 @@
+import os
 import json
 import uvicorn
 
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from mcp import StdioServerParameters
 from pydantic import BaseModel
 
 from a2a.server.apps import A2AStarletteApplication
@@ -13,6 +13,8 @@ from a2a.server.events.event_queue import EventQueue
 from a2a.utils import new_agent_text_message
 from a2a.types import AgentCard, AgentSkill, AgentCapabilities, AgentAuthentication
 
+from agents.mcp_pool import MCPSessionPool
+
 # 1) Define A2A skills
 skill_status = AgentSkill(
     id="get_order_status", name="Get Order Status",
@@ -37,13 +39,21 @@ agent_card = AgentCard(
 )
 
 class DatabaseAgentExecutor(AgentExecutor):
-    def __init__(self):
+    def __init__(self, pool_size: int = int(os.getenv("MCP_POOL_SIZE", "4"))):
         # how to launch the MCP server
         self.std_params = StdioServerParameters(
             command="python",
             args=["agents/db_tools_server.py"],
             env=None
         )
+        # long-lived MCP sessions, started on first use or at app startup
+        self.pool = MCPSessionPool(self.std_params, size=pool_size)
+
+    async def start(self) -> None:
+        await self.pool.start()
+
+    async def close(self) -> None:
+        await self.pool.close()
 
     async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
         raw = context.message.parts[0].root.text
@@ -52,13 +62,8 @@ class DatabaseAgentExecutor(AgentExecutor):
         params = payload.get("parameters", {})
 
         if action in ("get_order_status", "get_customer_orders"):
-            # call the MCP tool via stdio
-            async with stdio_client(self.std_params) as (r, w):
-                async with ClientSession(r, w) as session:
-                    await session.initialize()
-                    tool_resp = await session.call_tool(name=action, arguments=params)
-
-                    result = tool_resp.content[0].text
+            # call the MCP tool over a pooled stdio session
+            result = await self.pool.call_tool(action, params)
         else:
             result = f"Unknown action: {action}"
 
@@ -68,9 +73,12 @@ class DatabaseAgentExecutor(AgentExecutor):
         return
 
 if __name__ == "__main__":
+    executor = DatabaseAgentExecutor()
     handler = DefaultRequestHandler(
-        agent_executor=DatabaseAgentExecutor(),
+        agent_executor=executor,
         task_store=InMemoryTaskStore()
     )
-    app = A2AStarletteApplication(agent_card=agent_card, http_handler=handler).build()
+    app = A2AStarletteApplication(agent_card=agent_card, http_handler=handler).build(
+        on_startup=[executor.start], on_shutdown=[executor.close]
+    )
     uvicorn.run(app, host="127.0.0.1", port=8000)
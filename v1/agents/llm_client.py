@@ -0,0 +1,151 @@
+# llm_client.py
+# Async client for Ollama's /api/generate with a pooled HTTP connection,
+# explicit timeouts, a concurrency cap and optional NDJSON streaming.
+import asyncio
+import json
+import time
+from collections import deque
+
+import httpx
+
+
+class JSONObjectScanner:
+    """
+    Finds the first complete top-level JSON object in text that arrives in
+    pieces, so a streamed reply can be cut off as soon as it is closed.
+    """
+    def __init__(self):
+        self.buf = []
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escape = False
+
+    def feed(self, piece: str) -> str | None:
+        for ch in piece:
+            if not self.started:
+                if ch != "{":
+                    continue
+                self.started = True
+            self.buf.append(ch)
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == "{":
+                self.depth += 1
+            elif ch == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    return "".join(self.buf)
+        return None
+
+
+class OllamaClient:
+    def __init__(
+        self,
+        url: str = "http://localhost:11434/api/generate",
+        model: str = "llama3",
+        timeout: float = 120.0,
+        connect_timeout: float = 5.0,
+        max_concurrency: int = 4,
+        max_connections: int = 8,
+        stream: bool = False,
+        window: int = 2048
+    ):
+        """window: how many recent requests the TTFT/latency percentiles cover."""
+        self.url = url
+        self.model = model
+        self.stream = stream
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+        # Ollama serves a few generations at a time; queue the rest here
+        self._sem = asyncio.Semaphore(max_concurrency)
+
+        self.requests = 0
+        self.early_stops = 0
+        # per-request seconds to the first generated token (the whole reply
+        # when not streaming) and to the end, for stats()
+        self._ttft: deque[float] = deque(maxlen=window)
+        self._latency: deque[float] = deque(maxlen=window)
+
+    async def generate(self, prompt: str, stream: bool | None = None, stop_at_json: bool = False) -> str:
+        """
+        Return the model's reply. With streaming on, stop_at_json returns as
+        soon as the first complete JSON object has been generated.
+        """
+        stream = self.stream if stream is None else stream
+        async with self._sem:
+            self.requests += 1
+            t0 = time.perf_counter()
+            if stream:
+                text, ttft = await self._generate_stream(prompt, stop_at_json, t0)
+            else:
+                resp = await self.client.post(self.url, json={
+                    "model": self.model,
+                    "prompt": prompt,
+                    "stream": False
+                })
+                resp.raise_for_status()
+                text = resp.json().get("response", "")
+                ttft = time.perf_counter() - t0
+            if ttft is not None:
+                self._ttft.append(ttft)
+            self._latency.append(time.perf_counter() - t0)
+        return text.strip()
+
+    async def _generate_stream(self, prompt: str, stop_at_json: bool, t0: float) -> tuple[str, float | None]:
+        """The reply and this request's time to its first token (None if none came)."""
+        pieces = []
+        scanner = JSONObjectScanner() if stop_at_json else None
+        ttft = None
+        async with self.client.stream("POST", self.url, json={
+            "model": self.model,
+            "prompt": prompt,
+            "stream": True
+        }) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                piece = chunk.get("response", "")
+                if piece and ttft is None:
+                    ttft = time.perf_counter() - t0
+                pieces.append(piece)
+                if scanner is not None and (obj := scanner.feed(piece)) is not None:
+                    # leaving the stream closes the connection, which also
+                    # stops the generation on the Ollama side
+                    self.early_stops += 1
+                    return obj, ttft
+                if chunk.get("done"):
+                    break
+        return "".join(pieces), ttft
+
+    def stats(self) -> dict:
+        ttft, latency = sorted(self._ttft), sorted(self._latency)
+        pick = lambda xs, q: xs[min(len(xs) - 1, int(q * len(xs)))] * 1000 if xs else None
+        return {
+            "requests":       self.requests,
+            "early_stops":    self.early_stops,
+            # over the last `window` requests
+            "ttft_p50_ms":    pick(ttft, .50),
+            "ttft_p95_ms":    pick(ttft, .95),
+            "ttft_p99_ms":    pick(ttft, .99),
+            "latency_p50_ms": pick(latency, .50),
+            "latency_p95_ms": pick(latency, .95),
+            "latency_p99_ms": pick(latency, .99)
+        }
+
+    async def close(self) -> None:
+        await self.client.aclose()
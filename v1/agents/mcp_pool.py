@@ -0,0 +1,227 @@
+# mcp_pool.py
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+log = logging.getLogger(__name__)
+
+
+class _Slot:
+    """One long-lived MCP server process and its initialized session."""
+    def __init__(self, index: int):
+        self.index = index
+        self.session: ClientSession | None = None
+        self.last_used = 0.0
+        self.restarts = 0
+        self.start_failures = 0   # failed starts since the session last came up
+        self.generation = 0
+        self.stop = asyncio.Event()
+        self.task: asyncio.Task | None = None
+
+
+class MCPSessionPool:
+    """
+    Keeps `size` stdio MCP sessions alive and multiplexes tool calls over them.
+
+    Each session is owned by its own worker task (the stdio/anyio context
+    managers must be entered and exited by the same task). A worker that loses
+    its child process restarts it; callers retry once on another session.
+    Waiting for a free session is bounded by call_timeout, and once every
+    slot has failed to start since it last came up, calls fail at once
+    instead of waiting on a pool that cannot serve them.
+    """
+    def __init__(
+        self,
+        params: StdioServerParameters,
+        size: int = 4,
+        call_timeout: float = 30.0,
+        ping_after: float = 30.0,
+        restart_backoff: float = 0.5
+    ):
+        self.params = params
+        self.size = size
+        self.call_timeout = call_timeout
+        self.ping_after = ping_after
+        self.restart_backoff = restart_backoff
+
+        self._slots: list[_Slot] = []
+        self._idle: asyncio.Queue[tuple[_Slot, int]] = asyncio.Queue()
+        self._in_use = 0
+        self._closing = False
+        self._started = False
+        self._start_lock = asyncio.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    async def start(self) -> None:
+        """Spawn the workers and wait until every session has initialized."""
+        async with self._start_lock:
+            if self._started:
+                return
+            self._closing = False
+            ready = []
+            for i in range(self.size):
+                slot = _Slot(i)
+                started = asyncio.Event()
+                slot.task = asyncio.create_task(self._worker(slot, started))
+                self._slots.append(slot)
+                ready.append(started.wait())
+            await asyncio.gather(*ready)
+            self._started = True
+
+    async def _worker(self, slot: _Slot, started: asyncio.Event) -> None:
+        while not self._closing:
+            slot.stop.clear()
+            try:
+                async with stdio_client(self.params) as (r, w):
+                    # the timeout also bounds initialize() against a child that never answers
+                    async with ClientSession(
+                        r, w, read_timeout_seconds=timedelta(seconds=self.call_timeout)
+                    ) as session:
+                        await session.initialize()
+                        slot.session = session
+                        slot.start_failures = 0
+                        slot.generation += 1
+                        slot.last_used = time.monotonic()
+                        started.set()
+                        await self._idle.put((slot, slot.generation))
+                        await slot.stop.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                if slot.session is None:
+                    slot.start_failures += 1
+                log.exception("MCP session %d died", slot.index)
+            finally:
+                slot.session = None
+                # the first start of a slot may fail; do not block start() forever
+                started.set()
+            if not self._closing:
+                slot.restarts += 1
+                await asyncio.sleep(self.restart_backoff)
+
+    def _unstartable(self) -> bool:
+        """True when no session is up and every slot's latest start failed."""
+        return bool(self._slots) and all(
+            s.session is None and s.start_failures for s in self._slots
+        )
+
+    async def _next_idle(self, deadline: float) -> tuple[_Slot, int]:
+        try:
+            return self._idle.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+        while True:
+            if self._unstartable():
+                raise RuntimeError(
+                    f"no MCP session could be started "
+                    f"({sum(s.start_failures for s in self._slots)} failed starts)"
+                )
+            left = deadline - time.monotonic()
+            if left <= 0:
+                raise TimeoutError(f"no MCP session became free within {self.call_timeout}s")
+            # wake up every restart_backoff to notice slots that cannot start
+            get = asyncio.ensure_future(self._idle.get())
+            try:
+                await asyncio.wait((get,), timeout=min(left, self.restart_backoff))
+            finally:
+                if not get.done():
+                    get.cancel()   # a cancelled Queue.get leaves the entry queued
+            if get.done() and not get.cancelled():
+                return get.result()
+
+    async def _acquire(self) -> _Slot:
+        deadline = time.monotonic() + self.call_timeout
+        while True:
+            slot, generation = await self._next_idle(deadline)
+            if slot.session is None or generation != slot.generation:
+                # stale entry from a session that has since died; the worker
+                # re-queues the slot once its replacement is initialized
+                continue
+            if time.monotonic() - slot.last_used > self.ping_after:
+                try:
+                    await asyncio.wait_for(slot.session.send_ping(), timeout=5)
+                except Exception:
+                    log.warning("MCP session %d failed health check", slot.index)
+                    slot.stop.set()
+                    continue
+                except BaseException:
+                    self._release(slot)
+                    raise
+            return slot
+
+    def _release(self, slot: _Slot) -> None:
+        slot.last_used = time.monotonic()
+        if slot.session is not None and not self._closing:
+            self._idle.put_nowait((slot, slot.generation))
+
+    async def call_tool(self, name: str, arguments: dict, retry: bool = True) -> str:
+        """
+        Call an MCP tool on the next free session and return its text result.
+        Pass retry=False for non-idempotent tools: a failed call may still
+        have been executed by the server.
+        """
+        if not self._started:
+            await self.start()
+        self.calls += 1
+        for attempt in range(2):
+            slot = await self._acquire()
+            try:
+                return await self._call(slot, name, arguments)
+            except Exception:
+                # the slot is restarting; retry elsewhere
+                if attempt or not retry:
+                    raise
+        raise RuntimeError("unreachable")
+
+    async def _call(self, slot: _Slot, name: str, arguments: dict) -> str:
+        """Run one call on a checked-out slot and hand the slot back, or restart it if the call failed."""
+        self._in_use += 1
+        try:
+            resp = await slot.session.call_tool(
+                name=name,
+                arguments=arguments,
+                read_timeout_seconds=timedelta(seconds=self.call_timeout)
+            )
+        except Exception:
+            self.failures += 1
+            # treat the child as broken: restart it
+            slot.stop.set()
+            raise
+        except BaseException:
+            # cancelled by the caller (deadline, client gone). Replies are
+            # matched by request id, so the late one is dropped and the
+            # session can serve the next call.
+            self._release(slot)
+            raise
+        finally:
+            self._in_use -= 1
+        self._release(slot)
+        return resp.content[0].text
+
+    def stats(self) -> dict:
+        return {
+            "size":      self.size,
+            "in_use":    self._in_use,
+            "live":      sum(1 for s in self._slots if s.session is not None),
+            "restarts":  sum(s.restarts for s in self._slots),
+            "calls":     self.calls,
+            "failures":  self.failures
+        }
+
+    async def close(self, drain_timeout: float = 10.0) -> None:
+        """Let in-flight calls finish, then stop every worker and its child process."""
+        deadline = time.monotonic() + drain_timeout
+        while self._in_use and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        self._closing = True
+        for slot in self._slots:
+            slot.stop.set()
+        await asyncio.gather(*(s.task for s in self._slots if s.task), return_exceptions=True)
+        self._slots.clear()
+        self._idle = asyncio.Queue()
+        self._started = False
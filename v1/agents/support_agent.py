@@ -1,5 +1,4 @@
 import json
-import requests
 import asyncio
 import httpx
 from uuid import uuid4
@@ -10,6 +9,8 @@ from a2a.types import (
     MessageSendParams
 )
 
+from agents.llm_client import OllamaClient
+
 class helper:
     """Simple in-process key/value store."""
     def __init__(self):
@@ -27,6 +28,7 @@ class SupportAgent:
     ):
         self.a2a_url   = a2a_url
         self.llm_url   = llm_url
+        self.llm       = OllamaClient(llm_url)
         self.a2a_client: A2AClient | None = None
         self.httpx     = httpx.AsyncClient()
         self.context   = helper()
@@ -37,14 +39,8 @@ class SupportAgent:
                 self.httpx, self.a2a_url
             )
 
-    def ask_llama3(self, prompt: str) -> str:
-        r = requests.post(self.llm_url, json={
-            "model": "llama3",
-            "prompt": prompt,
-            "stream": False
-        })
-        r.raise_for_status()
-        return r.json()["response"].strip()
+    async def ask_llama3(self, prompt: str) -> str:
+        return await self.llm.generate(prompt)
 
     async def handle_query(self, user_text: str) -> str:
         await self.init_a2a()
@@ -64,7 +60,7 @@ class SupportAgent:
             f"Extract the order ID from this message:\n\"{user_text}\"\n"
             "Reply only with the ID."
             )
-            order_id = self.ask_llama3(prompt)
+            order_id = await self.ask_llama3(prompt)
             if not order_id:
                 return "Sorry, I couldn’t find an order ID."
             payload = {
@@ -97,3 +93,4 @@ class SupportAgent:
 
     async def close(self):
         await self.httpx.aclose()
+        await self.llm.close()
@@ -5,7 +5,8 @@ async def main():
     agent = SupportAgent()
     try:
         while True:
-            text = input("Customer: ")
+            # read stdin off the event loop
+            text = await asyncio.to_thread(input, "Customer: ")
             if text.lower() in ("quit", "exit"):
                 break
             reply = await agent.handle_query(text)
@@ -0,0 +1,160 @@
+# admission.py
+# Admission control for the agent pipeline. Each stage (LLM parsing,
+# DatabaseAgent calls, tool calls) runs at most `limit` requests at once and
+# lets at most `max_queue` wait; beyond that, or when the request's deadline
+# cannot be met, the request is shed immediately instead of piling up behind
+# a slow Ollama or database.
+#
+# A request's deadline is an absolute wall-clock time (epoch seconds) held in
+# a context variable, so every stage of one customer message sees it without
+# passing it around, and it can travel to the DatabaseAgent in the A2A
+# payload ("deadline") like trace_id does.
+import asyncio
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+_deadline: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+
+class Overloaded(Exception):
+    """A stage refused or gave up on a request; reason is "queue_full" or "deadline"."""
+    def __init__(self, stage: str, reason: str):
+        super().__init__(f"{stage}: {reason}")
+        self.stage = stage
+        self.reason = reason
+
+
+def current_deadline() -> float | None:
+    return _deadline.get()
+
+
+def remaining() -> float | None:
+    """Seconds left before the current deadline (may be <= 0), or None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.time()
+
+
+@contextmanager
+def deadline_scope(deadline: float | None):
+    """
+    Run the block under an absolute deadline. An enclosing, earlier deadline
+    wins, so a budget can only shrink on the way down the pipeline.
+    """
+    outer = _deadline.get()
+    if deadline is None or (outer is not None and outer <= deadline):
+        yield outer
+        return
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def no_deadline():
+    """
+    Run the block without a deadline, e.g. work shared by callers whose
+    deadlines differ; each caller bounds its own wait instead.
+    """
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+async def within_deadline(aw, stage: str):
+    """Await aw, giving up (Overloaded "deadline") when the current deadline passes."""
+    left = remaining()
+    if left is None:
+        return await aw
+    if left <= 0:
+        if asyncio.iscoroutine(aw):
+            aw.close()
+        raise Overloaded(stage, "deadline")
+    try:
+        return await asyncio.wait_for(aw, timeout=left)
+    except asyncio.TimeoutError:
+        raise Overloaded(stage, "deadline") from None
+
+
+class Stage:
+    def __init__(self, name: str, limit: int, max_queue: int):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self._sem = asyncio.Semaphore(limit)
+        self.active = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_deadline = 0
+        self.wait_seconds = 0.0
+
+    @asynccontextmanager
+    async def admit(self):
+        """
+        Hold one of the stage's slots for the block. Raises Overloaded
+        without waiting when the queue is full or the deadline has passed,
+        and stops waiting when the deadline passes in the queue.
+        """
+        left = remaining()
+        if left is not None and left <= 0:
+            self.shed_deadline += 1
+            raise Overloaded(self.name, "deadline")
+        if self._sem.locked():
+            if self.queued >= self.max_queue:
+                self.shed_queue_full += 1
+                raise Overloaded(self.name, "queue_full")
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+            t0 = time.perf_counter()
+            # not wait_for: before Python 3.12 it can time out after the
+            # acquire has already succeeded, and the permit is lost for good
+            acquire = asyncio.ensure_future(self._sem.acquire())
+            try:
+                await asyncio.wait((acquire,), timeout=left)
+            except BaseException:
+                # the caller was cancelled while queued
+                if acquire.done():
+                    self._sem.release()
+                else:
+                    acquire.cancel()
+                raise
+            finally:
+                self.queued -= 1
+            if not acquire.done():
+                # Semaphore.acquire gives back a permit handed to it while cancelled
+                acquire.cancel()
+                self.shed_deadline += 1
+                raise Overloaded(self.name, "deadline")
+            self.wait_seconds += time.perf_counter() - t0
+        else:
+            await self._sem.acquire()   # a free slot: returns without suspending
+
+        self.admitted += 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._sem.release()
+
+    def stats(self) -> dict:
+        shed = self.shed_queue_full + self.shed_deadline
+        offered = self.admitted + shed
+        return {
+            "limit":           self.limit,
+            "max_queue":       self.max_queue,
+            "active":          self.active,
+            "queued":          self.queued,
+            "max_queued":      self.max_queued,
+            "admitted":        self.admitted,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_deadline":   self.shed_deadline,
+            "shed_rate":       shed / offered if offered else 0.0,
+            "avg_wait_ms":     self.wait_seconds / self.admitted * 1000 if self.admitted else 0.0
+        }
@@ -0,0 +1,275 @@
+# campaigns.py
+# Proactive campaigns: evaluates process_flow.json scenarios over the whole
+# database instead of one tool call at a time. Each scenario's conditions are
+# pushed down to a WHERE clause where they map onto columns; matching rows are
+# streamed from one cursor in fixed-size chunks, re-checked with the compiled
+# engine (so results are exactly what the tool server would decide) and
+# rendered with the scenario's template. Output goes to a JSONL file or to the
+# campaign_outbox table (db/migrations/0003), in batched transactions, so
+# memory stays flat regardless of table size.
+#
+# Scenarios are evaluated independently: a customer can appear in several
+# campaigns of one run. cancel_service rules only make sense as a reply to a
+# request and are not scanned.
+#
+#   cd v2 && python -m agents.campaigns --out campaigns.jsonl
+#   cd v2 && python -m agents.campaigns --table --scenario subscription_renewal_reminder
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+from uuid import uuid4
+
+from agents import migrations, settings
+from agents.flow_engine import CompiledScenario
+
+FLOW_PATH = os.path.join(os.path.dirname(__file__), "process_flow.json")
+DEFAULT_SCENARIOS = ("subscription_renewal_reminder", "birthday_gift_offer", "support_ticket_escalation")
+
+CUSTOMER_COLUMNS = {
+    "customer.id":                   "c.id",
+    "customer.name":                 "c.name",
+    "customer.loyalty_tier":         "c.loyalty_tier",
+    "customer.birth_date":           "c.birth_date",
+    "customer.support_ticket_count": "c.support_ticket_count",
+}
+
+
+class Entity:
+    """One kind of row a scenario can be evaluated against, and how to build its context."""
+    __slots__ = ("name", "source", "columns", "subject")
+
+    def __init__(self, name: str, source: str, columns: dict, subject: str):
+        self.name = name
+        self.source = source
+        self.columns = columns     # context field -> SQL column
+        self.subject = subject     # context field identifying the row
+
+    def select(self) -> str:
+        cols = ", ".join(f'{col} AS "{field}"' for field, col in self.columns.items())
+        return f"SELECT {cols} FROM {self.source}"
+
+    def context(self, row: tuple) -> dict:
+        ctx: dict = {}
+        for field, val in zip(self.columns, row):
+            outer, inner = field.split(".")
+            ctx.setdefault(outer, {})[inner] = val
+        return ctx
+
+
+ENTITIES = {
+    "get_order_status": Entity(
+        "order",
+        "orders o JOIN customers c ON o.customer_id = c.id",
+        {
+            "order.id":           "o.id",
+            "order.status":       "o.status",
+            "order.eta_date":     "o.eta_date",
+            "order.total_amount": "o.total_amount",
+            **CUSTOMER_COLUMNS,
+            "customer.total_orders": "c.total_orders",
+        },
+        "order.id"
+    ),
+    "subscription_status": Entity(
+        "subscription",
+        "subscriptions s JOIN customers c ON s.customer_id = c.id",
+        {
+            "subscription.id":           "s.id",
+            "subscription.plan":         "s.plan",
+            "subscription.status":       "s.status",
+            "subscription.renewal_date": "s.renewal_date",
+            **CUSTOMER_COLUMNS,
+        },
+        "subscription.id"
+    ),
+    # support_request and "any" rules only see the customer row
+    "support_request": Entity("customer", "customers c", dict(CUSTOMER_COLUMNS), "customer.id"),
+}
+ENTITIES["any"] = ENTITIES["support_request"]
+
+
+def pushdown(conditions: dict, columns: dict, today: date) -> tuple[list[str], list]:
+    """
+    WHERE terms and parameters for the conditions that map onto columns.
+    Conditions on unknown fields are skipped (the engine re-check applies
+    them); NULL columns never satisfy a term, as None fails in the engine.
+    """
+    terms, params = [], []
+    for key, exp in conditions.items():
+        col = columns.get(key)
+        if key == "action" or col is None:
+            continue
+        if isinstance(exp, list):
+            if not exp:
+                terms.append("0")
+                continue
+            terms.append(f"{col} IN ({', '.join('?' * len(exp))})")
+            params.extend(exp)
+        elif isinstance(exp, dict):
+            if "gte" in exp:
+                terms.append(f"{col} >= ?")
+                params.append(exp["gte"])
+            if "gt" in exp:
+                terms.append(f"{col} > ?")
+                params.append(exp["gt"])
+            if "within_days" in exp:
+                # ISO dates compare as text; malformed ones are dropped by the re-check
+                terms.append(f"{col} BETWEEN ? AND ?")
+                params += [today.isoformat(), (today + timedelta(days=exp["within_days"])).isoformat()]
+            if "is_today" in exp:
+                terms.append(f"{col} = ?")
+                params.append(today.isoformat())
+        else:
+            terms.append(f"{col} = ?")
+            params.append(exp)
+    return terms, params
+
+
+def load_scenarios(ids: list[str] | None = None, path: str = FLOW_PATH) -> list[dict]:
+    with open(path) as f:
+        scenarios = json.load(f)["scenarios"]
+    if not ids:
+        return scenarios
+    by_id = {s.get("id"): s for s in scenarios}
+    missing = [i for i in ids if i not in by_id]
+    if missing:
+        raise ValueError(f"Unknown scenario(s): {', '.join(missing)}")
+    return [by_id[i] for i in ids]
+
+
+class JsonlSink:
+    def __init__(self, path: str):
+        self.f = sys.stdout if path == "-" else open(path, "a")
+
+    def write(self, rows: list[tuple]) -> None:
+        for run_id, scenario_id, customer_id, subject_id, message, created_at in rows:
+            self.f.write(json.dumps({
+                "run_id":      run_id,
+                "scenario_id": scenario_id,
+                "customer_id": customer_id,
+                "subject_id":  subject_id,
+                "message":     message,
+                "created_at":  created_at
+            }) + "\n")
+
+    def close(self) -> None:
+        if self.f is not sys.stdout:
+            self.f.close()
+
+
+class TableSink:
+    """campaign_outbox rows, one transaction per chunk on its own connection."""
+    def __init__(self, path: str):
+        migrations.migrate(path)
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA busy_timeout = 30000")
+
+    def write(self, rows: list[tuple]) -> None:
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(
+                "INSERT INTO campaign_outbox(run_id, scenario_id, customer_id, subject_id, message, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def scan(
+    path: str,
+    scenarios: list[dict],
+    sink,
+    today: date | None = None,
+    chunk: int = 5000,
+    run_id: str | None = None,
+    log=print
+) -> dict:
+    """
+    Run every scenario over the database at path, writing matches to sink.
+    Returns per-scenario counts (scanned = rows the pushed-down query
+    returned, matched = rows that passed the engine and were written).
+    """
+    today = today or date.today()
+    run_id = run_id or uuid4().hex[:12]
+    created_at = datetime.now().isoformat(timespec="seconds")
+    # WAL lets the outbox writer commit while this cursor holds its snapshot
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = WAL")
+    report = {"run_id": run_id, "today": today.isoformat(), "scenarios": {}}
+    t_run = time.perf_counter()
+    try:
+        for raw in scenarios:
+            scen = CompiledScenario(raw)
+            entity = ENTITIES.get(scen.action)
+            if entity is None:
+                raise ValueError(f"Scenario {scen.id!r}: action {scen.action!r} cannot be scanned")
+            terms, params = pushdown(raw["conditions"], entity.columns, today)
+            sql = entity.select() + (" WHERE " + " AND ".join(terms) if terms else "")
+            customer_idx = list(entity.columns).index("customer.id")
+            subject_idx = list(entity.columns).index(entity.subject)
+
+            scanned = matched = 0
+            t0 = time.perf_counter()
+            cur = conn.execute(sql, params)
+            while rows := cur.fetchmany(chunk):
+                out = []
+                for row in rows:
+                    ctx = entity.context(row)
+                    if scen.matches(ctx, today):
+                        out.append((run_id, scen.id, row[customer_idx], row[subject_idx],
+                                    scen.render(ctx), created_at))
+                scanned += len(rows)
+                matched += len(out)
+                if out:
+                    sink.write(out)
+            cur.close()
+            seconds = time.perf_counter() - t0
+            report["scenarios"][scen.id] = {
+                "entity":      entity.name,
+                "pushed_down": len(terms),
+                "scanned":     scanned,
+                "matched":     matched,
+                "seconds":     round(seconds, 3),
+                "rows_per_s":  round(scanned / seconds) if seconds > 0 else None
+            }
+            log(f"  {scen.id:<36} {entity.name:<12} scanned {scanned:>11,}  matched {matched:>10,}  "
+                f"({scanned / max(seconds, 1e-9):,.0f} rows/s)")
+    finally:
+        conn.close()
+        sink.close()
+    report["seconds"] = round(time.perf_counter() - t_run, 3)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="evaluate process-flow scenarios over the whole database")
+    parser.add_argument("--db", default=settings.SUPPORT_DB_PATH)
+    parser.add_argument("--scenario", action="append", dest="scenarios",
+                        help=f"scenario id, repeatable (default: {', '.join(DEFAULT_SCENARIOS)})")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--out", default="-", help="JSONL file to append to ('-' = stdout)")
+    target.add_argument("--table", action="store_true", help="write to the campaign_outbox table instead")
+    parser.add_argument("--today", help="YYYY-MM-DD the date rules use (default: today)")
+    parser.add_argument("--chunk", type=int, default=5000, help="rows fetched per cursor round trip")
+    args = parser.parse_args()
+
+    if settings.DB_AUTO_MIGRATE:
+        migrations.migrate(args.db)
+    sink = TableSink(args.db) if args.table else JsonlSink(args.out)
+    result = scan(
+        args.db, load_scenarios(args.scenarios or list(DEFAULT_SCENARIOS)), sink,
+        today=date.fromisoformat(args.today) if args.today else None,
+        chunk=args.chunk,
+        log=lambda line: print(line, file=sys.stderr)
+    )
+    print(json.dumps(result), file=sys.stderr)
@@ -0,0 +1,179 @@
+# context_cache.py
+# Read-through cache of the order/subscription contexts the tool server
+# assembles for the process flow. Local writes invalidate exactly the
+# entries they touch; writes from other processes (other stdio tool servers,
+# db scripts) are caught through PRAGMA data_version and flush everything.
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+
+class _Entry:
+    __slots__ = ("value", "stored_at", "customer_id")
+
+    def __init__(self, value: dict, stored_at: float, customer_id):
+        self.value = value
+        self.stored_at = stored_at
+        self.customer_id = customer_id
+
+
+class ContextCache:
+    def __init__(
+        self,
+        version: Callable[[], int | None],
+        max_entries: int = 10000,
+        ttl: float = 30.0
+    ):
+        """
+        version returns the database's external-change marker
+        (SQLitePool.data_version), or None when it cannot be read; the cache
+        is then bypassed for that lookup. Cached contexts are shared: callers
+        must not mutate them.
+        """
+        self.version = version
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._by_customer: dict[str, set[tuple]] = {}
+        self._lock = threading.Lock()
+        self._seen_version: int | None = None
+        # bumped on every invalidation; loads that overlap one are not stored
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.invalidated = 0
+        self.flushes = 0
+        self.evictions = 0
+
+    def fetch(self, key: tuple, load: Callable[[], dict | None]) -> dict | None:
+        """Cached context for key, or load() it (None results are not cached)."""
+        version = self.version()
+        now = time.monotonic()
+        if version is None:
+            # the writer is busy: load outside the lock so readers don't queue behind each other
+            with self._lock:
+                self.bypassed += 1
+            return load()
+        with self._lock:
+            if version != self._seen_version:
+                if self._seen_version is not None and self._entries:
+                    self._flush()
+                self._seen_version = version
+            entry = self._entries.get(key)
+            if entry is not None and now - entry.stored_at > self.ttl:
+                self._drop(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            self.misses += 1
+            epoch = self._epoch
+        value = load()
+        if value is not None:
+            with self._lock:
+                if epoch == self._epoch:
+                    self._store(key, value, now)
+        return value
+
+    def fetch_many(
+        self,
+        keys: list[tuple],
+        load: Callable[[list[tuple]], dict[tuple, dict]]
+    ) -> dict[tuple, dict]:
+        """
+        Cached contexts for keys; the misses are loaded in one load(missing)
+        call. Keys absent from the result were not found.
+        """
+        version = self.version()
+        now = time.monotonic()
+        found, missing = {}, []
+        if version is None:
+            with self._lock:
+                self.bypassed += len(keys)
+            return load(list(dict.fromkeys(keys)))
+        with self._lock:
+            if version != self._seen_version:
+                if self._seen_version is not None and self._entries:
+                    self._flush()
+                self._seen_version = version
+            for key in dict.fromkeys(keys):
+                entry = self._entries.get(key)
+                if entry is not None and now - entry.stored_at > self.ttl:
+                    self._drop(key)
+                    entry = None
+                if entry is None:
+                    missing.append(key)
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    found[key] = entry.value
+                    self.hits += 1
+            epoch = self._epoch
+        if missing:
+            loaded = load(missing)
+            found.update(loaded)
+            with self._lock:
+                if epoch == self._epoch:
+                    for key, value in loaded.items():
+                        self._store(key, value, now)
+        return found
+
+    def invalidate(self, key: tuple) -> None:
+        with self._lock:
+            self._epoch += 1
+            if key in self._entries:
+                self._drop(key)
+                self.invalidated += 1
+
+    def invalidate_customer(self, customer_id: str) -> None:
+        """Drop every context that embeds this customer's row."""
+        with self._lock:
+            self._epoch += 1
+            for key in list(self._by_customer.get(customer_id, ())):
+                self._drop(key)
+                self.invalidated += 1
+
+    def _store(self, key: tuple, value: dict, now: float) -> None:
+        if key in self._entries:
+            self._drop(key)
+        customer_id = value.get("customer", {}).get("id")
+        self._entries[key] = _Entry(value, now, customer_id)
+        if customer_id is not None:
+            self._by_customer.setdefault(customer_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key: tuple) -> None:
+        entry = self._entries.pop(key)
+        keys = self._by_customer.get(entry.customer_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_customer[entry.customer_id]
+
+    def _flush(self) -> None:
+        self._entries.clear()
+        self._by_customer.clear()
+        self._epoch += 1
+        self.flushes += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries":     len(self._entries),
+            "hits":        self.hits,
+            "misses":      self.misses,
+            "bypassed":    self.bypassed,
+            "invalidated": self.invalidated,
+            "flushes":     self.flushes,
+            "evictions":   self.evictions,
+            "hit_rate":    self.hits / lookups if lookups else 0.0
+        }
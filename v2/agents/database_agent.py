@@ -1,17 +1,33 @@
+import os
 import json
+import asyncio
 import uvicorn
+from uuid import uuid4
 
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from mcp import StdioServerParameters
 from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
 
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events.event_queue import EventQueue
 from a2a.utils import new_agent_text_message
-from a2a.types import AgentCard, AgentSkill, AgentCapabilities, AgentAuthentication
+from a2a.types import (
+    AgentCard, AgentSkill, AgentCapabilities, AgentAuthentication,
+    Artifact, Part, Task, TaskArtifactUpdateEvent, TaskState, TaskStatus,
+    TaskStatusUpdateEvent, TextPart
+)
+
+from agents import admission, settings, tracing
+from agents.admission import Overloaded, Stage
+from agents.single_flight import SingleFlight, call_key
+from agents.task_store import make_task_store
+from agents.tool_transport import make_transport
+
+TRACER = tracing.make_tracer("database_agent")
 
 # 1) Define A2A skills
 skill_status = AgentSkill(
@@ -26,6 +42,16 @@ skill_list = AgentSkill(
     tags=["order","list"],
     examples=['{"action":"get_customer_orders","parameters":{"customer_id":"C001"}}']
 )
+# Keyset pages for very large accounts: pass next_cursor back as "cursor"
+skill_list_page = AgentSkill(
+    id="get_customer_orders_page", name="Get Customer Orders (paged)",
+    description="Lists a page of a customer's orders in ID order, optionally filtered by "
+                "status and ETA date range; returns next_cursor for the following page",
+    tags=["order","list","page"],
+    examples=['{"action":"get_customer_orders_page","parameters":{"customer_id":"C001","limit":50}}',
+              '{"action":"get_customer_orders_page","parameters":{"customer_id":"C001","limit":50,'
+              '"cursor":"ORD050","status":"Shipped","eta_from":"2025-01-01","eta_to":"2025-03-31"}}']
+)
 # New skills
 skill_cancel = AgentSkill(
     id="cancel_service", name="Cancel Service",
@@ -46,58 +72,310 @@ skill_support = AgentSkill(
     examples=['{"action":"support_request","parameters":{"customer_id":"C001"}}']
 )
 
+# Batched lookups: one round trip and one IN (...) query for many IDs.
+# results[i] answers the i-th ID; unknown IDs get a per-item "error".
+skill_status_batch = AgentSkill(
+    id="get_order_status_batch", name="Get Order Status (batch)",
+    description="Returns status/customer_id for each order in a list, in request order",
+    tags=["order","status","batch"],
+    examples=['{"action":"get_order_status_batch","parameters":{"order_ids":["ORD001","ORD002"]}}']
+)
+skill_sub_status_batch = AgentSkill(
+    id="subscription_status_batch", name="Subscription Status (batch)",
+    description="Checks the status of each subscription in a list, in request order",
+    tags=["subscription","status","batch"],
+    examples=['{"action":"subscription_status_batch","parameters":{"subscription_ids":["SUB001","SUB002"]}}']
+)
+
 agent_card = AgentCard(
     name="DatabaseAgent", description="Bridges A2A→MCP tools",
     url="http://127.0.0.1:8000", version="1.0.0",
     defaultInputModes=["json"], defaultOutputModes=["json"],
-    capabilities=AgentCapabilities(),
-    skills=[skill_status, skill_list, skill_cancel, skill_sub_status, skill_support],
+    # "stream": true in the payload (message/stream) returns list results in chunks
+    capabilities=AgentCapabilities(streaming=True),
+    skills=[skill_status, skill_list, skill_list_page, skill_cancel, skill_sub_status, skill_support,
+            skill_status_batch, skill_sub_status_batch],
     authentication=AgentAuthentication(schemes=["public"])
 )
 
+READ_ACTIONS = {
+    "get_order_status", "get_customer_orders", "get_customer_orders_page", "subscription_status",
+    "get_order_status_batch", "subscription_status_batch"
+}
+# never coalesced: every write must reach the tool server
+WRITE_ACTIONS = {"cancel_service", "support_request"}
+
+# list results a streaming reply splits into chunks: action -> list key
+STREAM_ITEMS = {
+    "get_order_status_batch":    "results",
+    "subscription_status_batch": "results"
+}
+# streamed page by page from the paged tool, so neither process holds the whole list
+PAGED_STREAMS = {
+    "get_customer_orders":      "get_customer_orders_page",
+    "get_customer_orders_page": "get_customer_orders_page"
+}
+
 class DatabaseAgentExecutor(AgentExecutor):
-    def __init__(self):
+    def __init__(
+        self,
+        transport: str = settings.TOOL_TRANSPORT,
+        pool_size: int = settings.MCP_POOL_SIZE,
+        single_flight: bool = settings.SINGLE_FLIGHT,
+        stream_chunk: int = settings.STREAM_CHUNK_ITEMS
+    ):
         # how to launch the MCP server
         self.std_params = StdioServerParameters(
             command="python",
-            args=["agents/db_tools_server.py"],
-            env=None
+            args=["-m", "agents.db_tools_server"],
+            # the child is our own tool server: pass settings (SUPPORT_DB_PATH, ...) through
+            env=dict(os.environ)
         )
+        # pooled stdio sessions or in-process tool calls
+        self.transport = make_transport(
+            transport, self.std_params, pool_size, settings.MCP_CALL_TIMEOUT
+        )
+        # identical concurrent reads share one in-flight tool call
+        self.single_flight = SingleFlight() if single_flight else None
+        # bounded tool concurrency and queue; the caller's deadline bounds the wait
+        self.admission = Stage("tools", settings.TOOL_MAX_CONCURRENCY, settings.TOOL_QUEUE_MAX)
+        # list items per artifact chunk in streaming replies
+        self.stream_chunk = stream_chunk
+
+    async def start(self) -> None:
+        await self.transport.start()
+
+    async def close(self) -> None:
+        await self.transport.close()
+        TRACER.close()
+
+    async def metrics(self) -> dict:
+        """Executor spans/counters, transport stats and each tool server's metrics."""
+        return {
+            "agent":         TRACER.stats(),
+            "transport":     {"name": self.transport.name, **self.transport.stats()},
+            "single_flight": self.single_flight.stats() if self.single_flight else None,
+            "admission":     self.admission.stats(),
+            "tools":         await self.transport.metrics()
+        }
 
     async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
         raw = context.message.parts[0].root.text
         payload = json.loads(raw)
         action = payload.get("action")
         params = payload.get("parameters", {})
+        trace_id = payload.get("trace_id")
+        deadline = payload.get("deadline")   # epoch seconds, set by SupportAgent
+
+        with tracing.trace(trace_id), admission.deadline_scope(deadline), TRACER.span("execute", action=action):
+            if payload.get("stream") and action in PAGED_STREAMS:
+                await self.stream_pages(context, event_queue, action, params, trace_id)
+                return
+            result = await self.run_action(action, params, trace_id)
 
-        if action in (
-            "get_order_status",
-            "get_customer_orders",
-            "cancel_service",
-            "subscription_status",
-            "support_request"
-        ):
-            # call the MCP tool via stdio
-            async with stdio_client(self.std_params) as (r, w):
-                async with ClientSession(r, w) as session:
-                    await session.initialize()
-                    tool_resp = await session.call_tool(name=action, arguments=params)
-                    result = tool_resp.content[0].text
+        if payload.get("stream"):
+            await self.stream_result(context, event_queue, action, result)
         else:
-            result = f"Unknown action: {action}"
+            event_queue.enqueue_event(new_agent_text_message(result))
+
+    async def run_action(self, action: str, params: dict, trace_id: str | None) -> str:
+        if action not in READ_ACTIONS | WRITE_ACTIONS:
+            TRACER.incr("unknown_action")
+            return f"Unknown action: {action}"
+        try:
+            if self.single_flight is not None and action in READ_ACTIONS:
+                # a waiter stops waiting at its deadline; the shared call carries on
+                return await admission.within_deadline(
+                    self.coalesced_read(action, params, trace_id), "tools"
+                )
+            return await self.admitted_call(action, params, trace_id)
+        except Overloaded as e:
+            TRACER.incr(f"shed.{e.reason}")
+            return json.dumps({"error": "overloaded", "stage": e.stage, "reason": e.reason})
+
+    async def stream_result(
+        self, context: RequestContext, event_queue: EventQueue, action: str, result: str
+    ) -> None:
+        """
+        Reply as a task whose artifact arrives in chunks, then a final
+        completed status. Each chunk is a complete JSON object carrying up to
+        stream_chunk items of the STREAM_ITEMS list; other results are sent
+        as a single chunk.
+        """
+        event_queue.enqueue_event(Task(
+            id=context.task_id,
+            contextId=context.context_id,
+            status=TaskStatus(state=TaskState.working),
+            history=[context.message]
+        ))
+        chunks = self.result_chunks(action, result)
+        artifact_id = uuid4().hex
+        for i, text in enumerate(chunks):
+            event_queue.enqueue_event(TaskArtifactUpdateEvent(
+                taskId=context.task_id,
+                contextId=context.context_id,
+                artifact=Artifact(artifactId=artifact_id, name=action, parts=[Part(root=TextPart(text=text))]),
+                append=i > 0,
+                lastChunk=i == len(chunks) - 1
+            ))
+            # let the request handler flush this chunk before queueing the next
+            await asyncio.sleep(0)
+        TRACER.incr("stream.chunks", len(chunks))
+        event_queue.enqueue_event(TaskStatusUpdateEvent(
+            taskId=context.task_id,
+            contextId=context.context_id,
+            status=TaskStatus(state=TaskState.completed),
+            final=True
+        ))
+
+    async def stream_pages(
+        self, context: RequestContext, event_queue: EventQueue, action: str, params: dict,
+        trace_id: str | None
+    ) -> None:
+        """
+        stream_result for an order listing, fetched one keyset page of
+        stream_chunk orders at a time: each artifact chunk is one page
+        ({"orders": [...]}), so memory is bounded by the page size.
+        get_customer_orders runs to the last order. A
+        get_customer_orders_page request keeps its filters and starting
+        cursor and streams up to its `limit` orders (to the last one
+        without a limit); its final chunk carries next_cursor like the
+        unstreamed reply.
+        """
+        event_queue.enqueue_event(Task(
+            id=context.task_id,
+            contextId=context.context_id,
+            status=TaskStatus(state=TaskState.working),
+            history=[context.message]
+        ))
+        size = min(self.stream_chunk, settings.ORDERS_PAGE_MAX)
+        total = params.get("limit") if action == "get_customer_orders_page" else None
+        page = dict(params)
+        artifact_id = uuid4().hex
+        chunks = sent = 0
+        while True:
+            if total is None:
+                page["limit"] = size
+            elif isinstance(total, int) and total > 0:
+                page["limit"] = min(size, total - sent)
+            else:
+                page["limit"] = total   # the tool reports the bad limit
+            text = await self.run_action(PAGED_STREAMS[action], page, trace_id)
+            try:
+                data = json.loads(text)
+            except json.JSONDecodeError:
+                data = None
+            if isinstance(data, dict) and isinstance(data.get("orders"), list) and "error" not in data:
+                cursor = data.get("next_cursor")
+                sent += len(data["orders"])
+                last = cursor is None or (total is not None and sent >= total)
+                chunk = {"orders": data["orders"]}
+                if last and total is not None:
+                    chunk["next_cursor"] = cursor
+                text = json.dumps(chunk)
+            else:
+                last = True   # errors end the stream, in place of the next chunk
+            event_queue.enqueue_event(TaskArtifactUpdateEvent(
+                taskId=context.task_id,
+                contextId=context.context_id,
+                artifact=Artifact(artifactId=artifact_id, name=action, parts=[Part(root=TextPart(text=text))]),
+                append=chunks > 0,
+                lastChunk=last
+            ))
+            chunks += 1
+            await asyncio.sleep(0)
+            if last:
+                break
+            page["cursor"] = cursor
+        TRACER.incr("stream.chunks", chunks)
+        event_queue.enqueue_event(TaskStatusUpdateEvent(
+            taskId=context.task_id,
+            contextId=context.context_id,
+            status=TaskStatus(state=TaskState.completed),
+            final=True
+        ))
+
+    def result_chunks(self, action: str, result: str) -> list[str]:
+        key = STREAM_ITEMS.get(action)
+        try:
+            data = json.loads(result) if key else None
+        except json.JSONDecodeError:
+            data = None
+        if not isinstance(data, dict) or not isinstance(data.get(key), list) or not data[key]:
+            return [result]
+        items, rest = data[key], {k: v for k, v in data.items() if k != key}
+        n = max(1, self.stream_chunk)
+        return [
+            json.dumps({**(rest if i == 0 else {}), key: items[i:i + n]})
+            for i in range(0, len(items), n)
+        ]
 
-        event_queue.enqueue_event(new_agent_text_message(result))
+    async def call_tool(self, action: str, params: dict, trace_id: str | None) -> str:
+        if trace_id:
+            # lets the tool server file its spans under the same trace
+            params = {**params, "trace_id": trace_id}
+        # call the tool over the configured transport
+        with TRACER.span("tool_call", action=action, transport=self.transport.name):
+            return await self.transport.call(action, params, retry=action in READ_ACTIONS)
+
+    async def admitted_call(self, action: str, params: dict, trace_id: str | None) -> str:
+        """
+        call_tool once the admission stage lets it through. Only the wait is
+        bounded by the deadline: a call that has started runs to completion
+        (writes must not be abandoned half-way, and MCP_CALL_TIMEOUT bounds it).
+        """
+        async with self.admission.admit():
+            return await self.call_tool(action, params, trace_id)
+
+    async def coalesced_read(self, action: str, params: dict, trace_id: str | None) -> str:
+        """
+        Read-only call shared with identical concurrent requests (the first
+        one's trace runs it). The shared call does not inherit the first
+        caller's deadline, so a caller about to time out cannot shed it for
+        the others: it runs as long as one of them still waits (each one's
+        wait is bounded by its own deadline in run_action).
+        """
+        async def shared() -> str:
+            with admission.no_deadline():
+                return await self.admitted_call(action, params, trace_id)
+
+        result, joined = await self.single_flight.run(call_key(action, params), shared)
+        if joined:
+            TRACER.incr(f"coalesced.{action}")
+        return result
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
         return
 
+def metrics_route(executor: DatabaseAgentExecutor, task_store=None) -> Route:
+    """GET /metrics next to the A2A endpoints."""
+    async def metrics(request: Request) -> JSONResponse:
+        body = await executor.metrics()
+        if task_store is not None:
+            body["task_store"] = task_store.stats()
+        return JSONResponse(body)
+    return Route("/metrics", metrics, methods=["GET"])
+
 if __name__ == "__main__":
+    executor = DatabaseAgentExecutor()
+    # bounded by size and age, unlike a2a's InMemoryTaskStore
+    task_store = make_task_store(
+        settings.TASK_STORE_BACKEND,
+        settings.TASK_STORE_PATH,
+        max_tasks=settings.TASK_STORE_MAX,
+        ttl=settings.TASK_STORE_TTL,
+        max_age=settings.TASK_STORE_MAX_AGE
+    )
     handler = DefaultRequestHandler(
-        agent_executor=DatabaseAgentExecutor(),
-        task_store=InMemoryTaskStore()
+        agent_executor=executor,
+        task_store=task_store
     )
     app = A2AStarletteApplication(
         agent_card=agent_card,
         http_handler=handler
-    ).build()
+    ).build(
+        routes=[metrics_route(executor, task_store)],
+        on_startup=[executor.start],
+        on_shutdown=[executor.close, task_store.close]
+    )
     uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -1,98 +1,159 @@
 # db_tools_server.py
 import os
 import json
-import sqlite3
+import functools
+import traceback
 from uuid import uuid4
-from datetime import datetime, date
-from types import SimpleNamespace
+from datetime import date
 from mcp.server.fastmcp import FastMCP, Context
 
-# --- Load process-flow definitions
+from agents import migrations, settings, tracing
+from agents.context_cache import ContextCache
+from agents.flow_registry import FlowRegistry
+from agents.group_commit import GroupCommitWriter
+from agents.sqlite_pool import SQLitePool
+
+# --- Shape of the context each tool hands to the process flow
+CUSTOMER_FIELDS = dict.fromkeys(
+    ["id", "name", "loyalty_tier", "birth_date", "support_ticket_count"]
+)
+ORDER_FIELDS = dict.fromkeys(["id", "status", "eta_date", "total_amount"])
+SUBSCRIPTION_FIELDS = dict.fromkeys(["id", "plan", "status", "renewal_date"])
+CONTEXT_SCHEMA = {
+    "get_order_status":    {"order": ORDER_FIELDS,
+                            "customer": {**CUSTOMER_FIELDS, "total_orders": None}},
+    "cancel_service":      {"customer": CUSTOMER_FIELDS, "subscription": SUBSCRIPTION_FIELDS},
+    "subscription_status": {"customer": CUSTOMER_FIELDS, "subscription": SUBSCRIPTION_FIELDS},
+    "support_request":     {"customer": CUSTOMER_FIELDS},
+}
+
+# --- Process-flow definitions, compiled into an action-indexed engine; edits
+# to the file are picked up by the registry's watcher or reload_process_flow
 FLOW_PATH = os.path.join(os.path.dirname(__file__), "process_flow.json")
-with open(FLOW_PATH) as f:
-    PROCESS_FLOW = json.load(f)["scenarios"]
-
-# --- Helpers for matching and rendering scenarios
-
-def match_condition(conds, ctx):
-    for key, exp in conds.items():
-        parts = key.split('.')
-        val = ctx
-        for p in parts:
-            val = val.get(p) if isinstance(val, dict) else None
-            if val is None:
-                return False
-        if isinstance(exp, list):
-            if val not in exp:
-                return False
-        elif isinstance(exp, dict):
-            if 'gte' in exp and not (val >= exp['gte']): return False
-            if 'gt'  in exp and not (val >  exp['gt']):  return False
-            if 'within_days' in exp:
-                dt = datetime.strptime(val, "%Y-%m-%d").date()
-                if not (0 <= (dt - date.today()).days <= exp['within_days']):
-                    return False
-            if 'is_today' in exp:
-                dt = datetime.strptime(val, "%Y-%m-%d").date()
-                if dt != date.today():
-                    return False
-        else:
-            if val != exp:
-                return False
-    return True
-
-
-def dict_to_ns(d: dict) -> SimpleNamespace:
-    ns = SimpleNamespace()
-    for k, v in d.items():
-        if isinstance(v, dict):
-            setattr(ns, k, dict_to_ns(v))
-        else:
-            setattr(ns, k, v)
-    return ns
-
-
-def render_template(tpl: str, ctx: dict) -> str:
-    ns = dict_to_ns(ctx)
-    return tpl.format(**vars(ns))
+FLOWS = FlowRegistry(FLOW_PATH, schema=CONTEXT_SCHEMA, poll_interval=settings.FLOW_RELOAD_INTERVAL)
 
 
 def apply_process_flow(action: str, context: dict) -> str | None:
-    for scen in PROCESS_FLOW:
-        if scen['conditions'].get('action') in (action, 'any'):
-            conds = {k: v for k, v in scen['conditions'].items() if k != 'action'}
-            if match_condition(conds, context):
-                return render_template(scen['response_template'], context)
-    return None
+    engine = FLOWS.engine
+    if not TRACER.enabled:
+        return engine.apply(action, context)
+    with TRACER.span("process_flow", action=action) as sp:
+        scen = engine.match(action, context)
+        sp.set(scenario=scen.id if scen else None)
+        TRACER.incr(f"flow.hit.{scen.id}" if scen else f"flow.miss.{action}")
+        return scen.render(context) if scen else None
+
+# --- SQLite access: pooled readers, one serialized writer
+DB_PATH = settings.SUPPORT_DB_PATH
+if settings.DB_AUTO_MIGRATE:
+    # indexes and customers.total_orders (db/migrations) are required below
+    migrations.migrate(DB_PATH)
+POOL = SQLitePool(
+    DB_PATH,
+    max_readers=settings.DB_POOL_SIZE,
+    mmap_size=settings.DB_MMAP_SIZE,
+    cache_size=settings.DB_CACHE_SIZE,
+    writer_synchronous=settings.DB_WRITE_SYNC
+)
+# concurrent tool writes share one commit, acknowledged once it is durable
+WRITES = (
+    GroupCommitWriter(
+        lambda: POOL,   # late-bound: benches swap POOL
+        max_batch=settings.GROUP_COMMIT_MAX_BATCH,
+        max_delay=settings.GROUP_COMMIT_MAX_DELAY
+    )
+    if settings.GROUP_COMMIT else None
+)
+CONTEXTS = (
+    ContextCache(
+        lambda: POOL.data_version(),   # late-bound: benches swap POOL
+        max_entries=settings.CONTEXT_CACHE_SIZE,
+        ttl=settings.CONTEXT_CACHE_TTL
+    )
+    if settings.CONTEXT_CACHE else None
+)
+
+def write(op):
+    """op(conn) inside a committed write transaction: group-committed, or on its own."""
+    if WRITES is not None:
+        return WRITES.submit(op)
+    with POOL.writer() as db:
+        return op(db)
+
+# --- Spans/counters for this process (see agents/tracing.py)
+TRACER = tracing.make_tracer("db_tools_server")
+
+
+def traced_tool(fn):
+    """Run a tool under the caller's trace_id argument, inside a tool.<name> span."""
+    name = f"tool.{fn.__name__}"
 
-# --- SQLite helper
-def get_conn() -> sqlite3.Connection:
-    db_path = os.path.join("db", "real_agent_demo.db")
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not TRACER.enabled:
+            return fn(*args, **kwargs)
+        with tracing.trace(kwargs.get("trace_id") or None), TRACER.span(name):
+            return fn(*args, **kwargs)
+    return wrapper
 
 # --- MCP server & tools
 mcp = FastMCP(name="DatabaseAgent")
 
-@mcp.tool()
-def get_order_status(order_id: str, ctx: Context) -> str:
-    db = get_conn()
-    cur = db.cursor()
-    cur.execute(
-        """
-        SELECT o.id, o.status, o.eta_date, o.total_amount,
-               c.id AS cust_id, c.name, c.loyalty_tier, c.birth_date, c.support_ticket_count
-        FROM orders o
-        JOIN customers c ON o.customer_id = c.id
-        WHERE o.id = ?
-        """,
-        (order_id,)
-    )
-    row = cur.fetchone()
+# tools callable through DatabaseAgentExecutor (stdio or embedded transport)
+TOOL_NAMES = (
+    "get_order_status",
+    "get_customer_orders",
+    "get_customer_orders_page",
+    "cancel_service",
+    "subscription_status",
+    "support_request",
+    "get_order_status_batch",
+    "subscription_status_batch"
+)
+
+# IDs per IN (...) query in the batch tools
+BATCH_CHUNK = 500
+
+def check_batch(ids) -> str | None:
+    if not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+        return "IDs must be a list of strings"
+    if len(ids) > settings.BATCH_MAX_IDS:
+        return f"Too many IDs: {len(ids)} (limit {settings.BATCH_MAX_IDS})"
+    return None
+
+def in_chunks(ids: list[str]):
+    for i in range(0, len(ids), BATCH_CHUNK):
+        chunk = ids[i:i + BATCH_CHUNK]
+        yield chunk, ",".join("?" * len(chunk))
+
+ORDER_CONTEXT_SQL = """
+    SELECT o.id, o.status, o.eta_date, o.total_amount,
+           c.id AS cust_id, c.name, c.loyalty_tier, c.birth_date, c.support_ticket_count,
+           c.total_orders
+    FROM orders o
+    JOIN customers c ON o.customer_id = c.id
+"""
+
+def load_order_context(order_id: str) -> dict | None:
+    with TRACER.span("sql", op="read"), POOL.reader() as db:
+        row = db.execute(ORDER_CONTEXT_SQL + "WHERE o.id = ?", (order_id,)).fetchone()
     if not row:
-        return json.dumps({"error": "Order not found"})
+        return None
+    TRACER.incr("db.rows_read")
+    return order_context_from_row(row)
 
+def load_order_contexts(order_ids: list[str]) -> dict[str, dict]:
+    """Contexts of the orders that exist, by order ID, one IN (...) query per chunk."""
+    found = {}
+    with TRACER.span("sql", op="read", ids=len(order_ids)) as sp, POOL.reader() as db:
+        for chunk, marks in in_chunks(order_ids):
+            for row in db.execute(ORDER_CONTEXT_SQL + f"WHERE o.id IN ({marks})", chunk):
+                found[row["id"]] = order_context_from_row(row)
+        sp.set(rows=len(found))
+    TRACER.incr("db.rows_read", len(found))
+    return found
+
+def order_context_from_row(row) -> dict:
     order = {
         "id":           row["id"],
         "status":       row["status"],
@@ -106,59 +167,153 @@ def get_order_status(order_id: str, ctx: Context) -> str:
         "birth_date":           row["birth_date"],
         "support_ticket_count": row["support_ticket_count"]
     }
-    cur.execute("SELECT COUNT(*) FROM orders WHERE customer_id = ?", (customer["id"],))
-    customer["total_orders"] = cur.fetchone()[0]
+    customer["total_orders"] = row["total_orders"]
+    return {"order": order, "customer": customer}
+
+def order_context(order_id: str) -> dict | None:
+    if CONTEXTS is None:
+        return load_order_context(order_id)
+    return CONTEXTS.fetch(("order", order_id), lambda: load_order_context(order_id))
 
-    context = {"order": order, "customer": customer}
+def order_contexts(order_ids: list[str]) -> dict[str, dict]:
+    if CONTEXTS is None:
+        return load_order_contexts(list(dict.fromkeys(order_ids)))
+    found = CONTEXTS.fetch_many(
+        [("order", oid) for oid in order_ids],
+        lambda keys: {("order", oid): c for oid, c in load_order_contexts([k[1] for k in keys]).items()}
+    )
+    return {key[1]: context for key, context in found.items()}
+
+def order_status_result(context: dict | None) -> dict:
+    if context is None:
+        return {"error": "Order not found"}
+    order, customer = context["order"], context["customer"]
     try:
         if (msg := apply_process_flow("get_order_status", context)):
-            return json.dumps({"message": msg, "customer_id": customer["id"]})
+            return {"message": msg, "customer_id": customer["id"]}
     except Exception as e:
-        return json.dumps({"error": "process_flow_error", "detail": str(e), "trace": traceback.format_exc()})
+        return {"error": "process_flow_error", "detail": str(e), "trace": traceback.format_exc()}
 
-    return json.dumps({
+    return {
         "order_id":    order["id"],
         "status":      order["status"],
         "customer_id": customer["id"]
-    })
+    }
 
 @mcp.tool()
-def get_customer_orders(customer_id: str, ctx: Context) -> str:
-    db = get_conn()
-    cur = db.cursor()
-    cur.execute(
-        "SELECT id, status FROM orders WHERE customer_id = ?",
-        (customer_id,)
-    )
-    rows = cur.fetchall()
+@traced_tool
+def get_order_status(order_id: str, ctx: Context, trace_id: str = "") -> str:
+    return json.dumps(order_status_result(order_context(order_id)))
+
+@mcp.tool()
+@traced_tool
+def get_order_status_batch(order_ids: list[str], ctx: Context, trace_id: str = "") -> str:
+    """get_order_status for many orders; results keep the order (and duplicates) of order_ids."""
+    if (error := check_batch(order_ids)):
+        return json.dumps({"error": error})
+    contexts = order_contexts(order_ids)
+    return json.dumps({"results": [
+        {"order_id": oid, **order_status_result(contexts.get(oid))} for oid in order_ids
+    ]})
+
+@mcp.tool()
+@traced_tool
+def get_customer_orders(customer_id: str, ctx: Context, trace_id: str = "") -> str:
+    with TRACER.span("sql", op="read") as sp, POOL.reader() as db:
+        rows = db.execute(
+            "SELECT id, status FROM orders WHERE customer_id = ?",
+            (customer_id,)
+        ).fetchall()
+        sp.set(rows=len(rows))
+    TRACER.incr("db.rows_read", len(rows))
     orders = [{"id": row["id"], "status": row["status"]} for row in rows]
     return json.dumps({"orders": orders})
 
+def orders_page_query(
+    customer_id: str, limit: int, cursor: str, status: str, eta_from: str, eta_to: str
+) -> tuple[str, list] | str:
+    """
+    Keyset query for one page, or an error. It returns limit + 1 rows, to
+    tell whether more follow. Without filters it reads just those index
+    entries. The status/ETA filters are checked against the covering index
+    (customer_id, id, status, eta_date) in ID order, so a selective filter
+    skips past non-matching entries first. That costs scan time, never
+    table reads or memory.
+    """
+    if not isinstance(limit, int) or not 1 <= limit <= settings.ORDERS_PAGE_MAX:
+        return f"limit must be between 1 and {settings.ORDERS_PAGE_MAX}"
+    sql, args = "SELECT id, status FROM orders WHERE customer_id = ?", [customer_id]
+    if cursor:
+        # the cursor is the last order ID of the previous page
+        sql += " AND id > ?"
+        args.append(cursor)
+    if status:
+        sql += " AND status = ?"
+        args.append(status)
+    for op, day in ((">=", eta_from), ("<=", eta_to)):
+        if not day:
+            continue
+        try:
+            date.fromisoformat(day)
+        except (TypeError, ValueError):
+            return f"Dates must be YYYY-MM-DD, got {day!r}"
+        sql += f" AND eta_date {op} ?"
+        args.append(day)
+    return sql + " ORDER BY id LIMIT ?", args + [limit + 1]
+
 @mcp.tool()
-def cancel_service(subscription_id: str, ctx: Context) -> str:
-    db = get_conn()
-    cur = db.cursor()
-    cur.execute(
-        """
-        SELECT s.id, s.plan, s.status, s.renewal_date,
-               c.id AS cust_id, c.name, c.loyalty_tier, c.birth_date, c.support_ticket_count
-        FROM subscriptions s
-        JOIN customers c ON s.customer_id = c.id
-        WHERE s.id = ?
-        """,
-        (subscription_id,)
-    )
-    row = cur.fetchone()
+@traced_tool
+def get_customer_orders_page(
+    customer_id: str,
+    ctx: Context,
+    limit: int = 50,
+    cursor: str = "",
+    status: str = "",
+    eta_from: str = "",
+    eta_to: str = "",
+    trace_id: str = ""
+) -> str:
+    """
+    Up to `limit` of a customer's orders in order ID order, optionally only
+    one status and/or an ETA range (inclusive ISO dates). next_cursor is
+    passed back as `cursor` for the following page; it is null on the last.
+    Holds at most limit + 1 rows whatever the size of the account (see
+    orders_page_query for what filters cost).
+    """
+    query = orders_page_query(customer_id, limit, cursor, status, eta_from, eta_to)
+    if isinstance(query, str):
+        return json.dumps({"error": query})
+    with TRACER.span("sql", op="read") as sp, POOL.reader() as db:
+        rows = db.execute(*query).fetchall()
+        sp.set(rows=len(rows))
+    TRACER.incr("db.rows_read", len(rows))
+    more = len(rows) > limit
+    orders = [{"id": row["id"], "status": row["status"]} for row in rows[:limit]]
+    return json.dumps({"orders": orders, "next_cursor": orders[-1]["id"] if more else None})
+
+@mcp.tool()
+@traced_tool
+def cancel_service(subscription_id: str, ctx: Context, trace_id: str = "") -> str:
+    def request_cancellation(db):
+        row = db.execute(SUBSCRIPTION_CONTEXT_SQL + "WHERE s.id = ?", (subscription_id,)).fetchone()
+        # request ids are 6 random hex digits: draw again until one is free
+        while row and not db.execute(
+            "INSERT OR IGNORE INTO cancellation_requests(id,customer_id,service_id,request_date,status)"
+            " VALUES(?,?,?,?,?)",
+            (f"CR{uuid4().hex[:6]}", row["cust_id"], subscription_id, date.today().isoformat(), "Pending")
+        ).rowcount:
+            pass
+        return row
+
+    with TRACER.span("sql", op="write"):
+        row = write(request_cancellation)
     if not row:
         return json.dumps({"error": "Subscription not found"})
-
-    req_id = f"CR{uuid4().hex[:6]}"
-    today = date.today().isoformat()
-    cur.execute(
-        "INSERT INTO cancellation_requests(id,customer_id,service_id,request_date,status) VALUES(?,?,?,?,?)",
-        (req_id, row["cust_id"], subscription_id, today, "Pending")
-    )
-    db.commit()
+    TRACER.incr("db.rows_read")
+    TRACER.incr("db.rows_written")
+    # after commit, so a concurrent read cannot re-cache the old context
+    if CONTEXTS is not None:
+        CONTEXTS.invalidate(("subscription", subscription_id))
 
     subscription = {
         "id":           row["id"],
@@ -182,24 +337,33 @@ def cancel_service(subscription_id: str, ctx: Context) -> str:
 
     return json.dumps({"subscription_id": subscription_id, "status": "cancelled"})
 
-@mcp.tool()
-def subscription_status(subscription_id: str, ctx: Context) -> str:
-    db = get_conn()
-    cur = db.cursor()
-    cur.execute(
-        """
-        SELECT s.id, s.plan, s.status, s.renewal_date,
-               c.id AS cust_id, c.name, c.loyalty_tier, c.birth_date, c.support_ticket_count
-        FROM subscriptions s
-        JOIN customers c ON s.customer_id = c.id
-        WHERE s.id = ?
-        """,
-        (subscription_id,)
-    )
-    row = cur.fetchone()
+SUBSCRIPTION_CONTEXT_SQL = """
+    SELECT s.id, s.plan, s.status, s.renewal_date,
+           c.id AS cust_id, c.name, c.loyalty_tier, c.birth_date, c.support_ticket_count
+    FROM subscriptions s
+    JOIN customers c ON s.customer_id = c.id
+"""
+
+def load_subscription_context(subscription_id: str) -> dict | None:
+    with TRACER.span("sql", op="read"), POOL.reader() as db:
+        row = db.execute(SUBSCRIPTION_CONTEXT_SQL + "WHERE s.id = ?", (subscription_id,)).fetchone()
     if not row:
-        return json.dumps({"error": "Subscription not found"})
+        return None
+    TRACER.incr("db.rows_read")
+    return subscription_context_from_row(row)
+
+def load_subscription_contexts(subscription_ids: list[str]) -> dict[str, dict]:
+    """Contexts of the subscriptions that exist, by subscription ID."""
+    found = {}
+    with TRACER.span("sql", op="read", ids=len(subscription_ids)) as sp, POOL.reader() as db:
+        for chunk, marks in in_chunks(subscription_ids):
+            for row in db.execute(SUBSCRIPTION_CONTEXT_SQL + f"WHERE s.id IN ({marks})", chunk):
+                found[row["id"]] = subscription_context_from_row(row)
+        sp.set(rows=len(found))
+    TRACER.incr("db.rows_read", len(found))
+    return found
 
+def subscription_context_from_row(row) -> dict:
     subscription = {
         "id":           row["id"],
         "plan":         row["plan"],
@@ -213,44 +377,88 @@ def subscription_status(subscription_id: str, ctx: Context) -> str:
         "birth_date":           row["birth_date"],
         "support_ticket_count": row["support_ticket_count"]
     }
-    context = {"customer": customer, "subscription": subscription}
+    return {"customer": customer, "subscription": subscription}
+
+def subscription_context(subscription_id: str) -> dict | None:
+    if CONTEXTS is None:
+        return load_subscription_context(subscription_id)
+    return CONTEXTS.fetch(
+        ("subscription", subscription_id), lambda: load_subscription_context(subscription_id)
+    )
+
+def subscription_contexts(subscription_ids: list[str]) -> dict[str, dict]:
+    if CONTEXTS is None:
+        return load_subscription_contexts(list(dict.fromkeys(subscription_ids)))
+    found = CONTEXTS.fetch_many(
+        [("subscription", sid) for sid in subscription_ids],
+        lambda keys: {
+            ("subscription", sid): c
+            for sid, c in load_subscription_contexts([k[1] for k in keys]).items()
+        }
+    )
+    return {key[1]: context for key, context in found.items()}
+
+def subscription_status_result(subscription_id: str, context: dict | None) -> dict:
+    if context is None:
+        return {"error": "Subscription not found"}
+    subscription = context["subscription"]
     try:
         if (msg := apply_process_flow("subscription_status", context)):
-            return json.dumps({"message": msg})
+            return {"message": msg}
     except Exception as e:
-        return json.dumps({"error": "process_flow_error", "detail": str(e)})
+        return {"error": "process_flow_error", "detail": str(e)}
 
-    return json.dumps({
+    return {
         "subscription_id": subscription_id,
         "status":          subscription["status"],
         "renewal_date":    subscription["renewal_date"]
-    })
+    }
 
 @mcp.tool()
-def support_request(customer_id: str, ctx: Context) -> str:
-    db = get_conn()
-    cur = db.cursor()
-    cur.execute(
-        "SELECT name, loyalty_tier, birth_date, support_ticket_count FROM customers WHERE id = ?",
-        (customer_id,)
-    )
-    row = cur.fetchone()
+@traced_tool
+def subscription_status(subscription_id: str, ctx: Context, trace_id: str = "") -> str:
+    return json.dumps(subscription_status_result(subscription_id, subscription_context(subscription_id)))
+
+@mcp.tool()
+@traced_tool
+def subscription_status_batch(subscription_ids: list[str], ctx: Context, trace_id: str = "") -> str:
+    """subscription_status for many subscriptions, in the order of subscription_ids."""
+    if (error := check_batch(subscription_ids)):
+        return json.dumps({"error": error})
+    contexts = subscription_contexts(subscription_ids)
+    return json.dumps({"results": [
+        {"subscription_id": sid, **subscription_status_result(sid, contexts.get(sid))}
+        for sid in subscription_ids
+    ]})
+
+@mcp.tool()
+@traced_tool
+def support_request(customer_id: str, ctx: Context, trace_id: str = "") -> str:
+    def add_ticket(db):
+        # one atomic increment: concurrent requests never lose a ticket
+        rows = db.execute(
+            "UPDATE customers SET support_ticket_count = support_ticket_count + 1 WHERE id = ?"
+            " RETURNING name, loyalty_tier, birth_date, support_ticket_count",
+            (customer_id,)
+        ).fetchall()
+        return rows[0] if rows else None
+
+    with TRACER.span("sql", op="write"):
+        row = write(add_ticket)
     if not row:
         return json.dumps({"error": "Customer not found"})
-
-    new_count = row["support_ticket_count"] + 1
-    cur.execute(
-        "UPDATE customers SET support_ticket_count = ? WHERE id = ?",
-        (new_count, customer_id)
-    )
-    db.commit()
+    TRACER.incr("db.rows_read")
+    TRACER.incr("db.rows_written")
+    # support_ticket_count is part of every context embedding this customer
+    if CONTEXTS is not None:
+        CONTEXTS.invalidate_customer(customer_id)
 
     customer = {
         "id":                   customer_id,
         "name":                 row["name"],
         "loyalty_tier":         row["loyalty_tier"],
         "birth_date":           row["birth_date"],
-        "support_ticket_count": new_count
+        "support_ticket_count": row["support_ticket_count"]
     }
     context = {"customer": customer}
     try:
@@ -259,7 +467,47 @@ def support_request(customer_id: str, ctx: Context) -> str:
     except Exception as e:
         return json.dumps({"error": "process_flow_error", "detail": str(e)})
 
-    return json.dumps({"support_ticket_count": new_count})
+    return json.dumps({"support_ticket_count": row["support_ticket_count"]})
+
+@mcp.tool()
+def db_pool_stats(ctx: Context) -> str:
+    """Connection pool metrics: wait time, connections in use, statements executed."""
+    return json.dumps(POOL.stats())
+
+@mcp.tool()
+def trace_metrics(ctx: Context) -> str:
+    """Span timings and counters recorded by this tool server process."""
+    return json.dumps({
+        **TRACER.stats(),
+        "db_pool":       POOL.stats(),
+        "context_cache": CONTEXTS.stats() if CONTEXTS else None,
+        "process_flow":  FLOWS.status(),
+        "group_commit":  WRITES.stats() if WRITES else None
+    })
+
+@mcp.tool()
+def group_commit_stats(ctx: Context) -> str:
+    """Write batching: batch sizes, commit and acknowledgement latency."""
+    return json.dumps(WRITES.stats() if WRITES else {"enabled": False})
+
+@mcp.tool()
+def context_cache_stats(ctx: Context) -> str:
+    """Order/subscription context cache: hit rate, invalidations, flushes."""
+    return json.dumps(CONTEXTS.stats() if CONTEXTS else {"enabled": False})
+
+@mcp.tool()
+def reload_process_flow(ctx: Context, force: bool = False) -> str:
+    """Re-read process_flow.json now; an invalid file is reported and the current version keeps serving."""
+    return json.dumps(FLOWS.reload(force=force))
+
+@mcp.tool()
+def process_flow_status(ctx: Context) -> str:
+    """Active process-flow version, compile time, reload/failure counts."""
+    return json.dumps(FLOWS.status())
 
 if __name__ == "__main__":
-    mcp.run()
+    try:
+        mcp.run()
+    finally:
+        if WRITES is not None:
+            WRITES.close()   # commit writes still queued
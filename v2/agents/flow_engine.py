@@ -0,0 +1,195 @@
+# flow_engine.py
+# process_flow.json compiled once into per-action rule lists. Every condition
+# becomes a pre-resolved accessor plus a typed predicate, so evaluating a tool
+# call is a walk over only the scenarios that can apply to its action.
+# Response templates are parsed at the same time and checked against the
+# context each tool builds.
+from datetime import date, datetime
+from functools import lru_cache
+from string import Formatter
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def make_accessor(key: str):
+    """'customer.loyalty_tier' -> fn(ctx) returning the value or None."""
+    parts = tuple(key.split('.'))
+    if len(parts) == 2:
+        outer, inner = parts
+        def get(ctx):
+            sub = ctx.get(outer)
+            return sub.get(inner) if isinstance(sub, dict) else None
+        return get
+
+    def get(ctx):
+        val = ctx
+        for p in parts:
+            val = val.get(p) if isinstance(val, dict) else None
+            if val is None:
+                return None
+        return val
+    return get
+
+
+def make_predicate(exp):
+    """Turn one expected value from process_flow.json into fn(value, today) -> bool."""
+    if isinstance(exp, list):
+        try:
+            allowed = frozenset(exp)
+        except TypeError:
+            allowed = tuple(exp)
+        return lambda val, today: val in allowed
+
+    if isinstance(exp, dict):
+        checks = []
+        if 'gte' in exp:
+            bound = exp['gte']
+            checks.append(lambda val, today: val >= bound)
+        if 'gt' in exp:
+            bound = exp['gt']
+            checks.append(lambda val, today: val > bound)
+        if 'within_days' in exp:
+            days = exp['within_days']
+            checks.append(lambda val, today: 0 <= (parse_date(val) - today).days <= days)
+        if 'is_today' in exp:
+            checks.append(lambda val, today: parse_date(val) == today)
+        if len(checks) == 1:
+            return checks[0]
+        return lambda val, today: all(check(val, today) for check in checks)
+
+    return lambda val, today: val == exp
+
+
+_CONVERSIONS = {None: None, "s": str, "r": repr, "a": ascii}
+
+
+class CompiledTemplate:
+    """
+    A str.format template parsed once. Supports the dotted-field syntax used in
+    process_flow.json ({customer.loyalty_tier}, {order.total_amount:.2f}) and
+    reads values straight from the nested context dicts.
+    """
+    __slots__ = ("source", "fields", "_parts")
+
+    def __init__(self, source: str):
+        self.source = source
+        parts = []
+        fields = []
+        for literal, field, spec, conv in Formatter().parse(source):
+            if field is None:
+                parts.append((literal, None, "", None))
+                continue
+            if not field or "[" in field or "{" in (spec or ""):
+                raise ValueError(f"Unsupported template field {{{field}}} in {source!r}")
+            if conv not in _CONVERSIONS:
+                raise ValueError(f"Unknown conversion !{conv} in {source!r}")
+            path = tuple(field.split("."))
+            fields.append(field)
+            parts.append((literal, path, spec or "", _CONVERSIONS[conv]))
+        self.fields = tuple(fields)
+        self._parts = tuple(parts)
+
+    def render(self, ctx: dict) -> str:
+        out = []
+        for literal, path, spec, conv in self._parts:
+            out.append(literal)
+            if path is None:
+                continue
+            val = ctx
+            for p in path:
+                val = val[p]
+            if conv is not None:
+                val = conv(val)
+            out.append(format(val, spec))
+        return "".join(out)
+
+
+def has_field(schema: dict, field: str) -> bool:
+    node = schema
+    for p in field.split("."):
+        if not isinstance(node, dict) or p not in node:
+            return False
+        node = node[p]
+    return True
+
+
+class CompiledScenario:
+    __slots__ = ("id", "action", "conditions", "template")
+
+    def __init__(self, scen: dict):
+        self.id = scen.get("id")
+        conds = scen["conditions"]
+        self.action = conds.get("action")
+        self.conditions = tuple(
+            (make_accessor(key), make_predicate(exp))
+            for key, exp in conds.items() if key != "action"
+        )
+        self.template = CompiledTemplate(scen["response_template"])
+
+    @property
+    def response_template(self) -> str:
+        return self.template.source
+
+    def render(self, ctx: dict) -> str:
+        return self.template.render(ctx)
+
+    def matches(self, ctx: dict, today: date) -> bool:
+        for get, check in self.conditions:
+            val = get(ctx)
+            if val is None or not check(val, today):
+                return False
+        return True
+
+
+class FlowEngine:
+    """
+    Scenarios indexed by action. "any" scenarios are merged into every
+    action's list at their original position, so priority order (first
+    match in the file wins) is unchanged.
+    """
+    def __init__(self, scenarios: list[dict], schema: dict | None = None):
+        """
+        schema maps each action to the shape of the context its tool builds,
+        e.g. {"support_request": {"customer": {"id": ..., "name": ...}}}. When
+        given, every template field must exist in the context of every action
+        the scenario applies to, so a bad template fails at load time.
+        """
+        self.scenarios = [CompiledScenario(s) for s in scenarios]
+        if schema is not None:
+            self.validate(schema)
+        actions = {s.action for s in self.scenarios if s.action != "any"}
+        self.by_action = {
+            action: tuple(s for s in self.scenarios if s.action in (action, "any"))
+            for action in actions
+        }
+        self.any_only = tuple(s for s in self.scenarios if s.action == "any")
+
+    def validate(self, schema: dict) -> None:
+        for scen in self.scenarios:
+            actions = list(schema) if scen.action == "any" else [scen.action]
+            for action in actions:
+                if action not in schema:
+                    raise ValueError(f"Scenario {scen.id!r}: no context schema for action {action!r}")
+                for field in scen.template.fields:
+                    if not has_field(schema[action], field):
+                        raise ValueError(
+                            f"Scenario {scen.id!r}: template field {{{field}}} "
+                            f"is not in the {action} context"
+                        )
+
+    def match(self, action: str, ctx: dict, today: date | None = None) -> CompiledScenario | None:
+        """First scenario matching ctx; date rules use one clock read per evaluation."""
+        if today is None:
+            today = date.today()
+        for scen in self.by_action.get(action, self.any_only):
+            if scen.matches(ctx, today):
+                return scen
+        return None
+
+    def apply(self, action: str, ctx: dict, today: date | None = None) -> str | None:
+        """Rendered response of the first matching scenario, if any."""
+        scen = self.match(action, ctx, today)
+        return scen.render(ctx) if scen is not None else None
@@ -0,0 +1,102 @@
+# flow_registry.py
+# The process flow currently in force. A new process_flow.json is read,
+# validated and compiled off the request path (by the mtime watcher thread
+# or an explicit reload) and published with a single reference swap, so
+# requests only ever see a complete engine and never touch the file. A
+# version that fails to load is reported and the previous one keeps serving.
+import hashlib
+import json
+import os
+import threading
+import time
+
+from agents.flow_engine import FlowEngine
+
+
+class FlowRegistry:
+    def __init__(self, path: str, schema: dict | None = None, poll_interval: float = 0.0):
+        """
+        schema is passed to FlowEngine, so template errors reject the new
+        version. poll_interval > 0 starts a daemon thread that reloads when
+        the file's mtime or size changes; 0 leaves reloads to reload().
+        """
+        self.path = path
+        self.schema = schema
+        self.poll_interval = poll_interval
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: threading.Thread | None = None
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: str | None = None
+        self.last_error_at: float | None = None
+
+        # the first version must load: there is nothing to fall back to
+        self._signature = self._stat()
+        self.engine, self.version, self.compile_ms = self._compile()
+        self.loaded_at = time.time()
+        if poll_interval > 0:
+            self._watcher = threading.Thread(target=self._watch, name="flow-watcher", daemon=True)
+            self._watcher.start()
+
+    def _stat(self) -> tuple | None:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _compile(self) -> tuple[FlowEngine, str, float]:
+        t0 = time.perf_counter()
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        engine = FlowEngine(json.loads(raw)["scenarios"], schema=self.schema)
+        return engine, hashlib.sha256(raw).hexdigest()[:12], (time.perf_counter() - t0) * 1000
+
+    def reload(self, force: bool = False) -> dict:
+        """
+        Load the file again and swap it in if it compiles. Without force,
+        an unchanged version (same content hash) is not swapped. Returns
+        status() plus whether this call changed the active version.
+        """
+        with self._reload_lock:
+            self._signature = self._stat()
+            try:
+                engine, version, compile_ms = self._compile()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                self.last_error_at = time.time()
+                return {**self.status(), "reloaded": False}
+            if version == self.version and not force:
+                return {**self.status(), "reloaded": False}
+            self.engine, self.version, self.compile_ms = engine, version, compile_ms
+            self.loaded_at = time.time()
+            self.reloads += 1
+            self.last_error = self.last_error_at = None
+            return {**self.status(), "reloaded": True}
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            # editors write in several steps; a half-written file just fails and is retried
+            if self._stat() != self._signature:
+                self.reload()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.poll_interval + 1)
+
+    def status(self) -> dict:
+        return {
+            "path":          self.path,
+            "version":       self.version,
+            "scenarios":     len(self.engine.scenarios),
+            "compile_ms":    round(self.compile_ms, 3),
+            "loaded_at":     self.loaded_at,
+            "reloads":       self.reloads,
+            "failures":      self.failures,
+            "last_error":    self.last_error,
+            "last_error_at": self.last_error_at,
+            "watching":      self._watcher is not None and self._watcher.is_alive()
+        }
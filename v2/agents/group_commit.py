@@ -0,0 +1,173 @@
+# group_commit.py
+# Group commit for the tool server's writes. Tools hand a write (a function
+# of the write connection) to one writer thread, which runs every write
+# that queued up within a short window (max_delay after the first one, at
+# most max_batch) in a single transaction, each under its own savepoint,
+# and commits once. The window only applies while writes arrive together
+# (the previous batch had more than one); a lone write commits at once.
+# Callers are released only after the commit, so an acknowledged write is
+# durable, while a burst of writes pays for one commit (and one fsync)
+# instead of one per call.
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from agents.sqlite_pool import SQLitePool
+
+_STOP = object()
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    return samples[int(q * (len(samples) - 1))] if samples else 0.0
+
+
+class GroupCommitWriter:
+    def __init__(
+        self,
+        pool: Callable[[], SQLitePool],
+        max_batch: int = 64,
+        max_delay: float = 0.002,
+        samples: int = 1024
+    ):
+        """
+        pool returns the SQLitePool whose writer connection commits the
+        batches (late-bound, so benches can swap the pool). max_delay is
+        how long, in seconds, a batch waits for more writes after its first.
+        """
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self._last_batch = 0
+
+        # metrics; written by the writer thread, read by stats()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.writes = 0
+        self.failed_writes = 0
+        self.failed_batches = 0
+        self.max_batch_seen = 0
+        self._batch_sizes: deque[int] = deque(maxlen=samples)
+        self._commit_seconds: deque[float] = deque(maxlen=samples)
+        self._ack_seconds: deque[float] = deque(maxlen=samples)
+
+    def submit(self, write: Callable[[sqlite3.Connection], Any]) -> Any:
+        """
+        Run write(conn) in the next group commit and return its result once
+        the batch has committed. An exception raised by write rolls back
+        only that write and is re-raised here; if the commit itself fails,
+        every write in the batch gets the error.
+        """
+        if self._closed:
+            raise RuntimeError("group commit writer is closed")
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((write, future, time.perf_counter()))
+        return future.result()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stop = False
+            deadline = time.perf_counter() + (self.max_delay if self._last_batch > 1 else 0)
+            while len(batch) < self.max_batch:
+                left = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=left) if left > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._last_batch = len(batch)
+            self._commit(batch)
+            if stop:
+                return
+
+    def _commit(self, batch: list[tuple]) -> None:
+        outcomes = []
+        t0 = time.perf_counter()
+        try:
+            with self.pool().writer() as db:
+                for write, future, _ in batch:
+                    db.execute("SAVEPOINT group_write")
+                    try:
+                        outcomes.append((future, write(db), None))
+                    except Exception as e:
+                        db.execute("ROLLBACK TO group_write")
+                        outcomes.append((future, None, e))
+                    db.execute("RELEASE group_write")
+        except Exception as e:
+            # BEGIN or COMMIT failed: nothing in this batch was written
+            with self._lock:
+                self.failed_batches += 1
+                self.failed_writes += len(batch)
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        done = time.perf_counter()
+
+        with self._lock:
+            self.batches += 1
+            self.writes += len(batch)
+            self.failed_writes += sum(1 for *_, error in outcomes if error is not None)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            self._batch_sizes.append(len(batch))
+            self._commit_seconds.append(done - t0)
+            self._ack_seconds.extend(done - queued for *_, queued in batch)
+        # acknowledged only now, after the commit
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def stats(self) -> dict:
+        with self._lock:
+            sizes = sorted(self._batch_sizes)
+            commits = sorted(self._commit_seconds)
+            acks = sorted(self._ack_seconds)
+            return {
+                "max_batch":      self.max_batch,
+                "max_delay_ms":   self.max_delay * 1000,
+                "queued":         self._queue.qsize(),
+                "batches":        self.batches,
+                "writes":         self.writes,
+                "failed_writes":  self.failed_writes,
+                "failed_batches": self.failed_batches,
+                "avg_batch":      self.writes / self.batches if self.batches else 0.0,
+                "p50_batch":      _percentile(sizes, 0.5),
+                "largest_batch":  self.max_batch_seen,
+                # over the last `samples` batches / writes
+                "commit_ms_p50":  _percentile(commits, 0.5) * 1000,
+                "commit_ms_p95":  _percentile(commits, 0.95) * 1000,
+                "ack_ms_p50":     _percentile(acks, 0.5) * 1000,
+                "ack_ms_p95":     _percentile(acks, 0.95) * 1000
+            }
+
+    def close(self) -> None:
+        """Commit whatever is queued, then stop the writer thread."""
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,140 @@
+# intent_cache.py
+# Cache of LLM intent parses keyed by normalized message text. IDs are
+# templated out of the key ("where is ORD002" -> "where is <order_id:0>"),
+# so a single entry answers the same question about every order.
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_PUNCT = re.compile(r"[^\w<>:\s]")
+_SPACE = re.compile(r"\s+")
+
+
+class IntentCache:
+    def __init__(
+        self,
+        id_patterns: dict[str, re.Pattern],
+        max_entries: int = 10000,
+        ttl: float = 3600.0,
+        path: str | None = None
+    ):
+        """
+        id_patterns maps a parameter name to the regex finding its IDs in
+        upper-cased text (IntentClassifier.id_patterns). path, when given,
+        is a SQLite file that keeps the cache warm across restarts.
+        """
+        self.id_patterns = id_patterns
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS intent_cache ("
+                " key TEXT PRIMARY KEY, parsed TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._puts = 0
+
+    def normalize(self, text: str) -> tuple[str, dict[str, str]]:
+        """Cache key for text plus the placeholder -> ID mapping used to build it."""
+        key = text.upper()
+        ids = {}
+        for param, pattern in self.id_patterns.items():
+            for i, found in enumerate(dict.fromkeys(pattern.findall(key))):
+                slot = f"<{param}:{i}>"
+                ids[slot] = found
+                key = re.sub(rf"\b{re.escape(found)}\b", slot, key)
+        key = key.lower()
+        key = _PUNCT.sub(" ", key.replace("'", ""))
+        return _SPACE.sub(" ", key).strip(), ids
+
+    def get(self, text: str) -> dict | None:
+        key, ids = self.normalize(text)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None and self._db is not None:
+            row = self._db.execute(
+                "SELECT stored_at, parsed FROM intent_cache WHERE key = ? AND stored_at >= ?",
+                (key, now - self.ttl)
+            ).fetchone()
+            if row:
+                entry = (row[0], row[1])
+                self._remember(key, entry)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._fill(json.loads(entry[1]), ids)
+
+    def put(self, text: str, parsed: dict) -> None:
+        """
+        Store an LLM parse. Parses that mention an ID missing from the
+        message are not cached: they cannot be re-targeted at other IDs.
+        """
+        key, ids = self.normalize(text)
+        slots = {v: k for k, v in ids.items()}
+        params = {}
+        for name, value in (parsed.get("parameters") or {}).items():
+            if isinstance(value, str) and value.upper() in slots:
+                params[name] = slots[value.upper()]
+            elif isinstance(value, str) and any(p.fullmatch(value.upper()) for p in self.id_patterns.values()):
+                return
+            else:
+                params[name] = value
+        entry = (time.time(), json.dumps({"action": parsed.get("action"), "parameters": params}))
+        self._remember(key, entry)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO intent_cache(key, parsed, stored_at) VALUES(?,?,?)",
+                (key, entry[1], entry[0])
+            )
+            self._puts += 1
+            if self._puts % 1000 == 0:
+                self._db.execute(
+                    "DELETE FROM intent_cache WHERE stored_at < ?", (entry[0] - self.ttl,)
+                )
+
+    def _remember(self, key: str, entry: tuple[float, str]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    @staticmethod
+    def _fill(parsed: dict, ids: dict[str, str]) -> dict:
+        params = {
+            name: ids.get(value, value) if isinstance(value, str) else value
+            for name, value in parsed["parameters"].items()
+        }
+        return {"action": parsed["action"], "parameters": params}
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries":   len(self._entries),
+            "hits":      self.hits,
+            "misses":    self.misses,
+            "evictions": self.evictions,
+            "hit_rate":  self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,85 @@
+# intent_rules.py
+# First-stage, rule-based intent classifier. Messages that name exactly one
+# ID and match a rule's keywords are resolved without calling the LLM;
+# anything ambiguous returns None and falls through to LLaMA-3.
+import json
+import os
+import re
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "intent_rules.json")
+
+
+class IntentClassifier:
+    def __init__(self, path: str = DEFAULT_RULES_PATH):
+        with open(path) as f:
+            config = json.load(f)
+        self.id_patterns = {
+            param: re.compile(pattern)
+            for param, pattern in config["id_patterns"].items()
+        }
+        words = config.get("abstain_on", [])
+        self.abstain = (
+            re.compile(r"\b(?:" + "|".join(re.escape(w) for w in words) + r")\b")
+            if words else None
+        )
+        # whole words only ("eta" must not match "beta"), plus plain inflections
+        # ("delivered", "renews"); irregular forms are listed as keywords
+        self.rules = [
+            (rule["action"], self._keywords(rule["keywords"]), rule.get("requires"),
+             rule.get("parameters", {}))
+            for rule in config["rules"]
+        ]
+        self.seen = 0
+        self.hits = 0
+
+    @staticmethod
+    def _keywords(keywords: list[str]) -> re.Pattern:
+        alternatives = "|".join(re.escape(k.lower()) for k in keywords)
+        return re.compile(r"\b(?:" + alternatives + r")(?:e?s|e?d|ing)?\b")
+
+    def extract_ids(self, text: str) -> dict[str, list[str]]:
+        """Distinct IDs per parameter name, in order of appearance."""
+        upper = text.upper()
+        found = {}
+        for param, pattern in self.id_patterns.items():
+            ids = list(dict.fromkeys(pattern.findall(upper)))
+            if ids:
+                found[param] = ids
+        return found
+
+    def classify(self, text: str) -> dict | None:
+        """{"action", "parameters"} when the message is unambiguous, else None."""
+        self.seen += 1
+        lowered = text.lower()
+        if self.abstain is not None and self.abstain.search(lowered):
+            return None
+
+        ids = self.extract_ids(text)
+        # several IDs, or IDs of different kinds: leave it to the LLM
+        if len(ids) > 1 or any(len(v) > 1 for v in ids.values()):
+            return None
+
+        for action, keywords, requires, fixed in self.rules:
+            if not keywords.search(lowered):
+                continue
+            if requires is None:
+                if ids:
+                    # an unused ID means we may be misreading the message
+                    return None
+                params = {}
+            elif requires in ids:
+                params = {requires: ids[requires][0]}
+            else:
+                # the message asks for something that needs an ID it doesn't
+                # name ("cancel my order ORD001"): a lower rule would guess
+                return None
+            self.hits += 1
+            return {"action": action, "parameters": {**fixed, **params}}
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "seen":     self.seen,
+            "hits":     self.hits,
+            "hit_rate": self.hits / self.seen if self.seen else 0.0
+        }
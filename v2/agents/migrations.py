@@ -0,0 +1,88 @@
+# migrations.py
+# Versioned schema migrations for the support database. db/migrations holds
+# NNNN_name.sql files; PRAGMA user_version records the last one applied.
+# Each migration runs in its own BEGIN IMMEDIATE transaction and re-checks
+# the version inside it, so several tool servers starting at once apply
+# every migration exactly once.
+#
+#   cd v2 && python -m agents.migrations [db_path]
+import os
+import re
+import sqlite3
+import sys
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "db", "migrations")
+_NAME = re.compile(r"^(\d+)_\w+\.sql$")
+
+
+def available(directory: str = MIGRATIONS_DIR) -> list[tuple[int, str]]:
+    """(version, path) of every migration file, in version order."""
+    found = []
+    for name in os.listdir(directory):
+        m = _NAME.match(name)
+        if m:
+            found.append((int(m.group(1)), os.path.join(directory, name)))
+    found.sort()
+    versions = [v for v, _ in found]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"Duplicate migration versions in {directory}: {versions}")
+    return found
+
+
+def statements(script: str):
+    """Split a SQL script into complete statements (trigger bodies stay whole)."""
+    buf = ""
+    for line in script.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            if buf.strip():
+                yield buf.strip()
+            buf = ""
+    rest = [l for l in buf.splitlines() if l.strip() and not l.strip().startswith("--")]
+    if rest:
+        raise ValueError(f"Incomplete SQL statement: {' '.join(rest)[:80]!r}")
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(path: str, directory: str = MIGRATIONS_DIR, target: int | None = None) -> list[int]:
+    """Apply pending migrations (up to target, if given); returns the versions applied."""
+    applied = []
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA busy_timeout = 30000")
+        for version, file in available(directory):
+            if target is not None and version > target:
+                break
+            if version <= current_version(conn):
+                continue
+            with open(file) as f:
+                script = f.read()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # another process may have applied it while we waited for the lock
+                if version <= current_version(conn):
+                    conn.rollback()
+                    continue
+                for stmt in statements(script):
+                    conn.execute(stmt)
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+            applied.append(version)
+    finally:
+        conn.close()
+    return applied
+
+
+if __name__ == "__main__":
+    from agents import settings
+    db_path = sys.argv[1] if len(sys.argv) > 1 else settings.SUPPORT_DB_PATH
+    done = migrate(db_path)
+    conn = sqlite3.connect(db_path)
+    print(f"{db_path}: applied {done or 'nothing'}, now at version {current_version(conn)}")
+    conn.close()
@@ -0,0 +1,193 @@
+# session_store.py
+# Per-conversation state for SupportAgent (e.g. the customer_id learned from
+# an order lookup). In-memory by default; SQLite when several worker
+# processes must share sessions. Both backends take and return the same
+# JSON-compatible values, and get/set/drop are coroutines so the SQLite one
+# can keep its queries off the event loop.
+import asyncio
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _Session:
+    __slots__ = ("values", "touched")
+
+    def __init__(self, now: float):
+        self.values: dict = {}
+        self.touched = now
+
+
+class MemorySessionStore:
+    """LRU-ordered sessions with idle TTL and a hard cap on live sessions."""
+    def __init__(self, ttl: float = 1800.0, max_sessions: int = 100_000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        self.expired = 0
+        self.evicted = 0
+
+    def _live(self, session_id: str, now: float) -> _Session | None:
+        sess = self._sessions.get(session_id)
+        if sess is None:
+            return None
+        if now - sess.touched > self.ttl:
+            del self._sessions[session_id]
+            self.expired += 1
+            return None
+        sess.touched = now
+        self._sessions.move_to_end(session_id)
+        return sess
+
+    async def get(self, session_id: str, key: str, default=None):
+        sess = self._live(session_id, time.monotonic())
+        return sess.values.get(key, default) if sess else default
+
+    async def set(self, session_id: str, key: str, value) -> None:
+        now = time.monotonic()
+        sess = self._live(session_id, now)
+        if sess is None:
+            sess = self._sessions[session_id] = _Session(now)
+            self._sweep(now)
+        sess.values[key] = value
+
+    async def drop(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+    def _sweep(self, now: float) -> None:
+        # oldest sessions sit at the front, so expiry stops at the first live one
+        while self._sessions:
+            sid, sess = next(iter(self._sessions.items()))
+            if now - sess.touched > self.ttl:
+                self.expired += 1
+            elif len(self._sessions) > self.max_sessions:
+                self.evicted += 1
+            else:
+                break
+            del self._sessions[sid]
+
+    def stats(self) -> dict:
+        return {
+            "backend":  "memory",
+            "sessions": len(self._sessions),
+            "expired":  self.expired,
+            "evicted":  self.evicted
+        }
+
+    def close(self) -> None:
+        self._sessions.clear()
+
+
+class SQLiteSessionStore:
+    """
+    Sessions in a local SQLite file, shared by every worker on the host.
+    Queries run on one dedicated thread, which also owns the connection.
+    """
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 1800.0,
+        max_sessions: int = 1_000_000,
+        prune_every: int = 1000
+    ):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.prune_every = prune_every
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.execute("PRAGMA busy_timeout = 5000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY, data TEXT NOT NULL, touched REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_touched ON sessions(touched)")
+        self._writes = 0
+        self.expired = 0
+        self.evicted = 0
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-store")
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._thread, fn, *args)
+
+    async def get(self, session_id: str, key: str, default=None):
+        return await self._run(self._get, session_id, key, default)
+
+    async def set(self, session_id: str, key: str, value) -> None:
+        await self._run(self._set, session_id, key, value)
+
+    async def drop(self, session_id: str) -> None:
+        await self._run(self._drop, session_id)
+
+    def _get(self, session_id: str, key: str, default=None):
+        now = time.time()
+        # the whole document, decoded here: json_extract would hand back
+        # objects and lists as JSON text and true/false as 1/0
+        row = self._db.execute(
+            "SELECT data, touched FROM sessions WHERE session_id = ? AND touched >= ?",
+            (session_id, now - self.ttl)
+        ).fetchone()
+        if row is None:
+            return default
+        if now - row[1] > self.ttl / 10:
+            self._db.execute(
+                "UPDATE sessions SET touched = ? WHERE session_id = ?", (now, session_id)
+            )
+        return json.loads(row[0]).get(key, default)
+
+    def _set(self, session_id: str, key: str, value) -> None:
+        now = time.time()
+        # one statement, so concurrent workers never lose each other's keys
+        self._db.execute(
+            "INSERT INTO sessions(session_id, data, touched)"
+            " VALUES(?, json_object(?, json(?)), ?)"
+            " ON CONFLICT(session_id) DO UPDATE SET"
+            "   data = CASE WHEN touched < ? THEN json_object(?, json(?))"
+            "               ELSE json_set(data, '$.' || ?, json(?)) END,"
+            "   touched = excluded.touched",
+            (session_id, key, json.dumps(value), now,
+             now - self.ttl, key, json.dumps(value), key, json.dumps(value))
+        )
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self._prune(now)
+
+    def _drop(self, session_id: str) -> None:
+        self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def _prune(self, now: float) -> None:
+        self.expired += self._db.execute(
+            "DELETE FROM sessions WHERE touched < ?", (now - self.ttl,)
+        ).rowcount
+        excess = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] - self.max_sessions
+        if excess > 0:
+            self.evicted += self._db.execute(
+                "DELETE FROM sessions WHERE session_id IN"
+                " (SELECT session_id FROM sessions ORDER BY touched LIMIT ?)",
+                (excess,)
+            ).rowcount
+
+    def stats(self) -> dict:
+        sessions = self._thread.submit(
+            lambda: self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        ).result()
+        return {
+            "backend":  "sqlite",
+            "sessions": sessions,
+            "expired":  self.expired,
+            "evicted":  self.evicted
+        }
+
+    def close(self) -> None:
+        self._thread.submit(self._db.close).result()
+        self._thread.shutdown()
+
+
+def make_session_store(backend: str, path: str, ttl: float, max_sessions: int):
+    if backend == "memory":
+        return MemorySessionStore(ttl=ttl, max_sessions=max_sessions)
+    if backend == "sqlite":
+        return SQLiteSessionStore(path, ttl=ttl, max_sessions=max_sessions)
+    raise ValueError(f"Unknown session backend: {backend!r} (expected 'memory' or 'sqlite')")
@@ -0,0 +1,88 @@
+# settings.py
+# Runtime configuration, overridable through environment variables.
+import os
+
+# --- DatabaseAgent → MCP tool server
+# "stdio" talks to `python -m agents.db_tools_server` children,
+# "embedded" calls the tool functions in-process (single-host deployments)
+TOOL_TRANSPORT      = os.getenv("TOOL_TRANSPORT", "stdio")
+MCP_POOL_SIZE       = int(os.getenv("MCP_POOL_SIZE", "4"))
+MCP_CALL_TIMEOUT    = float(os.getenv("MCP_CALL_TIMEOUT", "30"))
+SINGLE_FLIGHT       = os.getenv("SINGLE_FLIGHT", "1") == "1"   # share identical concurrent reads
+STREAM_CHUNK_ITEMS  = int(os.getenv("STREAM_CHUNK_ITEMS", "100"))   # list items per streamed A2A chunk
+# A2A tasks kept by the DatabaseAgent server (agents/task_store.py)
+TASK_STORE_BACKEND  = os.getenv("TASK_STORE_BACKEND", "memory")   # "memory" or "sqlite"
+TASK_STORE_PATH     = os.getenv("TASK_STORE_PATH", os.path.join("db", "tasks.db"))
+TASK_STORE_MAX      = int(os.getenv("TASK_STORE_MAX", "10000"))
+TASK_STORE_TTL      = float(os.getenv("TASK_STORE_TTL", "300"))       # finished tasks
+TASK_STORE_MAX_AGE  = float(os.getenv("TASK_STORE_MAX_AGE", "3600"))  # unfinished tasks
+
+# --- Tool server SQLite access
+SUPPORT_DB_PATH     = os.getenv("SUPPORT_DB_PATH", os.path.join("db", "real_agent_demo.db"))
+DB_POOL_SIZE        = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_MMAP_SIZE        = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+DB_CACHE_SIZE       = int(os.getenv("DB_CACHE_SIZE", str(-64 * 1024)))   # negative = KiB
+DB_AUTO_MIGRATE     = os.getenv("DB_AUTO_MIGRATE", "1") == "1"   # apply db/migrations on startup
+BATCH_MAX_IDS       = int(os.getenv("BATCH_MAX_IDS", "1000"))   # per *_batch tool call
+ORDERS_PAGE_MAX     = int(os.getenv("ORDERS_PAGE_MAX", "1000"))  # limit cap for get_customer_orders_page
+# tool writes: one writer thread group-commits concurrent writes (agents/group_commit.py)
+GROUP_COMMIT        = os.getenv("GROUP_COMMIT", "1") == "1"
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "64"))
+GROUP_COMMIT_MAX_DELAY = float(os.getenv("GROUP_COMMIT_MAX_DELAY", "0.002"))   # seconds after a batch's first write
+DB_WRITE_SYNC       = os.getenv("DB_WRITE_SYNC", "FULL")   # PRAGMA synchronous of the write connection
+# read-through cache of assembled order/subscription contexts
+CONTEXT_CACHE       = os.getenv("CONTEXT_CACHE", "1") == "1"
+CONTEXT_CACHE_SIZE  = int(os.getenv("CONTEXT_CACHE_SIZE", "10000"))
+CONTEXT_CACHE_TTL   = float(os.getenv("CONTEXT_CACHE_TTL", "30"))
+# seconds between process_flow.json mtime checks; 0 = reload_process_flow tool only
+FLOW_RELOAD_INTERVAL = float(os.getenv("FLOW_RELOAD_INTERVAL", "2"))
+
+# --- SupportAgent → Ollama
+LLM_MODEL           = os.getenv("LLM_MODEL", "llama3")
+LLM_TIMEOUT         = float(os.getenv("LLM_TIMEOUT", "120"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_STREAM          = os.getenv("LLM_STREAM", "0") == "1"
+
+# --- SupportAgent intent parsing
+INTENT_FAST_PATH    = os.getenv("INTENT_FAST_PATH", "1") == "1"
+INTENT_RULES_PATH   = os.getenv(
+    "INTENT_RULES_PATH", os.path.join(os.path.dirname(__file__), "intent_rules.json")
+)
+INTENT_CACHE        = os.getenv("INTENT_CACHE", "1") == "1"
+INTENT_CACHE_SIZE   = int(os.getenv("INTENT_CACHE_SIZE", "10000"))
+INTENT_CACHE_TTL    = float(os.getenv("INTENT_CACHE_TTL", "3600"))
+INTENT_CACHE_PATH   = os.getenv("INTENT_CACHE_PATH", "")   # SQLite file; empty = memory only
+# start read-only lookups for IDs in the message while the LLM parses it
+SPECULATIVE_READS   = os.getenv("SPECULATIVE_READS", "1") == "1"
+SPECULATIVE_MAX     = int(os.getenv("SPECULATIVE_MAX", "2"))   # per message
+
+# --- SupportAgent conversation state
+SESSION_BACKEND     = os.getenv("SESSION_BACKEND", "memory")   # "memory" or "sqlite"
+SESSION_DB_PATH     = os.getenv("SESSION_DB_PATH", os.path.join("db", "sessions.db"))
+SESSION_TTL         = float(os.getenv("SESSION_TTL", "1800"))
+SESSION_MAX         = int(os.getenv("SESSION_MAX", "100000"))
+ORDERS_PAGE_SIZE    = int(os.getenv("ORDERS_PAGE_SIZE", "20"))   # orders per reply ("more orders" pages on); 0 = all
+
+# --- Tracing and metrics (agents/tracing.py); off unless TRACE_ENABLED=1
+TRACE_ENABLED       = os.getenv("TRACE_ENABLED", "0") == "1"
+TRACE_LOG_PATH      = os.getenv("TRACE_LOG_PATH", "")   # JSON span lines; "-" = stderr, empty = none
+
+# --- Admission control (agents/admission.py): per-stage concurrency limits,
+# bounded queues and a per-message deadline carried to the DatabaseAgent
+REQUEST_DEADLINE    = float(os.getenv("REQUEST_DEADLINE", "30"))   # seconds per message; 0 = none
+LLM_QUEUE_MAX       = int(os.getenv("LLM_QUEUE_MAX", "64"))   # waiting for one of LLM_MAX_CONCURRENCY
+DB_CALL_MAX_CONCURRENCY = int(os.getenv("DB_CALL_MAX_CONCURRENCY", "32"))   # SupportAgent → DatabaseAgent
+DB_CALL_QUEUE_MAX   = int(os.getenv("DB_CALL_QUEUE_MAX", "256"))
+A2A_TIMEOUT         = float(os.getenv("A2A_TIMEOUT", "60"))
+A2A_CONNECT_TIMEOUT = float(os.getenv("A2A_CONNECT_TIMEOUT", "10"))
+A2A_STREAM          = os.getenv("A2A_STREAM", "1") == "1"   # stream list replies (handle_query_stream)
+TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "32"))   # DatabaseAgent tool calls
+TOOL_QUEUE_MAX      = int(os.getenv("TOOL_QUEUE_MAX", "256"))
+
+# --- Customer-facing front end (agents/support_server.py)
+FRONTEND_HOST            = os.getenv("FRONTEND_HOST", "127.0.0.1")
+FRONTEND_PORT            = int(os.getenv("FRONTEND_PORT", "8100"))
+FRONTEND_MAX_CONCURRENCY = int(os.getenv("FRONTEND_MAX_CONCURRENCY", "64"))
+FRONTEND_DRAIN_TIMEOUT   = float(os.getenv("FRONTEND_DRAIN_TIMEOUT", "30"))
+SUPPORT_URL              = os.getenv("SUPPORT_URL", f"http://{FRONTEND_HOST}:{FRONTEND_PORT}")
@@ -0,0 +1,72 @@
+# single_flight.py
+# Coalesces identical concurrent calls: the first caller for a key runs the
+# call, everyone arriving while it is in flight awaits the same result (or
+# exception). Nothing is kept once the call finishes, so this never serves
+# stale data; it only collapses bursts. Only use it for read-only calls: the
+# shared call is cancelled once every caller has stopped waiting for it.
+import asyncio
+import json
+from typing import Awaitable, Callable
+
+
+def call_key(action: str, params: dict) -> tuple[str, str]:
+    """(action, canonical JSON of params); key order does not matter."""
+    return action, json.dumps(params, sort_keys=True, default=str)
+
+
+class SingleFlight:
+    def __init__(self):
+        self._in_flight: dict[tuple, asyncio.Task] = {}
+        self.calls = 0
+        self.leaders = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+        self.abandoned = 0
+        self._waiters: dict[tuple, int] = {}   # callers still waiting, per key
+
+    async def run(self, key: tuple, call: Callable[[], Awaitable[str]]) -> tuple[str, bool]:
+        """
+        Result of call(), shared with concurrent run()s of the same key, and
+        whether this caller joined an existing call. A caller that is
+        cancelled stops waiting; the shared call goes on while anyone else
+        still waits for it, and is cancelled when the last one leaves.
+        """
+        self.calls += 1
+        task = self._in_flight.get(key)
+        joined = task is not None
+        if joined:
+            self.coalesced += 1
+            self._waiters[key] += 1
+            self.max_waiters = max(self.max_waiters, self._waiters[key])
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            self._waiters[key] = 1
+            task.add_done_callback(lambda t, key=key: self._done(key, t))
+        try:
+            return await asyncio.shield(task), joined
+        except asyncio.CancelledError:
+            if not task.done() and self._in_flight.get(key) is task:
+                self._waiters[key] -= 1
+                if not self._waiters[key]:
+                    self.abandoned += 1
+                    task.cancel()
+            raise
+
+    def _done(self, key: tuple, task: asyncio.Task) -> None:
+        self._in_flight.pop(key, None)
+        self._waiters.pop(key, None)
+        if not task.cancelled():
+            task.exception()   # every waiter may have gone; don't log it as unretrieved
+
+    def stats(self) -> dict:
+        return {
+            "calls":          self.calls,
+            "leaders":        self.leaders,
+            "coalesced":      self.coalesced,
+            "coalesced_rate": self.coalesced / self.calls if self.calls else 0.0,
+            "in_flight":      len(self._in_flight),
+            "max_waiters":    self.max_waiters,
+            "abandoned":      self.abandoned
+        }
@@ -0,0 +1,99 @@
+# speculation.py
+# Speculative DB reads for messages that go to the LLM. IDs visible to the
+# intent regexes start their read-only lookups right away, so the DatabaseAgent
+# round trip overlaps the intent parse; a result is used only when the
+# parsed intent asks for exactly that lookup.
+import asyncio
+import weakref
+from typing import Awaitable, Callable
+
+# read-only actions, keyed by the ID parameter they take
+DEFAULT_READS = {
+    "order_id":        "get_order_status",
+    "subscription_id": "subscription_status"
+}
+
+
+class SpeculativeReads:
+    def __init__(
+        self,
+        extract_ids: Callable[[str], dict[str, list[str]]],
+        reads: dict[str, str] = DEFAULT_READS,
+        max_per_message: int = 2
+    ):
+        """
+        extract_ids is IntentClassifier.extract_ids. reads must only name
+        actions without side effects: unused results are thrown away.
+        """
+        self.extract_ids = extract_ids
+        self.reads = reads
+        self.max_per_message = max_per_message
+        self.launched = 0
+        self.hits = 0
+        self.cancelled = 0   # discarded before it was sent to the DatabaseAgent
+        self.wasted = 0      # discarded after it was sent: the query ran (or runs) for nothing
+        self._sent: weakref.WeakSet[asyncio.Task] = weakref.WeakSet()
+
+    def start(
+        self,
+        text: str,
+        call: Callable[..., Awaitable[str]]
+    ) -> dict[tuple[str, str, str], asyncio.Task]:
+        """
+        Launch call(action, params, dispatched=...) for each ID in text and
+        return the pending reads. call invokes dispatched() once the request
+        is on its way to the DatabaseAgent (past admission), which is what
+        tells a wasted read from one cancelled in time.
+        """
+        pending = {}
+        for param, ids in self.extract_ids(text).items():
+            action = self.reads.get(param)
+            if action is None:
+                continue
+            for value in ids:
+                if len(pending) >= self.max_per_message:
+                    return pending
+                pending[(action, param, value)] = asyncio.create_task(
+                    call(action, {param: value}, dispatched=self._dispatched)
+                )
+                self.launched += 1
+        return pending
+
+    def take(self, pending: dict, action: str, params: dict) -> asyncio.Task | None:
+        """The pending read matching the parsed intent, removed from pending."""
+        if len(params) != 1:
+            return None
+        (param, value), = params.items()
+        if not isinstance(value, str):
+            return None
+        task = pending.pop((action, param, value), None)
+        if task is not None:
+            self.hits += 1
+        return task
+
+    def _dispatched(self) -> None:
+        self._sent.add(asyncio.current_task())
+
+    def discard(self, pending: dict) -> None:
+        """Drop reads the parsed intent did not use."""
+        for task in pending.values():
+            # once sent, cancelling only stops the wait: the DatabaseAgent still runs the query
+            if task in self._sent:
+                self.wasted += 1
+            else:
+                self.cancelled += 1
+            if task.done():
+                if not task.cancelled():
+                    task.exception()   # mark retrieved; the error is irrelevant now
+            else:
+                task.cancel()
+        pending.clear()
+
+    def stats(self) -> dict:
+        return {
+            "launched":  self.launched,
+            "hits":      self.hits,
+            "cancelled": self.cancelled,
+            "wasted":    self.wasted,
+            "hit_rate":  self.hits / self.launched if self.launched else 0.0
+        }
@@ -0,0 +1,199 @@
+# sqlite_pool.py
+# Shared SQLite access layer for the tool server: a bounded pool of reader
+# connections (one per thread at a time) plus a single serialized writer.
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+class SQLitePool:
+    def __init__(
+        self,
+        path: str,
+        max_readers: int = 8,
+        mmap_size: int = 256 * 1024 * 1024,
+        cache_size: int = -64 * 1024,
+        statement_cache: int = 256,
+        busy_timeout_ms: int = 5000,
+        writer_synchronous: str = "NORMAL"
+    ):
+        """
+        cache_size follows PRAGMA cache_size: negative values are KiB,
+        positive values are pages. statement_cache is the number of
+        prepared statements each connection keeps compiled.
+        writer_synchronous is PRAGMA synchronous for the write connection;
+        "FULL" makes every commit durable across power loss, not just
+        application crashes.
+        """
+        self.path = path
+        self.max_readers = max_readers
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size
+        self.statement_cache = statement_cache
+        self.busy_timeout_ms = busy_timeout_ms
+        if writer_synchronous.upper() not in {"OFF", "NORMAL", "FULL", "EXTRA"}:
+            raise ValueError(f"Unknown synchronous mode: {writer_synchronous!r}")
+        self.writer_synchronous = writer_synchronous.upper()
+
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._writer: sqlite3.Connection | None = None
+        self._write_lock = threading.Lock()
+        self._version_lock = threading.Lock()
+
+        # metrics
+        self._readers_in_use = 0
+        self._writer_in_use = 0
+        self._wait_seconds = 0.0
+        self._waits = 0
+        self._statements = 0
+
+    def _count_statement(self, _sql: str) -> None:
+        # trace callback: runs once per executed statement
+        with self._lock:
+            self._statements += 1
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            cached_statements=self.statement_cache,
+            isolation_level=None
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = {int(self.cache_size)}")
+        conn.set_trace_callback(self._count_statement)
+        return conn
+
+    def _connect_writer(self) -> sqlite3.Connection:
+        conn = self._connect()
+        conn.execute(f"PRAGMA synchronous = {self.writer_synchronous}")
+        return conn
+
+    @contextmanager
+    def reader(self):
+        """Borrow this thread's read connection; nested use reuses it."""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._checkout()
+        self._local.conn, self._local.depth = conn, 1
+        with self._lock:
+            self._readers_in_use += 1
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._local.conn = None
+            with self._lock:
+                self._readers_in_use -= 1
+            self._idle.put(conn)
+
+    def _checkout(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.max_readers:
+                self._opened += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        t0 = time.perf_counter()
+        conn = self._idle.get()
+        waited = time.perf_counter() - t0
+        with self._lock:
+            self._wait_seconds += waited
+            self._waits += 1
+        return conn
+
+    @contextmanager
+    def writer(self):
+        """
+        Exclusive write connection inside a transaction: commits on success,
+        rolls back on error. Writers are serialized in-process.
+        """
+        t0 = time.perf_counter()
+        with self._write_lock:
+            waited = time.perf_counter() - t0
+            if self._writer is None:
+                self._writer = self._connect_writer()
+            with self._lock:
+                self._wait_seconds += waited
+                self._writer_in_use = 1
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+            finally:
+                with self._lock:
+                    self._writer_in_use = 0
+
+    def data_version(self) -> int | None:
+        """
+        PRAGMA data_version of the writer connection. It only moves when some
+        other connection commits, i.e. another process wrote to the file.
+        None while this process is writing (the connection is busy).
+        """
+        with self._version_lock:
+            if not self._write_lock.acquire(blocking=False):
+                return None
+            try:
+                if self._writer is None:
+                    self._writer = self._connect_writer()
+                return self._writer.execute("PRAGMA data_version").fetchone()[0]
+            finally:
+                self._write_lock.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "readers_open":       self._opened,
+                "readers_in_use":     self._readers_in_use,
+                "readers_max":        self.max_readers,
+                "writer_in_use":      self._writer_in_use,
+                "waits":              self._waits,
+                "wait_seconds_total": round(self._wait_seconds, 6),
+                "statements":         self._statements
+            }
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._opened = 0
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
@@ -1,24 +1,83 @@
 # support_agent.py
 
 import json
-import requests
+import time
 import asyncio
 import httpx
-import re
+from contextlib import contextmanager
+from typing import Callable
 from uuid import uuid4
 
 from a2a.client import A2AClient
 from a2a.client.errors import A2AClientHTTPError
-from a2a.types import SendMessageRequest, MessageSendParams
+from a2a.types import (
+    JSONRPCErrorResponse, Message, MessageSendParams, SendMessageRequest,
+    SendStreamingMessageRequest, TaskArtifactUpdateEvent
+)
 
-class helper:
-    """Simple in-process key/value store."""
-    def __init__(self):
-        self._store = {}
-    def get(self, key, default=None):
-        return self._store.get(key, default)
-    def set(self, key, value):
-        self._store[key] = value
+from agents import admission, settings, tracing
+from agents.admission import Overloaded, Stage
+from agents.intent_cache import IntentCache
+from agents.intent_rules import IntentClassifier
+from agents.llm_client import OllamaClient
+from agents.session_store import make_session_store
+from agents.speculation import SpeculativeReads
+
+TRACER = tracing.make_tracer("support_agent")
+
+ALLOWED_ACTIONS = {
+    "get_order_status",
+    "get_customer_orders",
+    "cancel_service",
+    "subscription_status",
+    "support_request"
+}
+
+# single-ID action -> (its ID parameter, batch action, batch parameter)
+BATCH_ACTIONS = {
+    "get_order_status":    ("order_id", "get_order_status_batch", "order_ids"),
+    "subscription_status": ("subscription_id", "subscription_status_batch", "subscription_ids")
+}
+
+# fast fallback when a stage sheds the message instead of queueing it
+OVERLOADED_REPLY = (
+    "We are receiving more requests than usual right now. "
+    "Please try again in a moment."
+)
+
+# optional get_customer_orders filters passed through to get_customer_orders_page
+ORDER_FILTERS = ("status", "eta_from", "eta_to")
+
+# list replies handle_query_stream formats chunk by chunk: action -> list key
+STREAMED_REPLIES = {
+    "get_customer_orders":       "orders",
+    "get_customer_orders_page":  "orders",
+    "get_order_status_batch":    "results",
+    "subscription_status_batch": "results"
+}
+
+def build_parse_prompt(user_text: str) -> str:
+    return (
+        "You are an intent parser for a customer support system. "
+        "Given a customer message, extract the intent and any relevant IDs. "
+        "Available intents: get_order_status, get_customer_orders, cancel_service, subscription_status, support_request. "
+        "Parameters should be `order_id`, `customer_id`, or `subscription_id`. "
+        "For get_customer_orders, add `\"page\": \"next\"` when the customer asks for more of their orders, "
+        "and `status`, `eta_from` or `eta_to` (YYYY-MM-DD) when they only want some of them. "
+        "Reply ONLY with a JSON object with keys 'action' and 'parameters'. Do NOT add anything else, just reply with the JSON."
+        f"Message: \"{user_text}\""
+    )
+
+def parse_intent_reply(text: str) -> dict | None:
+    """LLM reply -> {"action", "parameters"}, or None if it is not usable JSON."""
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(parsed, dict):
+        return None
+    params = parsed.get("parameters", {}) or {}
+    return {"action": parsed.get("action"), "parameters": params}
 
 class SupportAgent:
     def __init__(
@@ -30,155 +89,319 @@ class SupportAgent:
         self.a2a_url = a2a_url
         self.a2a_client: A2AClient | None = None
 
-        # LLaMA-3 HTTP endpoint
+        # LLaMA-3 HTTP endpoint, reached through a pooled async client
         self.llm_url = llm_url
+        self.llm = OllamaClient(
+            llm_url,
+            model=settings.LLM_MODEL,
+            timeout=settings.LLM_TIMEOUT,
+            connect_timeout=settings.LLM_CONNECT_TIMEOUT,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            stream=settings.LLM_STREAM
+        )
 
         # HTTP client for A2A with extended timeouts
-        # timeout = httpx.Timeout(60.0, connect=10.0, read=60.0)
-        self.httpx = httpx.AsyncClient()
+        self.httpx = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.A2A_TIMEOUT, connect=settings.A2A_CONNECT_TIMEOUT)
+        )
+
+        # admission: bounded concurrency and queues per stage, one deadline per message
+        self.deadline = settings.REQUEST_DEADLINE
+        self.llm_stage = Stage("llm", settings.LLM_MAX_CONCURRENCY, settings.LLM_QUEUE_MAX)
+        self.db_stage = Stage("database", settings.DB_CALL_MAX_CONCURRENCY, settings.DB_CALL_QUEUE_MAX)
+        self.shed = 0
+        self.stream_replies = settings.A2A_STREAM
+        # order listings are paged ("more orders") unless this is 0
+        self.orders_page_size = settings.ORDERS_PAGE_SIZE
+
+        # rule-based intent fast path (skips the LLM for unambiguous messages)
+        rules = IntentClassifier(settings.INTENT_RULES_PATH)
+        self.intents = rules if settings.INTENT_FAST_PATH else None
+        self.extract_ids = rules.extract_ids
 
-        # in-memory context store
-        self.context = helper()
+        # cache of LLM parses keyed by message text with IDs templated out
+        self.intent_cache = (
+            IntentCache(
+                rules.id_patterns,
+                max_entries=settings.INTENT_CACHE_SIZE,
+                ttl=settings.INTENT_CACHE_TTL,
+                path=settings.INTENT_CACHE_PATH or None
+            )
+            if settings.INTENT_CACHE else None
+        )
+
+        # read-only DB lookups started while the LLM is still parsing
+        self.speculation = (
+            SpeculativeReads(rules.extract_ids, max_per_message=settings.SPECULATIVE_MAX)
+            if settings.SPECULATIVE_READS else None
+        )
+
+        # per-conversation state, keyed by session ID
+        self.sessions = make_session_store(
+            settings.SESSION_BACKEND,
+            settings.SESSION_DB_PATH,
+            ttl=settings.SESSION_TTL,
+            max_sessions=settings.SESSION_MAX
+        )
 
     async def init_a2a(self):
         """Lazily initialize A2AClient from the agent card URL."""
         if self.a2a_client is None:
-            self.a2a_client = await A2AClient.get_client_from_agent_card_url(
-                self.httpx,
-                self.a2a_url
-            )
+            with TRACER.span("agent_card"):
+                self.a2a_client = await A2AClient.get_client_from_agent_card_url(
+                    self.httpx,
+                    self.a2a_url
+                )
+
+    async def ask_llama3(self, prompt: str, stop_at_json: bool = False) -> str:
+        """Ask your local Ollama HTTP server for LLaMA-3 without blocking the event loop."""
+        async with self.llm_stage.admit():
+            with TRACER.span("llm", stream=self.llm.stream):
+                return await admission.within_deadline(
+                    self.llm.generate(prompt, stop_at_json=stop_at_json), "llm"
+                )
+
+    def _database_params(self, action: str, params: dict, stream: bool = False) -> MessageSendParams:
+        payload = {"action": action, "parameters": params}
+        if (trace_id := tracing.current_trace_id()):
+            payload["trace_id"] = trace_id
+        if (deadline := admission.current_deadline()):
+            # the DatabaseAgent sheds the call instead of queueing past it
+            payload["deadline"] = deadline
+        if stream:
+            payload["stream"] = True
+        return MessageSendParams(
+            message={
+                "role": "user",
+                "parts": [{"type": "text", "text": json.dumps(payload)}],
+                "messageId": uuid4().hex
+            }
+        )
+
+    async def call_database(
+        self, action: str, params: dict, dispatched: Callable[[], None] | None = None
+    ) -> str:
+        """
+        Send one action to the DatabaseAgent and return the tool's text
+        result. dispatched() is called once the request is admitted and sent.
+        """
+        msg = SendMessageRequest(params=self._database_params(action, params))
+        async with self.db_stage.admit():
+            if dispatched:
+                dispatched()
+            with TRACER.span("a2a", action=action):
+                resp = await admission.within_deadline(self.a2a_client.send_message(msg), "database")
+        reply = resp.root
+        if isinstance(reply, JSONRPCErrorResponse):
+            raise A2AClientHTTPError(502, reply.error.message or "DatabaseAgent error")
+        return reply.result.parts[0].root.text
 
-    def ask_llama3(self, prompt: str) -> str:
-        """POST to your local Ollama HTTP server for LLaMA-3."""
-        resp = requests.post(self.llm_url, json={
-            "model": "llama3",
-            "prompt": prompt,
-            "stream": False
-        })
-        resp.raise_for_status()
-        return resp.json().get("response", "").strip()
-
-    async def handle_query(self, user_text: str) -> str:
+    async def stream_database(self, action: str, params: dict):
+        """
+        Send one action over message/stream and yield the tool result's text
+        chunks as they arrive (a single chunk unless the result is a list).
+        """
+        msg = SendStreamingMessageRequest(params=self._database_params(action, params, stream=True))
+        async with self.db_stage.admit():
+            with TRACER.span("a2a", action=action, stream=True):
+                events = self.a2a_client.send_message_streaming(
+                    msg, http_kwargs={"timeout": self.httpx.timeout}
+                )
+                try:
+                    while True:
+                        try:
+                            resp = await admission.within_deadline(anext(events), "database")
+                        except StopAsyncIteration:
+                            return
+                        reply = resp.root
+                        if isinstance(reply, JSONRPCErrorResponse):
+                            raise A2AClientHTTPError(502, reply.error.message or "DatabaseAgent error")
+                        event = reply.result
+                        if isinstance(event, TaskArtifactUpdateEvent):
+                            for part in event.artifact.parts:
+                                yield part.root.text
+                        elif isinstance(event, Message):
+                            # an agent without streaming support answers in one message
+                            yield event.parts[0].root.text
+                finally:
+                    await events.aclose()
+
+    @contextmanager
+    def _message_trace(self):
+        """One trace per customer message, carried to the DatabaseAgent in the payload."""
+        if not TRACER.enabled:
+            yield
+            return
+        with tracing.trace(tracing.new_trace_id()), TRACER.span("handle_query"):
+            yield
+
+    async def handle_query(self, user_text: str, session_id: str = "default") -> str:
+        pending = {}   # speculative reads started for this message
+        deadline = time.time() + self.deadline if self.deadline > 0 else None
+        try:
+            # an earlier deadline set by the caller (e.g. the front end's arrival time) wins
+            with admission.deadline_scope(deadline), self._message_trace():
+                resolved = await self._resolve(user_text, session_id, pending)
+                if isinstance(resolved, str):
+                    return resolved
+                return await self._answer(*resolved, session_id, pending)
+        except Overloaded as e:
+            self.shed += 1
+            TRACER.incr(f"shed.{e.stage}.{e.reason}")
+            return OVERLOADED_REPLY
+        finally:
+            if pending:
+                self.speculation.discard(pending)
+
+    async def handle_query_stream(self, user_text: str, session_id: str = "default"):
+        """
+        handle_query, delivered in pieces: list replies (a customer's orders,
+        batch lookups) are streamed from the DatabaseAgent and formatted
+        chunk by chunk, every other reply is one piece. The pieces joined
+        together are what handle_query would have returned.
+        """
+        pending = {}
+        sent = False
+        deadline = time.time() + self.deadline if self.deadline > 0 else None
+        try:
+            with admission.deadline_scope(deadline), self._message_trace():
+                resolved = await self._resolve(user_text, session_id, pending)
+                if isinstance(resolved, str):
+                    yield resolved
+                elif self.stream_replies and resolved[0] in STREAMED_REPLIES:
+                    async for piece in self._stream_answer(*resolved, session_id):
+                        sent = True
+                        yield piece
+                else:
+                    yield await self._answer(*resolved, session_id, pending)
+        except Overloaded as e:
+            self.shed += 1
+            TRACER.incr(f"shed.{e.stage}.{e.reason}")
+            yield ("\n" if sent else "") + OVERLOADED_REPLY
+        finally:
+            if pending:
+                self.speculation.discard(pending)
+
+    async def _resolve(self, user_text: str, session_id: str, pending: dict) -> tuple[str, dict] | str:
+        """(action, parameters) to send to the DatabaseAgent, or a final reply."""
         # 1) Ensure A2A client is ready
         try:
             await self.init_a2a()
         except A2AClientHTTPError as e:
             return f"Failed to connect to DatabaseAgent: {e}"
 
-        # 2) Use LLaMA-3 to parse intent + parameters
-        parse_prompt = (
-            "You are an intent parser for a customer support system. "
-            "Given a customer message, extract the intent and any relevant IDs. "
-            "Available intents: get_order_status, get_customer_orders, cancel_service, subscription_status, support_request. "
-            "Parameters should be `order_id`, `customer_id`, or `subscription_id`"
-            "Reply ONLY with a JSON object with keys 'action' and 'parameters'. Do NOT add anything else, just reply with the JSON."
-            f"Message: \"{user_text}\""
-        )
-        parsed_text = self.ask_llama3(parse_prompt)
-        try:
-            parsed = json.loads(parsed_text)
-            action = parsed.get("action")
-            params = parsed.get("parameters", {}) or {}
-        except json.JSONDecodeError:
-            action = None
-            params = {}
-
-        allowed = {
-            "get_order_status",
-            "get_customer_orders",
-            "cancel_service",
-            "subscription_status",
-            "support_request"
-        }
+        # 2) Unambiguous messages are resolved by rules; the rest go to LLaMA-3
+        parsed = self.intents.classify(user_text) if self.intents else None
+        source = "rules"
+        if parsed is None and self.intent_cache:
+            parsed = self.intent_cache.get(user_text)
+            source = "cache"
+        if parsed is None:
+            source = "llm"
+            if self.speculation:
+                pending.update(self.speculation.start(user_text, self.call_database))
+            try:
+                parsed_text = await self.ask_llama3(build_parse_prompt(user_text), stop_at_json=True)
+            except httpx.HTTPError as e:
+                return f"Sorry, the language model is unavailable right now: {e}"
+            parsed = parse_intent_reply(parsed_text)
+            if parsed and parsed["action"] in ALLOWED_ACTIONS and self.intent_cache:
+                self.intent_cache.put(user_text, parsed)
+
+        TRACER.incr(f"intent.{source}")
+        action = parsed["action"] if parsed else None
+        params = parsed["parameters"] if parsed else {}
 
-        if not action or action not in allowed: 
+        if not action or action not in ALLOWED_ACTIONS: 
             return f"Hello Customer! This is an AI agent. We could not parse your message: {user_text}. You can start by checking your order status in full sentences and providing us with your order ID."
         
         if action in {"get_customer_orders","support_request"}:
-            cid = self.context.get("customer_id")
+            cid = await self.sessions.get(session_id, "customer_id")
             if not cid:
                     return "I don’t know your customer ID yet—ask about a specific order first."
+            if action == "get_customer_orders" and self.orders_page_size > 0:
+                return await self.orders_page(session_id, cid, params)
             params = {"customer_id": cid}
 
-        # # 3) Fallback detection if parse fails or yields unknown action
-        # allowed = {
-        #     "get_order_status",
-        #     "get_customer_orders",
-        #     "cancel_service",
-        #     "subscription_status",
-        #     "support_request"
-        # }
-        # tl = user_text.lower()
-        # if not action or action not in allowed:
-        #     if "cancel" in tl and "sub" in tl:
-        #         action = "cancel_service"
-        #         m = re.search(r"\bSUB\d+\b", user_text.upper())
-        #         if m:
-        #             params = {"subscription_id": m.group(0)}
-        #         else:
-        #             return "Sorry, I couldn't find a subscription ID."
-        #     elif any(w in tl for w in ("renew", "expire", "subscription status")):
-        #         action = "subscription_status"
-        #         m = re.search(r"\bSUB\d+\b", user_text.upper())
-        #         if m:
-        #             params = {"subscription_id": m.group(0)}
-        #         else:
-        #             return "Sorry, I couldn't find a subscription ID."
-        #     elif any(w in tl for w in ("support", "help")):
-        #         action = "support_request"
-        #         cid = self.context.get("customer_id")
-        #         if not cid:
-        #             return "I don’t know your customer ID yet—ask about a specific order first."
-        #         params = {"customer_id": cid}
-        #     elif "order" in tl:
-        #         action = "get_order_status"
-        #         m = re.search(r"\bORD\d+\b", user_text.upper())
-        #         if m:
-        #             params = {"order_id": m.group(0)}
-        #         else:
-        #             return "Sorry, I couldn’t find an order ID."
-        #     elif "my orders" in tl:
-        #         action = "get_customer_orders"
-        #         cid = self.context.get("customer_id")
-        #         if not cid:
-        #             return "I don’t know your customer ID yet—ask about a specific order first."
-        #         params = {"customer_id": cid}
-        #     else:
-        #         return "Sorry, I didn’t understand that. Could you rephrase?"
-
-        # 5) Build A2A message payload
-        payload = {"action": action, "parameters": params}
-        msg = SendMessageRequest(
-            params=MessageSendParams(
-                message={
-                    "role": "user",
-                    "parts": [{"type": "text", "text": json.dumps(payload)}],
-                    "messageId": uuid4().hex
-                }
-            )
-        )
+        # 4) Several IDs of the kind asked about: look them all up in one round trip
+        if action in BATCH_ACTIONS:
+            param, batch_action, batch_param = BATCH_ACTIONS[action]
+            ids = self.extract_ids(user_text).get(param, [])
+            if len(ids) > 1:
+                action, params = batch_action, {batch_param: ids}
+        return action, params
+
+    async def orders_page(self, session_id: str, customer_id: str, parsed: dict) -> tuple[str, dict] | str:
+        """get_customer_orders as its first page, or the next one after "more orders"."""
+        if parsed.get("page") == "next":
+            page = await self.sessions.get(session_id, "orders_page")
+            if not page or page.get("customer_id") != customer_id:
+                return "There are no more orders to show."
+            return "get_customer_orders_page", page
+        params = {"customer_id": customer_id, "limit": self.orders_page_size}
+        for key in ORDER_FILTERS:
+            if isinstance(parsed.get(key), str) and parsed[key]:
+                params[key] = parsed[key]
+        return "get_customer_orders_page", params
 
-        # 6) Send via A2AClient
+    async def _answer(self, action: str, params: dict, session_id: str, pending: dict) -> str:
+        # 5) Use the speculative read if it guessed this intent, else ask the DatabaseAgent
         try:
-            resp = await self.a2a_client.send_message(msg)
+            task = self.speculation.take(pending, action, params) if pending else None
+            text = await task if task else await self.call_database(action, params)
         except A2AClientHTTPError as e:
             return f"Error executing tool {action}: {e}"
+        return await self.format_reply(action, params, text, session_id)
 
-        text = resp.model_dump(mode="json", exclude_none=True)["result"]["parts"][0]["text"]
+    async def _stream_answer(self, action: str, params: dict, session_id: str):
+        key = STREAMED_REPLIES[action]
+        paged = action == "get_customer_orders_page"
+        first = True
+        cursor = None
+        try:
+            async for text in self.stream_database(action, params):
+                try:
+                    data = json.loads(text)
+                except json.JSONDecodeError:
+                    data = None
+                if not isinstance(data, dict) or not data.get(key):
+                    # errors, empty lists: the same reply as without streaming
+                    yield ("" if first else "\n") + await self.format_reply(action, params, text, session_id)
+                    paged = False
+                elif key == "orders":
+                    cursor = data.get("next_cursor", cursor)
+                    lines = [f"{o['id']}: {o['status']}" for o in data["orders"]]
+                    header = self.orders_header(params) if first else "\n"
+                    yield header + "\n".join(lines)
+                else:
+                    yield ("" if first else "\n") + await self.format_batch(session_id, data["results"])
+                first = False
+        except A2AClientHTTPError as e:
+            yield ("" if first else "\n") + f"Error executing tool {action}: {e}"
+            return
+        if paged and not first:
+            # the final chunk carried next_cursor: remember it like format_orders_page
+            yield await self.orders_footer(session_id, params, cursor)
 
+    async def format_reply(self, action: str, params: dict, text: str, session_id: str) -> str:
         # 7) Parse and return
         try:
             data = json.loads(text)
         except json.JSONDecodeError:
             return text
 
+        if data.get("error") == "overloaded":
+            raise Overloaded(data.get("stage", "tools"), data.get("reason", "queue_full"))
+
+        if "results" in data:
+            return await self.format_batch(session_id, data["results"])
         if data.get("message"):
             if data.get("customer_id"):
-                self.context.set("customer_id", data.get("customer_id"))
+                await self.sessions.set(session_id, "customer_id", data.get("customer_id"))
             return data["message"]
         if action == "get_order_status":
             if data.get("customer_id"):
-                self.context.set("customer_id", data.get("customer_id"))
+                await self.sessions.set(session_id, "customer_id", data.get("customer_id"))
             return f"Order {params.get('order_id')} is '{data.get('status')}'."
         if action == "get_customer_orders":
             orders = data.get("orders", [])
@@ -187,12 +410,76 @@ class SupportAgent:
             # Format each order with its status
             lines = [f"{o['id']}: {o['status']}" for o in orders]
             return "Your orders:\n" + "\n".join(lines)
+        if action == "get_customer_orders_page":
+            return await self.format_orders_page(session_id, params, data)
         if action == "support_request":
-            return f"Thank you for raising a support request. You have {data.get("support_ticket_count")} support requests with us. An agent will be with you shortly."
+            return f"Thank you for raising a support request. You have {data.get('support_ticket_count')} support requests with us. An agent will be with you shortly."
         return text
 
+    async def format_orders_page(self, session_id: str, params: dict, data: dict) -> str:
+        """One page of orders; remembers where the next page starts for "more orders"."""
+        if data.get("error"):
+            return f"Sorry, I could not list your orders: {data['error']}."
+        orders = data.get("orders", [])
+        footer = await self.orders_footer(session_id, params, data.get("next_cursor"))
+        if not orders:
+            return "There are no more orders to show." if params.get("cursor") else "You have no orders."
+        lines = [f"{o['id']}: {o['status']}" for o in orders]
+        return self.orders_header(params) + "\n".join(lines) + footer
+
+    def orders_header(self, params: dict) -> str:
+        return "More of your orders:\n" if params.get("cursor") else "Your orders:\n"
+
+    async def orders_footer(self, session_id: str, params: dict, cursor: str | None) -> str:
+        """Saves (or clears) the next page for "more orders" and says how to get it."""
+        await self.sessions.set(session_id, "orders_page", {**params, "cursor": cursor} if cursor else None)
+        return f"\nSay 'more orders' to see the next {params['limit']}." if cursor else ""
+
+    async def format_batch(self, session_id: str, results: list[dict]) -> str:
+        """One line per requested ID, in the order the customer gave them."""
+        lines = []
+        for item in results:
+            if item.get("customer_id"):
+                await self.sessions.set(session_id, "customer_id", item["customer_id"])
+            if item.get("message"):
+                lines.append(item["message"])
+            elif "order_id" in item:
+                if item.get("error"):
+                    lines.append(f"Order {item['order_id']}: {item['error']}.")
+                else:
+                    lines.append(f"Order {item['order_id']} is '{item.get('status')}'.")
+            elif item.get("error"):
+                lines.append(f"Subscription {item['subscription_id']}: {item['error']}.")
+            else:
+                lines.append(
+                    f"Subscription {item['subscription_id']} is '{item.get('status')}'"
+                    f" (renews {item.get('renewal_date')})."
+                )
+        return "\n".join(lines)
+
     async def close(self):
         await self.httpx.aclose()
+        await self.llm.close()
+        if self.intent_cache:
+            self.intent_cache.close()
+        self.sessions.close()
+        TRACER.close()
+
+    def metrics(self) -> dict:
+        """Spans/counters plus the intent, LLM and session component stats."""
+        return {
+            **TRACER.stats(),
+            "intent_rules": self.intents.stats() if self.intents else None,
+            "intent_cache": self.intent_cache.stats() if self.intent_cache else None,
+            "speculation":  self.speculation.stats() if self.speculation else None,
+            "llm":          self.llm.stats(),
+            "sessions":     self.sessions.stats(),
+            "admission":    {
+                "shed":     self.shed,
+                "llm":      self.llm_stage.stats(),
+                "database": self.db_stage.stats()
+            }
+        }
 
 # Standalone demo
 if __name__ == "__main__":
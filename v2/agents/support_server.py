@@ -0,0 +1,216 @@
+# support_server.py
+# Network front end for SupportAgent: many customer sessions served
+# concurrently on one event loop, over HTTP or WebSocket.
+#
+#   POST /sessions                          -> {"session_id": ...}
+#   POST /sessions/{session_id}/messages    {"text": ...} -> {"reply": ...}
+#   POST /sessions/{session_id}/messages/stream   {"text": ...} -> reply as chunked text/plain
+#   WS   /sessions/{session_id}/ws          one reply per text frame, in order
+#   GET  /stats                             front end counters
+#   GET  /metrics                           + SupportAgent spans, counters and caches
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from agents import admission, settings
+from agents.support_agent import SupportAgent
+
+
+class ShuttingDown(Exception):
+    pass
+
+
+# last line of a streamed reply whose turn was refused after the response had started
+SHUTTING_DOWN_REPLY = "The service is restarting and your message was not processed. Please send it again."
+
+
+class _SessionLock:
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class SupportFrontend:
+    """
+    Serializes messages within a session (replies come back in the order the
+    customer sent them), caps how many queries run at once across sessions,
+    and drains in-flight queries on shutdown. A message's deadline starts
+    when it arrives, so time spent queued here counts against it.
+    """
+    def __init__(self, agent: SupportAgent, max_concurrency: int = 64, drain_timeout: float = 30.0):
+        self.agent = agent
+        self.drain_timeout = drain_timeout
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self._locks: dict[str, _SessionLock] = {}
+        self._accepting = True
+        self._inflight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.served = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def _turn(self, session_id: str):
+        """This session's turn: in arrival order, within the concurrency cap."""
+        if not self._accepting:
+            self.rejected += 1
+            raise ShuttingDown()
+        slot = self._locks.get(session_id)
+        if slot is None:
+            slot = self._locks[session_id] = _SessionLock()
+        slot.users += 1
+        self._inflight += 1
+        self._idle.clear()
+        deadline = time.time() + self.agent.deadline if self.agent.deadline > 0 else None
+        try:
+            with admission.deadline_scope(deadline):
+                async with slot.lock:
+                    async with self._sem:
+                        yield
+        finally:
+            slot.users -= 1
+            if slot.users == 0:
+                del self._locks[session_id]
+            self._inflight -= 1
+            if self._inflight == 0:
+                self._idle.set()
+
+    @property
+    def accepting(self) -> bool:
+        return self._accepting
+
+    async def ask(self, session_id: str, text: str) -> str:
+        async with self._turn(session_id):
+            reply = await self.agent.handle_query(text, session_id=session_id)
+        self.served += 1
+        return reply
+
+    async def ask_stream(self, session_id: str, text: str):
+        """ask, yielding the reply in pieces as SupportAgent produces them."""
+        async with self._turn(session_id):
+            async for piece in self.agent.handle_query_stream(text, session_id=session_id):
+                yield piece
+        self.served += 1
+
+    async def drain(self) -> None:
+        """Stop accepting queries and wait for the in-flight ones to finish."""
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "inflight":        self._inflight,
+            "active_sessions": len(self._locks),
+            "served":          self.served,
+            "rejected":        self.rejected
+        }
+
+
+def build_app(agent: SupportAgent | None = None) -> Starlette:
+    agent = agent or SupportAgent()
+    frontend = SupportFrontend(
+        agent,
+        max_concurrency=settings.FRONTEND_MAX_CONCURRENCY,
+        drain_timeout=settings.FRONTEND_DRAIN_TIMEOUT
+    )
+
+    async def new_session(request: Request) -> JSONResponse:
+        return JSONResponse({"session_id": uuid4().hex})
+
+    async def message_text(request: Request) -> tuple[str | None, JSONResponse | None]:
+        """The message's text, or the 400 response for a malformed body."""
+        try:
+            body = await request.json()
+        except ValueError:   # not JSON, or not UTF-8
+            return None, JSONResponse({"error": "body must be a JSON object"}, status_code=400)
+        if not isinstance(body, dict):
+            return None, JSONResponse({"error": "body must be a JSON object"}, status_code=400)
+        text = body.get("text")
+        if not isinstance(text, str) or not text.strip():
+            return None, JSONResponse({"error": "text is required"}, status_code=400)
+        return text, None
+
+    async def post_message(request: Request) -> JSONResponse:
+        text, error = await message_text(request)
+        if error:
+            return error
+        try:
+            reply = await frontend.ask(request.path_params["session_id"], text)
+        except ShuttingDown:
+            return JSONResponse({"error": "shutting down"}, status_code=503)
+        return JSONResponse({"reply": reply})
+
+    async def post_message_stream(request: Request):
+        text, error = await message_text(request)
+        if error:
+            return error
+        if not frontend.accepting:
+            frontend.rejected += 1
+            return JSONResponse({"error": "shutting down"}, status_code=503)
+        session_id = request.path_params["session_id"]
+
+        async def reply():
+            # runs entirely in the response task, so the turn's context is entered and left there
+            try:
+                async for piece in frontend.ask_stream(session_id, text):
+                    yield piece
+            except ShuttingDown:
+                # the 200 is already out: say so rather than end with an empty reply
+                yield SHUTTING_DOWN_REPLY
+        return StreamingResponse(reply(), media_type="text/plain; charset=utf-8")
+
+    async def session_ws(websocket: WebSocket) -> None:
+        session_id = websocket.path_params["session_id"]
+        await websocket.accept()
+        try:
+            while True:
+                text = await websocket.receive_text()
+                try:
+                    reply = await frontend.ask(session_id, text)
+                except ShuttingDown:
+                    await websocket.close(code=1012)
+                    return
+                await websocket.send_json({"reply": reply})
+        except WebSocketDisconnect:
+            return
+
+    async def stats(request: Request) -> JSONResponse:
+        return JSONResponse(frontend.stats())
+
+    async def metrics(request: Request) -> JSONResponse:
+        return JSONResponse({"frontend": frontend.stats(), **agent.metrics()})
+
+    async def shutdown() -> None:
+        await frontend.drain()
+        await agent.close()
+
+    app = Starlette(
+        routes=[
+            Route("/sessions", new_session, methods=["POST"]),
+            Route("/sessions/{session_id}/messages", post_message, methods=["POST"]),
+            Route("/sessions/{session_id}/messages/stream", post_message_stream, methods=["POST"]),
+            WebSocketRoute("/sessions/{session_id}/ws", session_ws),
+            Route("/stats", stats, methods=["GET"]),
+            Route("/metrics", metrics, methods=["GET"]),
+        ],
+        on_shutdown=[shutdown]
+    )
+    app.state.frontend = frontend
+    return app
+
+
+if __name__ == "__main__":
+    uvicorn.run(build_app(), host=settings.FRONTEND_HOST, port=settings.FRONTEND_PORT)
@@ -0,0 +1,187 @@
+# task_store.py
+# A2A task stores for the DatabaseAgent server. a2a's InMemoryTaskStore keeps
+# every task forever; these bound the store by size and age instead. Finished
+# tasks (completed, failed, ...) are only kept for a short TTL so clients can
+# still fetch the result, and are evicted least-recently-used first when the
+# store is full. Tasks still in progress get a longer max age, and are only
+# evicted by size once no finished task is left to drop.
+import sqlite3
+import time
+from collections import OrderedDict
+
+from a2a.server.tasks import TaskStore
+from a2a.types import Task, TaskState
+
+TERMINAL_STATES = frozenset({
+    TaskState.completed, TaskState.canceled, TaskState.failed,
+    TaskState.rejected, TaskState.unknown
+})
+
+
+def is_terminal(task: Task) -> bool:
+    return task.status.state in TERMINAL_STATES
+
+
+class BoundedTaskStore(TaskStore):
+    """In-memory tasks with LRU order, TTLs and a hard cap on stored tasks."""
+    def __init__(self, max_tasks: int = 10_000, ttl: float = 300.0, max_age: float = 3600.0):
+        """
+        ttl: seconds a finished task stays fetchable after its last update or
+        read. max_age: the same for unfinished tasks (abandoned streams,
+        crashed executors).
+        """
+        self.max_tasks = max_tasks
+        self.ttl = ttl
+        self.max_age = max_age
+        # task_id -> (task, touched); oldest first
+        self._done: OrderedDict[str, tuple[Task, float]] = OrderedDict()
+        self._active: OrderedDict[str, tuple[Task, float]] = OrderedDict()
+        self.saves = 0
+        self.expired = 0
+        self.evicted = 0
+        self.evicted_active = 0
+
+    async def save(self, task: Task) -> None:
+        now = time.monotonic()
+        self._done.pop(task.id, None)
+        self._active.pop(task.id, None)
+        (self._done if is_terminal(task) else self._active)[task.id] = (task, now)
+        self.saves += 1
+        self._sweep(now)
+
+    async def get(self, task_id: str) -> Task | None:
+        now = time.monotonic()
+        for tasks, ttl in ((self._done, self.ttl), (self._active, self.max_age)):
+            entry = tasks.get(task_id)
+            if entry is None:
+                continue
+            task, touched = entry
+            if now - touched > ttl:
+                del tasks[task_id]
+                self.expired += 1
+                return None
+            tasks[task_id] = (task, now)
+            tasks.move_to_end(task_id)
+            return task
+        return None
+
+    async def delete(self, task_id: str) -> None:
+        self._done.pop(task_id, None)
+        self._active.pop(task_id, None)
+
+    def _sweep(self, now: float) -> None:
+        # oldest entries sit at the front, so expiry stops at the first live one
+        for tasks, ttl in ((self._done, self.ttl), (self._active, self.max_age)):
+            while tasks and now - next(iter(tasks.values()))[1] > ttl:
+                tasks.popitem(last=False)
+                self.expired += 1
+        while len(self._done) + len(self._active) > self.max_tasks:
+            if self._done:
+                self._done.popitem(last=False)
+                self.evicted += 1
+            else:
+                self._active.popitem(last=False)
+                self.evicted_active += 1
+
+    def stats(self) -> dict:
+        return {
+            "backend":        "memory",
+            "tasks":          len(self._done) + len(self._active),
+            "active":         len(self._active),
+            "saves":          self.saves,
+            "expired":        self.expired,
+            "evicted":        self.evicted,
+            "evicted_active": self.evicted_active
+        }
+
+    def close(self) -> None:
+        self._done.clear()
+        self._active.clear()
+
+
+class SQLiteTaskStore(TaskStore):
+    """Tasks in a local SQLite file, so results survive a DatabaseAgent restart."""
+    def __init__(
+        self,
+        path: str,
+        max_tasks: int = 1_000_000,
+        ttl: float = 300.0,
+        max_age: float = 3600.0,
+        prune_every: int = 1000
+    ):
+        self.max_tasks = max_tasks
+        self.ttl = ttl
+        self.max_age = max_age
+        self.prune_every = prune_every
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.execute("PRAGMA busy_timeout = 5000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " task_id TEXT PRIMARY KEY, terminal INTEGER NOT NULL,"
+            " data TEXT NOT NULL, touched REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS tasks_touched ON tasks(terminal, touched)")
+        self._writes = 0
+        self.expired = 0
+        self.evicted = 0
+
+    async def save(self, task: Task) -> None:
+        now = time.time()
+        self._db.execute(
+            "INSERT OR REPLACE INTO tasks(task_id, terminal, data, touched) VALUES(?, ?, ?, ?)",
+            (task.id, int(is_terminal(task)), task.model_dump_json(exclude_none=True), now)
+        )
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self._prune(now)
+
+    async def get(self, task_id: str) -> Task | None:
+        now = time.time()
+        row = self._db.execute(
+            "SELECT data FROM tasks WHERE task_id = ?"
+            " AND touched >= CASE terminal WHEN 1 THEN ? ELSE ? END",
+            (task_id, now - self.ttl, now - self.max_age)
+        ).fetchone()
+        return Task.model_validate_json(row[0]) if row else None
+
+    async def delete(self, task_id: str) -> None:
+        self._db.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+    def _prune(self, now: float) -> None:
+        self.expired += self._db.execute(
+            "DELETE FROM tasks WHERE (terminal = 1 AND touched < ?) OR (terminal = 0 AND touched < ?)",
+            (now - self.ttl, now - self.max_age)
+        ).rowcount
+        excess = self._db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] - self.max_tasks
+        if excess > 0:
+            # finished tasks go first, oldest first
+            self.evicted += self._db.execute(
+                "DELETE FROM tasks WHERE task_id IN"
+                " (SELECT task_id FROM tasks ORDER BY terminal DESC, touched LIMIT ?)",
+                (excess,)
+            ).rowcount
+
+    def stats(self) -> dict:
+        tasks, active = self._db.execute(
+            "SELECT COUNT(*), COUNT(*) - COALESCE(SUM(terminal), 0) FROM tasks"
+        ).fetchone()
+        return {
+            "backend": "sqlite",
+            "tasks":   tasks,
+            "active":  active,
+            "expired": self.expired,
+            "evicted": self.evicted
+        }
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def make_task_store(backend: str, path: str, max_tasks: int, ttl: float, max_age: float):
+    if backend == "memory":
+        return BoundedTaskStore(max_tasks=max_tasks, ttl=ttl, max_age=max_age)
+    if backend == "sqlite":
+        return SQLiteTaskStore(path, max_tasks=max_tasks, ttl=ttl, max_age=max_age)
+    raise ValueError(f"Unknown task store backend: {backend!r} (expected 'memory' or 'sqlite')")
@@ -0,0 +1,90 @@
+# tool_transport.py
+# How DatabaseAgentExecutor reaches the database tools:
+#   "stdio"    - pooled MCP sessions to `python -m agents.db_tools_server` children
+#   "embedded" - the same tool functions imported and called in-process
+import asyncio
+import json
+import threading
+
+from mcp import StdioServerParameters
+
+from agents.mcp_pool import MCPSessionPool
+
+
+class StdioTransport:
+    """Calls tools on the external FastMCP server over pooled stdio sessions."""
+    name = "stdio"
+
+    def __init__(self, params: StdioServerParameters, size: int, call_timeout: float):
+        self.pool = MCPSessionPool(params, size=size, call_timeout=call_timeout)
+
+    async def start(self) -> None:
+        await self.pool.start()
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+    async def call(self, action: str, params: dict, retry: bool = True) -> str:
+        return await self.pool.call_tool(action, params, retry=retry)
+
+    async def metrics(self) -> list[dict]:
+        """trace_metrics from every tool server child."""
+        return [json.loads(text) for text in await self.pool.call_each("trace_metrics", {})]
+
+    def stats(self) -> dict:
+        return self.pool.stats()
+
+
+class EmbeddedTransport:
+    """
+    Calls the tool functions directly, skipping JSON-RPC framing, pipes and
+    the child process. Calls go through FastMCP's public call_tool, so
+    arguments are validated and coerced, and errors worded, exactly as over
+    stdio. The tools are blocking SQLite code, so each call runs in a worker
+    thread (on that thread's own event loop) to keep the event loop free.
+    """
+    name = "embedded"
+
+    def __init__(self):
+        # imported lazily so stdio-only deployments never load the tool module
+        from agents import db_tools_server
+        self.module = db_tools_server
+        self.calls = 0
+        self._local = threading.local()
+
+    async def start(self) -> None:
+        return
+
+    async def close(self) -> None:
+        return
+
+    async def call(self, action: str, params: dict, retry: bool = True) -> str:
+        self.calls += 1
+        try:
+            return await asyncio.to_thread(self._run, action, params)
+        except Exception as e:
+            # FastMCP's ToolError already reads "Error executing tool <name>: ...",
+            # the text the stdio server sends back for a failing tool
+            return str(e)
+
+    def _run(self, action: str, params: dict) -> str:
+        loop = getattr(self._local, "loop", None)
+        if loop is None:
+            loop = self._local.loop = asyncio.new_event_loop()
+        content = loop.run_until_complete(self.module.mcp.call_tool(action, params))
+        return content[0].text
+
+    async def metrics(self) -> list[dict]:
+        """trace_metrics of the tool module loaded in this process."""
+        return [json.loads(self.module.trace_metrics(ctx=None))]
+
+    def stats(self) -> dict:
+        return {"calls": self.calls}
+
+
+def make_transport(kind: str, params: StdioServerParameters, size: int, call_timeout: float):
+    if kind == "stdio":
+        return StdioTransport(params, size, call_timeout)
+    if kind == "embedded":
+        return EmbeddedTransport()
+    raise ValueError(f"Unknown tool transport: {kind!r} (expected 'stdio' or 'embedded')")
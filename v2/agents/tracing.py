@@ -0,0 +1,169 @@
+# tracing.py
+# Spans and counters shared by SupportAgent, DatabaseAgent and the tool
+# server. handle_query mints a trace_id that rides in the A2A payload and the
+# tool arguments, so span log lines from every process can be joined on it.
+# Disabled (the default), span() hands back a shared no-op and incr() returns
+# immediately.
+import json
+import sys
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from contextlib import contextmanager
+from uuid import uuid4
+
+from agents import settings
+
+_trace_id: ContextVar[str | None] = ContextVar("trace_id", default=None)
+
+
+def new_trace_id() -> str:
+    return uuid4().hex
+
+
+def current_trace_id() -> str | None:
+    return _trace_id.get()
+
+
+@contextmanager
+def trace(trace_id: str | None):
+    """Make trace_id the current trace for spans opened inside the block."""
+    token = _trace_id.set(trace_id)
+    try:
+        yield trace_id
+    finally:
+        _trace_id.reset(token)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs) -> None:
+        return
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "attrs", "start", "t0")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.time()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.t0
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer._record(self, elapsed)
+        return False
+
+    def set(self, **attrs) -> None:
+        """Attach attributes (row counts, cache outcome, ...) to the span."""
+        self.attrs.update(attrs)
+
+
+class _SpanStats:
+    __slots__ = ("count", "errors", "total", "max", "recent")
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: deque[float] = deque(maxlen=window)
+
+
+class Tracer:
+    """
+    Per-process span timings and counters. Span timings keep a running
+    count/total/max plus the last `window` durations for percentiles.
+    log_path, when set, appends one JSON line per finished span ("-" for
+    stderr); several processes may share the same file.
+    """
+    def __init__(self, service: str, enabled: bool = False, log_path: str = "", window: int = 2048):
+        self.service = service
+        self.enabled = enabled
+        self.window = window
+        self._lock = threading.Lock()
+        self._spans: dict[str, _SpanStats] = {}
+        self._counters: dict[str, int] = {}
+        self._log = None
+        if enabled and log_path:
+            self._log = sys.stderr if log_path == "-" else open(log_path, "a", buffering=1)
+
+    def span(self, name: str, **attrs):
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name, attrs)
+
+    def incr(self, name: str, n: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def _record(self, span: _Span, elapsed: float) -> None:
+        with self._lock:
+            st = self._spans.get(span.name)
+            if st is None:
+                st = self._spans[span.name] = _SpanStats(self.window)
+            st.count += 1
+            st.total += elapsed
+            st.max = max(st.max, elapsed)
+            st.recent.append(elapsed)
+            if "error" in span.attrs:
+                st.errors += 1
+        if self._log is not None:
+            line = json.dumps({
+                "trace_id":    _trace_id.get(),
+                "service":     self.service,
+                "span":        span.name,
+                "start":       span.start,
+                "duration_ms": elapsed * 1000,
+                **span.attrs
+            }, default=str)
+            with self._lock:
+                self._log.write(line + "\n")
+
+    def stats(self) -> dict:
+        with self._lock:
+            spans = {name: (st.count, st.errors, st.total, st.max, sorted(st.recent))
+                     for name, st in self._spans.items()}
+            counters = dict(self._counters)
+        out = {}
+        for name, (count, errors, total, peak, recent) in sorted(spans.items()):
+            pick = lambda q: recent[min(len(recent) - 1, int(q * len(recent)))] * 1000
+            out[name] = {
+                "count":   count,
+                "errors":  errors,
+                "mean_ms": total / count * 1000,
+                "max_ms":  peak * 1000,
+                "p50_ms":  pick(.50),
+                "p95_ms":  pick(.95),
+                "p99_ms":  pick(.99)
+            }
+        return {"service": self.service, "enabled": self.enabled, "spans": out, "counters": counters}
+
+    def close(self) -> None:
+        if self._log is not None and self._log is not sys.stderr:
+            self._log.close()
+        self._log = None
+
+
+def make_tracer(service: str) -> Tracer:
+    return Tracer(service, enabled=settings.TRACE_ENABLED, log_path=settings.TRACE_LOG_PATH)
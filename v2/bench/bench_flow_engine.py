@@ -0,0 +1,152 @@
+# bench_flow_engine.py
+# Compiled FlowEngine versus the original linear interpreter over synthetic
+# rule sets and contexts. Both must pick the same scenario for every context.
+#
+#   cd v2 && python -m bench.bench_flow_engine --rules 2000 --contexts 5000
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from agents.flow_engine import FlowEngine
+
+ACTIONS = ["get_order_status", "cancel_service", "subscription_status", "support_request"]
+TIERS = ["regular", "gold", "platinum", "diamond"]
+STATUSES = ["Delivered", "Shipped", "Processing", "Delayed"]
+SUB_STATUSES = ["Active", "Expired"]
+
+
+# --- the interpreter db_tools_server used before FlowEngine, kept as reference
+
+def legacy_match_condition(conds, ctx):
+    for key, exp in conds.items():
+        parts = key.split('.')
+        val = ctx
+        for p in parts:
+            val = val.get(p) if isinstance(val, dict) else None
+            if val is None:
+                return False
+        if isinstance(exp, list):
+            if val not in exp:
+                return False
+        elif isinstance(exp, dict):
+            if 'gte' in exp and not (val >= exp['gte']): return False
+            if 'gt'  in exp and not (val >  exp['gt']):  return False
+            if 'within_days' in exp:
+                dt = datetime.strptime(val, "%Y-%m-%d").date()
+                if not (0 <= (dt - date.today()).days <= exp['within_days']):
+                    return False
+            if 'is_today' in exp:
+                dt = datetime.strptime(val, "%Y-%m-%d").date()
+                if dt != date.today():
+                    return False
+        else:
+            if val != exp:
+                return False
+    return True
+
+
+def legacy_match(scenarios, action, context):
+    for scen in scenarios:
+        if scen['conditions'].get('action') in (action, 'any'):
+            conds = {k: v for k, v in scen['conditions'].items() if k != 'action'}
+            if legacy_match_condition(conds, context):
+                return scen['id']
+    return None
+
+
+# --- synthetic data
+
+def random_day(rng: random.Random, today: date) -> str:
+    return (today + timedelta(days=rng.randint(-10, 10))).isoformat()
+
+
+def random_condition(rng: random.Random, today: date) -> tuple[str, object]:
+    kind = rng.randrange(7)
+    if kind == 0:
+        return "customer.loyalty_tier", rng.sample(TIERS, rng.randint(1, 3))
+    if kind == 1:
+        return "order.status", rng.sample(STATUSES, rng.randint(1, 2))
+    if kind == 2:
+        return "order.total_amount", {"gte": rng.choice([50, 100, 200, 300])}
+    if kind == 3:
+        return "customer.support_ticket_count", {"gt": rng.randint(0, 6)}
+    if kind == 4:
+        return "subscription.renewal_date", {"within_days": rng.randint(1, 14)}
+    if kind == 5:
+        return "customer.birth_date", {"is_today": True}
+    return "customer.total_orders", rng.randint(1, 3)
+
+
+def random_scenarios(rng: random.Random, n: int, today: date) -> list[dict]:
+    scenarios = []
+    for i in range(n):
+        conds = {"action": rng.choice(ACTIONS + ["any"])}
+        for _ in range(rng.randint(1, 3)):
+            key, exp = random_condition(rng, today)
+            conds[key] = exp
+        scenarios.append({"id": f"rule_{i}", "conditions": conds, "response_template": ""})
+    return scenarios
+
+
+def random_context(rng: random.Random, today: date) -> tuple[str, dict]:
+    customer = {
+        "id": f"C{rng.randint(1, 999):03d}",
+        "name": "Test",
+        "loyalty_tier": rng.choice(TIERS),
+        "birth_date": random_day(rng, today),
+        "support_ticket_count": rng.randint(0, 8),
+        "total_orders": rng.randint(1, 5)
+    }
+    action = rng.choice(ACTIONS)
+    ctx = {"customer": customer}
+    if action == "get_order_status":
+        ctx["order"] = {
+            "id": "ORD001", "status": rng.choice(STATUSES),
+            "eta_date": random_day(rng, today), "total_amount": rng.uniform(10, 400)
+        }
+    elif action in ("cancel_service", "subscription_status"):
+        ctx["subscription"] = {
+            "id": "SUB001", "plan": "Pro", "status": rng.choice(SUB_STATUSES),
+            "renewal_date": random_day(rng, today)
+        }
+    return action, ctx
+
+
+def main(args) -> None:
+    rng = random.Random(args.seed)
+    today = date.today()
+    scenarios = random_scenarios(rng, args.rules, today)
+    contexts = [random_context(rng, today) for _ in range(args.contexts)]
+
+    t0 = time.perf_counter()
+    engine = FlowEngine(scenarios)
+    compile_ms = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    legacy = [legacy_match(scenarios, a, c) for a, c in contexts]
+    legacy_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    compiled = []
+    for a, c in contexts:
+        scen = engine.match(a, c)
+        compiled.append(scen.id if scen else None)
+    compiled_s = time.perf_counter() - t0
+
+    mismatches = sum(1 for x, y in zip(legacy, compiled) if x != y)
+    hits = sum(1 for x in compiled if x)
+    print(f"{args.rules} rules x {args.contexts} contexts, {hits} matched, {mismatches} mismatches")
+    print(f"compile   {compile_ms:10.2f} ms")
+    print(f"legacy    {legacy_s * 1e6 / len(contexts):10.2f} us/eval")
+    print(f"compiled  {compiled_s * 1e6 / len(contexts):10.2f} us/eval  ({legacy_s / compiled_s:.1f}x)")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FlowEngine vs legacy interpreter")
+    parser.add_argument("--rules", type=int, default=2000)
+    parser.add_argument("--contexts", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,79 @@
+# bench_mcp_pool.py
+# Per-request latency of the DatabaseAgent → MCP hop: one stdio process per
+# call (the old path) versus the long-lived MCPSessionPool.
+#
+#   cd v2 && python -m bench.bench_mcp_pool --requests 50 --concurrency 4
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from agents.mcp_pool import MCPSessionPool
+
+PARAMS = StdioServerParameters(command=sys.executable, args=["-m", "agents.db_tools_server"], env=None)
+CALLS = [
+    ("get_order_status",    {"order_id": "ORD001"}),
+    ("get_order_status",    {"order_id": "ORD004"}),
+    ("subscription_status", {"subscription_id": "SUB002"}),
+    ("get_customer_orders", {"customer_id": "C001"}),
+]
+
+
+async def spawn_per_call(action: str, params: dict) -> str:
+    async with stdio_client(PARAMS) as (r, w):
+        async with ClientSession(r, w) as session:
+            await session.initialize()
+            resp = await session.call_tool(name=action, arguments=params)
+            return resp.content[0].text
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def run(label: str, call, requests: int, concurrency: int) -> None:
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        action, params = CALLS[i % len(CALLS)]
+        async with sem:
+            t0 = time.perf_counter()
+            await call(action, params)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    wall = time.perf_counter() - t0
+    print(
+        f"{label:<16} n={requests:<5} p50={percentile(latencies, .50):8.2f}ms "
+        f"p99={percentile(latencies, .99):8.2f}ms mean={statistics.mean(latencies):8.2f}ms "
+        f"throughput={requests / wall:8.1f} req/s"
+    )
+
+
+async def main(args) -> None:
+    await run("spawn-per-call", spawn_per_call, args.requests, args.concurrency)
+
+    pool = MCPSessionPool(PARAMS, size=args.pool_size)
+    t0 = time.perf_counter()
+    await pool.start()
+    print(f"pool startup: {(time.perf_counter() - t0) * 1000:.1f}ms for {args.pool_size} sessions")
+    try:
+        await run("pooled", pool.call_tool, args.requests, args.concurrency)
+        print("pool stats:", pool.stats())
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MCP hop latency: spawn-per-call vs pooled")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--pool-size", type=int, default=4)
+    asyncio.run(main(parser.parse_args()))
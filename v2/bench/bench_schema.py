@@ -0,0 +1,115 @@
+# bench_schema.py
+# Per-customer query plans and latency before and after db/migrations
+# (customer_id indexes, maintained customers.total_orders), on a scratch
+# database with millions of orders from db/generate.py.
+#
+#   cd v2 && python -m bench.bench_schema --orders 2000000
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from agents import migrations
+from db.generate import generate, width
+
+ORDER_LOOKUP = """
+    SELECT o.id, o.status, o.eta_date, o.total_amount,
+           c.id AS cust_id, c.name, c.loyalty_tier, c.birth_date, c.support_ticket_count
+    FROM orders o JOIN customers c ON o.customer_id = c.id
+    WHERE o.id = ?
+"""
+ORDER_LOOKUP_AGG = """
+    SELECT o.id, o.status, o.eta_date, o.total_amount,
+           c.id AS cust_id, c.name, c.loyalty_tier, c.birth_date, c.support_ticket_count,
+           c.total_orders
+    FROM orders o JOIN customers c ON o.customer_id = c.id
+    WHERE o.id = ?
+"""
+COUNT_ORDERS = "SELECT COUNT(*) FROM orders WHERE customer_id = ?"
+CUSTOMER_ORDERS = "SELECT id, status FROM orders WHERE customer_id = ?"
+CUSTOMER_ORDERS_PAGE = "SELECT id, status FROM orders WHERE customer_id = ? ORDER BY id LIMIT 51"
+CUSTOMER_SUBS = "SELECT id, status FROM subscriptions WHERE customer_id = ?"
+CUSTOMER_CANCELS = "SELECT id FROM cancellation_requests WHERE customer_id = ?"
+
+
+def plan(conn: sqlite3.Connection, sql: str) -> str:
+    return "; ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, ("x",)))
+
+
+def order_status_legacy(conn: sqlite3.Connection, order_id: str) -> None:
+    # what get_order_status did before 0002: join, then count the customer's orders
+    row = conn.execute(ORDER_LOOKUP, (order_id,)).fetchone()
+    conn.execute(COUNT_ORDERS, (row[4],)).fetchone()
+
+
+def run_all(*queries: str):
+    def run(conn: sqlite3.Connection, key: str) -> None:
+        for sql in queries:
+            conn.execute(sql, (key,)).fetchall()
+    return run
+
+
+def timed(conn: sqlite3.Connection, run, keys: list[str]) -> tuple[float, float]:
+    """p50/p95 in ms of run(conn, key) over keys."""
+    samples = []
+    for key in keys:
+        t0 = time.perf_counter()
+        run(conn, key)
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(0.95 * (len(samples) - 1))]
+
+
+def report(conn: sqlite3.Connection, label: str, cases: dict, keys: dict, n: int) -> None:
+    print(f"\n== {label} (user_version {migrations.current_version(conn)})")
+    for name, (run, queries, key_kind) in cases.items():
+        p50, p95 = timed(conn, run, keys[key_kind][:n])
+        print(f"{name:<22} p50 {p50:9.3f} ms  p95 {p95:9.3f} ms")
+        for sql in queries:
+            print(f"    {plan(conn, sql)}")
+
+
+def main(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scale.db")
+        t0 = time.perf_counter()
+        n_customers = max(1, args.orders // 10)
+        # schema version 0: generate without migrating, measure, then migrate
+        generate(path, n_customers, args.orders, seed=args.seed, migrate=False)
+        print(f"built {args.orders:,} orders in {time.perf_counter() - t0:.1f}s "
+              f"({os.path.getsize(path) / 2**20:.0f} MiB)")
+
+        rng = random.Random(args.seed + 1)
+        conn = sqlite3.connect(path)
+        keys = {
+            "order":    [f"ORD{rng.randrange(args.orders):0{width(args.orders)}d}" for _ in range(args.samples)],
+            "customer": [f"C{rng.randrange(n_customers):0{width(n_customers)}d}" for _ in range(args.samples)],
+        }
+        cases = {
+            "get_order_status":    (order_status_legacy, [ORDER_LOOKUP, COUNT_ORDERS], "order"),
+            "get_customer_orders": (run_all(CUSTOMER_ORDERS), [CUSTOMER_ORDERS], "customer"),
+            "customer_subs":       (run_all(CUSTOMER_SUBS), [CUSTOMER_SUBS], "customer"),
+            "customer_cancels":    (run_all(CUSTOMER_CANCELS), [CUSTOMER_CANCELS], "customer"),
+        }
+        report(conn, "before migrations", cases, keys, args.samples)
+
+        t0 = time.perf_counter()
+        applied = migrations.migrate(path)
+        print(f"\napplied migrations {applied} in {time.perf_counter() - t0:.1f}s")
+        conn.close()
+        conn = sqlite3.connect(path)
+        cases["get_order_status (agg)"] = (run_all(ORDER_LOOKUP_AGG), [ORDER_LOOKUP_AGG], "order")
+        cases["customer_orders_page"] = (run_all(CUSTOMER_ORDERS_PAGE), [CUSTOMER_ORDERS_PAGE], "customer")
+        report(conn, "after migrations", cases, keys, args.samples)
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="query plans/latency before and after schema migrations")
+    parser.add_argument("--orders", type=int, default=2_000_000)
+    parser.add_argument("--samples", type=int, default=50, help="lookups per query (full scans are slow)")
+    parser.add_argument("--seed", type=int, default=1)
+    main(parser.parse_args())
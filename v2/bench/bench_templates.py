@@ -0,0 +1,73 @@
+# bench_templates.py
+# Render cost per message: the old dict_to_ns + str.format path versus the
+# templates FlowEngine compiles at load time. Output must be identical.
+#
+#   cd v2 && python -m bench.bench_templates --renders 100000
+import argparse
+import json
+import os
+import time
+from types import SimpleNamespace
+
+from agents.flow_engine import FlowEngine
+
+FLOW_PATH = os.path.join("agents", "process_flow.json")
+
+CUSTOMER = {
+    "id": "C001", "name": "Alice Smith", "loyalty_tier": "gold",
+    "birth_date": "1990-05-27", "support_ticket_count": 4, "total_orders": 3
+}
+CONTEXT = {
+    "customer": CUSTOMER,
+    "order": {"id": "ORD004", "status": "Delayed", "eta_date": "2025-06-10", "total_amount": 250.0},
+    "subscription": {"id": "SUB001", "plan": "Pro", "status": "Active", "renewal_date": "2025-06-15"}
+}
+
+
+# --- the renderer db_tools_server used before compiled templates
+
+def dict_to_ns(d: dict) -> SimpleNamespace:
+    ns = SimpleNamespace()
+    for k, v in d.items():
+        if isinstance(v, dict):
+            setattr(ns, k, dict_to_ns(v))
+        else:
+            setattr(ns, k, v)
+    return ns
+
+
+def legacy_render(tpl: str, ctx: dict) -> str:
+    ns = dict_to_ns(ctx)
+    return tpl.format(**vars(ns))
+
+
+def main(args) -> None:
+    with open(FLOW_PATH) as f:
+        engine = FlowEngine(json.load(f)["scenarios"])
+
+    for scen in engine.scenarios:
+        if legacy_render(scen.response_template, CONTEXT) != scen.render(CONTEXT):
+            raise SystemExit(f"render mismatch for {scen.id}")
+
+    n = args.renders
+    scenarios = engine.scenarios
+
+    t0 = time.perf_counter()
+    for i in range(n):
+        legacy_render(scenarios[i % len(scenarios)].response_template, CONTEXT)
+    legacy_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for i in range(n):
+        scenarios[i % len(scenarios)].render(CONTEXT)
+    compiled_s = time.perf_counter() - t0
+
+    print(f"{len(scenarios)} templates, {n} renders, outputs identical")
+    print(f"legacy    {legacy_s * 1e6 / n:8.2f} us/message")
+    print(f"compiled  {compiled_s * 1e6 / n:8.2f} us/message  ({legacy_s / compiled_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="compiled templates vs dict_to_ns + format")
+    parser.add_argument("--renders", type=int, default=100000)
+    main(parser.parse_args())
@@ -0,0 +1,153 @@
+# context_cache_consistency.py
+# Interleaves cached reads with tool writes and writes from a second
+# connection (standing in for another tool server process) on a scratch copy
+# of the database, and checks the context cache never serves data older
+# than what a fresh read would return.
+#
+#   1) sequential: after every step, each cached context must equal a fresh load
+#   2) threaded:   a thread that saw its own support_request commit must never
+#                  read an older support_ticket_count afterwards; once the
+#                  threads stop, every cached context must equal a fresh load
+#
+#   cd v2 && python -m bench.context_cache_consistency
+import argparse
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from agents import db_tools_server as tools
+from agents.context_cache import ContextCache
+from agents.sqlite_pool import SQLitePool
+
+
+def fresh(kind: str, key: str) -> dict | None:
+    load = tools.load_order_context if kind == "order" else tools.load_subscription_context
+    return load(key)
+
+
+def cached(kind: str, key: str) -> dict | None:
+    get = tools.order_context if kind == "order" else tools.subscription_context
+    return get(key)
+
+
+def sequential(rng: random.Random, steps: int, external: sqlite3.Connection,
+               orders: list[str], subs: list[str], customers: list[str]) -> int:
+    mismatches = 0
+    keys = [("order", o) for o in orders + ["ORD999"]] + [("subscription", s) for s in subs + ["SUB999"]]
+    for step in range(steps):
+        op = rng.random()
+        if op < 0.10:
+            tools.support_request(rng.choice(customers), ctx=None)
+        elif op < 0.15:
+            tools.cancel_service(rng.choice(subs), ctx=None)
+        elif op < 0.25:
+            # another process: ticket counts, order status, subscription status
+            which = rng.randrange(3)
+            if which == 0:
+                external.execute(
+                    "UPDATE customers SET support_ticket_count = support_ticket_count + 1 WHERE id = ?",
+                    (rng.choice(customers),)
+                )
+            elif which == 1:
+                external.execute(
+                    "UPDATE orders SET status = ? WHERE id = ?",
+                    (rng.choice(["Shipped", "Delayed", "Delivered"]), rng.choice(orders))
+                )
+            else:
+                external.execute(
+                    "UPDATE subscriptions SET status = ? WHERE id = ?",
+                    (rng.choice(["active", "paused", "cancelled"]), rng.choice(subs))
+                )
+        else:
+            cached(*rng.choice(keys))
+        for kind, key in keys:
+            if cached(kind, key) != fresh(kind, key):
+                mismatches += 1
+                print(f"step {step}: stale {kind} {key}")
+    return mismatches
+
+
+def threaded(threads: int, seconds: float, orders_of: dict[str, list[str]], subs: list[str]) -> int:
+    customers = list(orders_of)
+    stop = time.monotonic() + seconds
+    stale = []
+
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        floor = {}   # customer -> ticket count this thread has seen committed
+        while time.monotonic() < stop:
+            cid = rng.choice(customers)
+            if rng.random() < 0.1:
+                tools.support_request(cid, ctx=None)
+                with tools.POOL.reader() as db:
+                    floor[cid] = db.execute(
+                        "SELECT support_ticket_count FROM customers WHERE id = ?", (cid,)
+                    ).fetchone()[0]
+            elif rng.random() < 0.05:
+                try:
+                    tools.cancel_service(rng.choice(subs), ctx=None)
+                except sqlite3.IntegrityError:
+                    pass   # 6-hex request ids collide after a few thousand cancellations
+            elif orders_of[cid]:
+                ctx = cached("order", rng.choice(orders_of[cid]))
+                if ctx and ctx["customer"]["support_ticket_count"] < floor.get(cid, 0):
+                    stale.append((cid, ctx["customer"]["support_ticket_count"], floor[cid]))
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    for cid, seen, floor in stale[:10]:
+        print(f"stale read: {cid} support_ticket_count {seen} < {floor}")
+    settled = sum(
+        cached("order", o) != fresh("order", o)
+        for ids in orders_of.values() for o in ids
+    ) + sum(cached("subscription", s) != fresh("subscription", s) for s in subs)
+    return len(stale) + settled
+
+
+def main(args) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp, "cache.db")
+        shutil.copy(tools.DB_PATH, db_path)
+        tools.POOL = SQLitePool(str(db_path))
+        tools.CONTEXTS = ContextCache(lambda: tools.POOL.data_version(), ttl=args.ttl)
+        external = sqlite3.connect(db_path, isolation_level=None)
+        external.execute("PRAGMA busy_timeout = 5000")
+
+        orders_of = {}
+        for oid, cid in external.execute("SELECT id, customer_id FROM orders"):
+            orders_of.setdefault(cid, []).append(oid)
+        for (cid,) in external.execute("SELECT id FROM customers"):
+            orders_of.setdefault(cid, [])
+        subs = [r[0] for r in external.execute("SELECT id FROM subscriptions")]
+        orders = [o for ids in orders_of.values() for o in ids]
+
+        t0 = time.perf_counter()
+        seq = sequential(random.Random(args.seed), args.steps, external, orders, subs, list(orders_of))
+        print(f"sequential: {args.steps} steps, {seq} stale reads ({time.perf_counter() - t0:.2f}s)")
+
+        thr = threaded(args.threads, args.seconds, orders_of, subs)
+        print(f"threaded:   {args.threads} threads x {args.seconds:.0f}s, {thr} stale reads")
+
+        print("cache:", tools.CONTEXTS.stats())
+        external.close()
+        tools.POOL.close()
+    return 1 if seq or thr else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="context cache consistency under interleaved writes")
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--ttl", type=float, default=3600.0, help="long, so only invalidation keeps entries fresh")
+    parser.add_argument("--seed", type=int, default=1)
+    sys.exit(main(parser.parse_args()))
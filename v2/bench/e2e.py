@@ -0,0 +1,284 @@
+# e2e.py
+# End-to-end load generator. Starts a stub Ollama server and the
+# DatabaseAgent (A2A app + tool transport) on a scratch copy of the database,
+# replays scripted or synthetic conversations through SupportAgent at a fixed
+# concurrency or arrival rate, and writes throughput plus per-stage latency
+# percentiles to bench/results/ as JSON for comparison between commits.
+#
+#   cd v2 && python -m bench.e2e --conversations 200 --concurrency 32
+#   cd v2 && python -m bench.e2e --rate 20 --duration 30 --transport stdio
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+RESULTS_DIR = Path("bench", "results")
+DB_AGENT_URL = "http://127.0.0.1:8000"   # must match database_agent.agent_card.url
+
+
+class StageRecorder:
+    """Collects wall-clock samples (seconds) per named stage."""
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def wrap(self, stage: str, fn):
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - t0)
+        return timed
+
+    def wrap_async(self, stage: str, fn):
+        async def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - t0)
+        return timed
+
+    def summary(self) -> dict:
+        return {stage: summarize(values) for stage, values in sorted(self.samples.items())}
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def summarize(values: list[float]) -> dict:
+    ordered = sorted(values)
+    return {
+        "count":   len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms":  percentile(ordered, .50) * 1000,
+        "p95_ms":  percentile(ordered, .95) * 1000,
+        "p99_ms":  percentile(ordered, .99) * 1000,
+        "max_ms":  ordered[-1] * 1000
+    }
+
+
+def make_timed_pool(recorder: StageRecorder, pool_cls, path: str):
+    """SQLitePool whose reader/writer blocks are recorded as the "sql" stage."""
+    class TimedPool(pool_cls):
+        @contextmanager
+        def reader(self):
+            t0 = time.perf_counter()
+            with super().reader() as conn:
+                yield conn
+            recorder.add("sql", time.perf_counter() - t0)
+
+        @contextmanager
+        def writer(self):
+            t0 = time.perf_counter()
+            with super().writer() as conn:
+                yield conn
+            recorder.add("sql", time.perf_counter() - t0)
+
+    return TimedPool(path)
+
+
+def synthetic_conversations(db_path: str, n: int, turns: int, write_ratio: float, seed: int) -> list[list[str]]:
+    rng = random.Random(seed)
+    with sqlite3.connect(db_path) as conn:
+        orders = [r[0] for r in conn.execute("SELECT id FROM orders")]
+        subs = [r[0] for r in conn.execute("SELECT id FROM subscriptions")]
+    reads = [
+        lambda: f"What's the status of order {rng.choice(orders)}?",
+        lambda: "Show me my orders",
+        lambda: f"When does {rng.choice(subs)} renew?",
+        lambda: f"where is my order {rng.choice(orders)}",
+    ]
+    writes = [
+        lambda: "I need support with my account",
+        lambda: f"Cancel subscription {rng.choice(subs)}",
+    ]
+    conversations = []
+    for _ in range(n):
+        # open with an order lookup so the session learns its customer_id
+        convo = [f"What's the status of order {rng.choice(orders)}?"]
+        for _ in range(turns - 1):
+            pool = writes if rng.random() < write_ratio else reads
+            convo.append(rng.choice(pool)())
+        conversations.append(convo)
+    return conversations
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+async def serve(app, port: int):
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.05)
+    return server, task
+
+
+async def main(args) -> None:
+    tmp = tempfile.mkdtemp(prefix="e2e-")
+    db_path = os.path.join(tmp, "support.db")
+    shutil.copy(args.db, db_path)
+
+    # settings are read at import time, and stdio children inherit os.environ
+    os.environ["SUPPORT_DB_PATH"] = db_path
+    os.environ["TOOL_TRANSPORT"] = args.transport
+    os.environ["INTENT_FAST_PATH"] = "1" if args.fast_path else "0"
+    os.environ["INTENT_CACHE"] = "1" if args.intent_cache else "0"
+    os.environ["LLM_STREAM"] = "1" if args.stream else "0"
+    os.environ["SPECULATIVE_READS"] = "1" if args.speculate else "0"
+
+    from a2a.server.apps import A2AStarletteApplication
+    from a2a.server.request_handlers import DefaultRequestHandler
+
+    from agents import database_agent
+    from agents.task_store import BoundedTaskStore
+    from agents.support_agent import SupportAgent
+    from bench import stub_ollama
+
+    recorder = StageRecorder()
+
+    executor = database_agent.DatabaseAgentExecutor()
+    executor.transport.call = recorder.wrap_async("mcp_call", executor.transport.call)
+    if args.transport == "embedded":
+        from agents import db_tools_server
+        from agents.sqlite_pool import SQLitePool
+        db_tools_server.POOL = make_timed_pool(recorder, SQLitePool, db_path)
+        db_tools_server.apply_process_flow = recorder.wrap("rule_eval", db_tools_server.apply_process_flow)
+
+    task_store = BoundedTaskStore()
+    handler = DefaultRequestHandler(agent_executor=executor, task_store=task_store)
+    db_app = A2AStarletteApplication(agent_card=database_agent.agent_card, http_handler=handler).build(
+        routes=[database_agent.metrics_route(executor, task_store)],
+        on_startup=[executor.start], on_shutdown=[executor.close]
+    )
+    llm_app = stub_ollama.build_app(args.llm_latency_ms, args.llm_jitter_ms, args.llm_ttft_ms)
+
+    servers = [await serve(llm_app, args.llm_port), await serve(db_app, 8000)]
+
+    agent = SupportAgent(a2a_url=DB_AGENT_URL, llm_url=f"http://127.0.0.1:{args.llm_port}/api/generate")
+    agent.ask_llama3 = recorder.wrap_async("intent_parse", agent.ask_llama3)
+    await agent.init_a2a()
+    agent.a2a_client.send_message = recorder.wrap_async("a2a_hop", agent.a2a_client.send_message)
+
+    if args.script:
+        with open(args.script) as f:
+            conversations = json.load(f)
+    else:
+        conversations = synthetic_conversations(
+            db_path, args.conversations, args.turns, args.write_ratio, args.seed
+        )
+
+    errors = 0
+
+    async def run_conversation(i: int, convo: list[str]) -> None:
+        nonlocal errors
+        session_id = f"bench-{i}"
+        for text in convo:
+            t0 = time.perf_counter()
+            try:
+                await agent.handle_query(text, session_id=session_id)
+            except Exception:
+                errors += 1
+            recorder.add("end_to_end", time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    if args.rate:
+        # open loop: Poisson arrivals of new conversations
+        rng = random.Random(args.seed)
+        tasks = []
+        deadline = t0 + args.duration
+        i = 0
+        while time.perf_counter() < deadline:
+            tasks.append(asyncio.create_task(run_conversation(i, conversations[i % len(conversations)])))
+            i += 1
+            await asyncio.sleep(rng.expovariate(args.rate))
+        await asyncio.gather(*tasks)
+    else:
+        # closed loop: a fixed number of conversations in flight
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def bounded(i, convo):
+            async with sem:
+                await run_conversation(i, convo)
+
+        await asyncio.gather(*(bounded(i, c) for i, c in enumerate(conversations)))
+    wall = time.perf_counter() - t0
+    speculation = agent.speculation.stats() if agent.speculation else None
+
+    await agent.close()
+    for server, task in reversed(servers):
+        server.should_exit = True
+        await task
+    shutil.rmtree(tmp, ignore_errors=True)
+
+    messages = len(recorder.samples.get("end_to_end", []))
+    result = {
+        "revision":   git_revision(),
+        "timestamp":  time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config":     vars(args),
+        "messages":   messages,
+        "errors":     errors,
+        "wall_s":     wall,
+        "throughput_msg_s": messages / wall if wall else 0.0,
+        "stages":     recorder.summary(),
+        "speculation": speculation
+    }
+    if args.transport == "stdio":
+        result["note"] = "sql and rule_eval run in the tool server child and are not broken out"
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = Path(args.out) if args.out else RESULTS_DIR / f"e2e-{result['revision']}-{int(time.time())}.json"
+    out.write_text(json.dumps(result, indent=2))
+
+    print(f"{messages} messages in {wall:.2f}s = {result['throughput_msg_s']:.1f} msg/s, {errors} errors")
+    for stage, s in result["stages"].items():
+        print(f"  {stage:<13} n={s['count']:<6} p50={s['p50_ms']:8.2f}ms p95={s['p95_ms']:8.2f}ms p99={s['p99_ms']:8.2f}ms")
+    if speculation:
+        print(f"  speculation   {speculation}")
+    print(f"results written to {out}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="end-to-end SupportAgent load test")
+    parser.add_argument("--db", default=os.path.join("db", "real_agent_demo.db"))
+    parser.add_argument("--script", help="JSON list of conversations (lists of customer messages)")
+    parser.add_argument("--conversations", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=0.0, help="conversations/s (open loop); 0 = closed loop")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of arrivals with --rate")
+    parser.add_argument("--transport", choices=["embedded", "stdio"], default="embedded")
+    parser.add_argument("--llm-port", type=int, default=11500)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--llm-jitter-ms", type=float, default=50)
+    parser.add_argument("--llm-ttft-ms", type=float, default=50)
+    parser.add_argument("--stream", action="store_true", help="stream LLM replies (LLM_STREAM=1)")
+    parser.add_argument("--fast-path", action="store_true", help="enable the rule-based intent fast path")
+    parser.add_argument("--intent-cache", action="store_true", help="enable the intent-parse cache")
+    parser.add_argument("--speculate", action="store_true", help="prefetch reads during the LLM call")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="result file (default bench/results/e2e-<rev>-<time>.json)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,179 @@
+# group_commit_writers.py
+# support_request / cancel_service under heavy concurrent writers, on a
+# scratch copy of the database: several processes (standing in for the
+# stdio tool server pool), each with many writer threads calling the tools,
+# hammer a handful of customers and subscriptions. Checks:
+#
+#   - no lost updates: every customer's support_ticket_count grew by exactly
+#     the number of acknowledged support_requests, across all processes
+#   - every acknowledged cancel_service left exactly one cancellation row
+#   - acknowledged means committed: right after an ack, a separate
+#     connection already sees the thread's own tickets
+#   - no write fails: any sqlite error fails the run
+#
+# and compares throughput with group commit (GROUP_COMMIT) on and off.
+#
+#   cd v2 && python -m bench.group_commit_writers --processes 4 --threads 32
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from agents import db_tools_server as tools
+from agents.group_commit import GroupCommitWriter
+from agents.sqlite_pool import SQLitePool
+
+
+def worker(args) -> int:
+    tools.POOL = SQLitePool(args.db, writer_synchronous=args.sync)
+    tools.WRITES = (
+        GroupCommitWriter(lambda: tools.POOL, max_batch=args.max_batch, max_delay=args.max_delay)
+        if args.mode == "group" else None
+    )
+    with sqlite3.connect(args.db) as conn:
+        customers = dict(conn.execute("SELECT id, support_ticket_count FROM customers"))
+        subs = [r[0] for r in conn.execute("SELECT id FROM subscriptions")]
+    lock = threading.Lock()
+    tickets, cancels, failed, stale = Counter(), Counter(), Counter(), [0]
+
+    def run(seed: int) -> None:
+        rng = random.Random(seed)
+        check = sqlite3.connect(args.db, isolation_level=None)
+        check.execute("PRAGMA busy_timeout = 30000")
+        mine = Counter()   # this thread's acknowledged tickets per customer
+        for _ in range(args.writes):
+            try:
+                if rng.random() < 0.8:
+                    cid = rng.choice(list(customers) + ["C999"])
+                    reply = json.loads(tools.support_request(cid, ctx=None))
+                    if reply.get("error"):
+                        continue
+                    mine[cid] += 1
+                    seen = check.execute(
+                        "SELECT support_ticket_count FROM customers WHERE id = ?", (cid,)
+                    ).fetchone()[0]
+                    if seen < customers[cid] + mine[cid]:
+                        with lock:
+                            stale[0] += 1
+                else:
+                    sid = rng.choice(subs)
+                    if not json.loads(tools.cancel_service(sid, ctx=None)).get("error"):
+                        with lock:
+                            cancels[sid] += 1
+            except sqlite3.Error as e:
+                with lock:
+                    failed[f"{type(e).__name__}: {e}"] += 1
+        check.close()
+        with lock:
+            tickets.update(mine)
+
+    threads = [threading.Thread(target=run, args=(args.seed * 1000 + i,)) for i in range(args.threads)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    seconds = time.perf_counter() - t0
+    stats = tools.WRITES.stats() if tools.WRITES else None
+    if tools.WRITES:
+        tools.WRITES.close()
+    tools.POOL.close()
+    print(json.dumps({
+        "tickets": tickets, "cancels": cancels, "failed": failed, "stale": stale[0],
+        "seconds": seconds, "group_commit": stats
+    }))
+    return 0
+
+
+def run_mode(mode: str, args) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "writes.db")
+        shutil.copy(tools.DB_PATH, db)
+        with sqlite3.connect(db) as conn:
+            before = dict(conn.execute("SELECT id, support_ticket_count FROM customers"))
+            cancels_before = Counter(dict(conn.execute(
+                "SELECT service_id, COUNT(*) FROM cancellation_requests GROUP BY service_id"
+            )))
+
+        cmd = [sys.executable, "-m", "bench.group_commit_writers", "--worker", "--mode", mode,
+               "--db", db, "--threads", str(args.threads), "--writes", str(args.writes),
+               "--max-batch", str(args.max_batch), "--max-delay", str(args.max_delay),
+               "--sync", args.sync]
+        t0 = time.perf_counter()
+        procs = [
+            subprocess.Popen(cmd + ["--seed", str(args.seed + p)], stdout=subprocess.PIPE, text=True)
+            for p in range(args.processes)
+        ]
+        results = [json.loads(p.communicate()[0]) for p in procs]
+        seconds = time.perf_counter() - t0
+
+        tickets, cancels = Counter(), Counter()
+        for r in results:
+            tickets.update(r["tickets"])
+            cancels.update(r["cancels"])
+        with sqlite3.connect(db) as conn:
+            after = dict(conn.execute("SELECT id, support_ticket_count FROM customers"))
+            cancels_after = Counter(dict(conn.execute(
+                "SELECT service_id, COUNT(*) FROM cancellation_requests GROUP BY service_id"
+            )))
+
+    # customer / subscription -> (rows written, writes acknowledged) where they differ
+    lost = {
+        cid: (after[cid] - before[cid], tickets[cid])
+        for cid in before if after[cid] - before[cid] != tickets[cid]
+    }
+    added = cancels_after - cancels_before
+    cancel_gaps = {
+        sid: (added[sid], cancels[sid])
+        for sid in set(added) | set(cancels) if added[sid] != cancels[sid]
+    }
+    stale = sum(r["stale"] for r in results)
+    failed = Counter()
+    for r in results:
+        failed.update(r["failed"])
+    writes = sum(tickets.values()) + sum(cancels.values())
+    print(f"{mode:<9} {args.processes} procs x {args.threads} threads: {writes:,} acked writes "
+          f"in {seconds:.2f}s ({writes / seconds:,.0f}/s), {sum(failed.values())} failed")
+    for error, n in failed.most_common():
+        print(f"{mode:<9}   {n} x {error}")
+    print(f"{mode:<9} ticket mismatches {lost or 0}, cancellation mismatches {cancel_gaps or 0}, "
+          f"acks not yet visible {stale}")
+    for i, r in enumerate(results):
+        if r["group_commit"]:
+            g = r["group_commit"]
+            print(f"{mode:<9} proc {i}: {g['batches']:,} commits, avg batch {g['avg_batch']:.1f} "
+                  f"(largest {g['largest_batch']}), commit p50 {g['commit_ms_p50']:.2f} ms "
+                  f"p95 {g['commit_ms_p95']:.2f} ms, ack p95 {g['ack_ms_p95']:.2f} ms")
+    return 1 if lost or cancel_gaps or stale or failed else 0
+
+
+def main(args) -> int:
+    if args.worker:
+        return worker(args)
+    failed = 0
+    for mode in ("per-call", "group"):
+        failed |= run_mode(mode, args)
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="group-committed tool writes under concurrent writers")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=32, help="writer threads per process")
+    parser.add_argument("--writes", type=int, default=100, help="tool calls per thread")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-delay", type=float, default=0.002)
+    parser.add_argument("--sync", default="FULL", help="PRAGMA synchronous of the write connection")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", choices=["per-call", "group"], default="group")
+    parser.add_argument("--db")
+    sys.exit(main(parser.parse_args()))
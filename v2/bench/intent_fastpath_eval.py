@@ -0,0 +1,75 @@
+# intent_fastpath_eval.py
+# Measures the rule-based intent fast path on a labelled corpus: how many
+# messages it resolves without the LLM (hit rate), and how often its answer
+# agrees with the label and, with --llm, with LLaMA-3 itself.
+#
+#   cd v2 && python -m bench.intent_fastpath_eval [--llm]
+import argparse
+import asyncio
+import json
+import time
+
+from agents.intent_rules import IntentClassifier
+
+CORPUS_PATH = "bench/intent_corpus.jsonl"
+
+
+def load_corpus(path: str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def llm_parses(corpus: list[dict]) -> tuple[list[dict | None], float]:
+    from agents import settings
+    from agents.llm_client import OllamaClient
+    from agents.support_agent import build_parse_prompt, parse_intent_reply
+
+    llm = OllamaClient(model=settings.LLM_MODEL, timeout=settings.LLM_TIMEOUT)
+    results, total = [], 0.0
+    try:
+        for item in corpus:
+            t0 = time.perf_counter()
+            reply = await llm.generate(build_parse_prompt(item["text"]), stop_at_json=True)
+            total += time.perf_counter() - t0
+            results.append(parse_intent_reply(reply))
+    finally:
+        await llm.close()
+    return results, total / len(corpus)
+
+
+def same(a: dict | None, b: dict | None) -> bool:
+    if a is None or b is None:
+        return False
+    return a["action"] == b["action"] and (a.get("parameters") or {}) == (b.get("parameters") or {})
+
+
+def main(args) -> None:
+    corpus = load_corpus(args.corpus)
+    rules = IntentClassifier()
+
+    t0 = time.perf_counter()
+    fast = [rules.classify(item["text"]) for item in corpus]
+    rule_us = (time.perf_counter() - t0) * 1e6 / len(corpus)
+
+    hits = [(item, f) for item, f in zip(corpus, fast) if f is not None]
+    correct = sum(1 for item, f in hits if same(item, f))
+    print(f"corpus:            {len(corpus)} messages")
+    print(f"fast-path hits:    {len(hits)} ({len(hits) / len(corpus):.0%} of LLM calls avoided)")
+    print(f"label agreement:   {correct}/{len(hits)} hits" + (f" ({correct / len(hits):.0%})" if hits else ""))
+    print(f"classifier cost:   {rule_us:.1f} us/message")
+    for item, f in hits:
+        if not same(item, f):
+            print(f"  disagree: {item['text']!r} -> {f} (label {item['action']} {item['parameters']})")
+
+    if args.llm:
+        parsed, llm_s = asyncio.run(llm_parses(corpus))
+        agree = sum(1 for (item, f), p in zip(zip(corpus, fast), parsed) if f is not None and same(f, p))
+        print(f"LLM agreement:     {agree}/{len(hits)} hits")
+        print(f"LLM latency:       {llm_s * 1000:.0f} ms/message avoided on each hit")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="rule-based intent fast path evaluation")
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--llm", action="store_true", help="also compare against live LLaMA-3")
+    main(parser.parse_args())
@@ -0,0 +1,131 @@
+# single_flight_coalescing.py
+# Bursts of identical concurrent reads through DatabaseAgentExecutor, with
+# single flight (SINGLE_FLIGHT) on and off: tool calls made, share of calls
+# coalesced and per-call latency. The tool transport is the embedded one
+# with an added delay standing in for a slow query.
+#
+# Then checks that coalescing never lets one caller's deadline decide for
+# another:
+#
+#   1) a leader whose deadline passes mid-call does not fail a follower
+#      with time to spare; the follower gets the tool's result
+#   2) the same while the shared call is still queued behind a busy tools
+#      stage
+#   3) once every caller has given up, the shared call is cancelled
+#
+#   cd v2 && python -m bench.single_flight_coalescing --callers 64 --rounds 20
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from agents import admission
+from agents.admission import Stage
+from agents.database_agent import DatabaseAgentExecutor
+
+ORDER_IDS = ["ORD001", "ORD002", "ORD004", "ORD006"]
+
+
+def make_executor(single_flight: bool, latency: float, tool_limit: int = 32) -> tuple[DatabaseAgentExecutor, list]:
+    ex = DatabaseAgentExecutor(transport="embedded", single_flight=single_flight)
+    ex.admission = Stage("tools", tool_limit, 256)
+    calls = []
+    inner = ex.transport.call
+
+    async def slow_call(action: str, params: dict, retry: bool = True) -> str:
+        calls.append(action)
+        await asyncio.sleep(latency)
+        return await inner(action, params, retry)
+
+    ex.transport.call = slow_call
+    return ex, calls
+
+
+async def read(ex: DatabaseAgentExecutor, order_id: str, budget: float | None) -> tuple[str, float]:
+    t0 = time.perf_counter()
+    with admission.deadline_scope(None if budget is None else time.time() + budget):
+        text = await ex.run_action("get_order_status", {"order_id": order_id}, None)
+    return text, time.perf_counter() - t0
+
+
+def overloaded(text: str) -> bool:
+    try:
+        return json.loads(text).get("error") == "overloaded"
+    except (json.JSONDecodeError, AttributeError):
+        return False
+
+
+async def burst(args, single_flight: bool) -> None:
+    ex, calls = make_executor(single_flight, args.latency_ms / 1000)
+    latencies = []
+    t0 = time.perf_counter()
+    for r in range(args.rounds):
+        results = await asyncio.gather(*(
+            read(ex, ORDER_IDS[(r + i) % args.keys % len(ORDER_IDS)], None) for i in range(args.callers)
+        ))
+        latencies += [seconds for _, seconds in results]
+    seconds = time.perf_counter() - t0
+    latencies.sort()
+    n = args.rounds * args.callers
+    mode = "on" if single_flight else "off"
+    coalesced = ex.single_flight.stats()["coalesced_rate"] if ex.single_flight else 0.0
+    print(f"single flight {mode:<3}: {n:,} reads -> {len(calls):,} tool calls "
+          f"({coalesced:.0%} coalesced) in {seconds:.2f}s, "
+          f"p50 {latencies[n // 2] * 1000:.1f} ms p95 {latencies[int(n * 0.95)] * 1000:.1f} ms")
+
+
+async def deadline_checks(args) -> int:
+    latency = args.latency_ms / 1000
+    failures = 0
+
+    # 1) leader times out mid-call, follower has plenty of budget
+    ex, calls = make_executor(True, latency)
+    leader = asyncio.create_task(read(ex, "ORD001", latency / 4))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(read(ex, "ORD001", latency * 20))
+    (lead, _), (follow, _) = await asyncio.gather(leader, follower)
+    ok = overloaded(lead) and not overloaded(follow) and len(calls) == 1
+    failures += not ok
+    print(f"short-deadline leader, long-deadline follower: leader {'shed' if overloaded(lead) else 'served'}, "
+          f"follower {'shed' if overloaded(follow) else 'served'}, {len(calls)} tool call(s) "
+          f"{'OK' if ok else 'FAIL'}")
+
+    # 2) the same while the shared call waits for the only tools slot
+    ex, calls = make_executor(True, latency, tool_limit=1)
+    busy = asyncio.create_task(read(ex, "ORD002", None))
+    await asyncio.sleep(0)
+    leader = asyncio.create_task(read(ex, "ORD001", latency / 4))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(read(ex, "ORD001", latency * 20))
+    _, (lead, _), (follow, _) = await asyncio.gather(busy, leader, follower)
+    ok = overloaded(lead) and not overloaded(follow)
+    failures += not ok
+    print(f"same, shared call queued behind a busy stage: leader {'shed' if overloaded(lead) else 'served'}, "
+          f"follower {'shed' if overloaded(follow) else 'served'} {'OK' if ok else 'FAIL'}")
+
+    # 3) everyone gives up: the shared call is cancelled rather than left running
+    ex, calls = make_executor(True, latency)
+    results = await asyncio.gather(*(read(ex, "ORD001", latency / 4) for _ in range(4)))
+    await asyncio.sleep(latency)
+    stats = ex.single_flight.stats()
+    ok = all(overloaded(text) for text, _ in results) and stats["abandoned"] == 1 and stats["in_flight"] == 0
+    failures += not ok
+    print(f"every caller gave up: {stats['abandoned']} shared call(s) cancelled, "
+          f"{stats['in_flight']} in flight {'OK' if ok else 'FAIL'}")
+    return 1 if failures else 0
+
+
+async def main(args) -> int:
+    await burst(args, single_flight=False)
+    await burst(args, single_flight=True)
+    return await deadline_checks(args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="single-flight coalescing of identical reads")
+    parser.add_argument("--callers", type=int, default=64, help="concurrent reads per round")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--keys", type=int, default=2, help="distinct order IDs per round")
+    parser.add_argument("--latency-ms", type=float, default=40, help="added tool latency")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,110 @@
+# stub_ollama.py
+# Ollama-compatible /api/generate stand-in with configurable latency. It
+# answers the SupportAgent intent prompt with canned JSON derived from the
+# quoted customer message, in both stream:false and stream:true modes.
+#
+#   cd v2 && python -m bench.stub_ollama --port 11500 --latency-ms 300
+import argparse
+import asyncio
+import json
+import random
+import re
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+_MESSAGE = re.compile(r'Message: "(.*)"\s*$', re.S)
+_ORD = re.compile(r"\bORD\d+\b")
+_SUB = re.compile(r"\bSUB\d+\b")
+
+
+def canned_intent(prompt: str) -> dict:
+    m = _MESSAGE.search(prompt)
+    text = m.group(1) if m else prompt
+    upper, lower = text.upper(), text.lower()
+    if (sub := _SUB.search(upper)) and "cancel" in lower:
+        return {"action": "cancel_service", "parameters": {"subscription_id": sub.group(0)}}
+    if sub:
+        return {"action": "subscription_status", "parameters": {"subscription_id": sub.group(0)}}
+    if "more orders" in lower:
+        return {"action": "get_customer_orders", "parameters": {"page": "next"}}
+    if "my orders" in lower:
+        return {"action": "get_customer_orders", "parameters": {}}
+    if order := _ORD.search(upper):
+        return {"action": "get_order_status", "parameters": {"order_id": order.group(0)}}
+    if "support" in lower or "help" in lower:
+        return {"action": "support_request", "parameters": {}}
+    return {"action": None, "parameters": {}}
+
+
+def build_app(latency_ms: float = 300.0, jitter_ms: float = 50.0, ttft_ms: float = 50.0,
+              canned: dict[str, dict] | None = None) -> Starlette:
+    """
+    latency_ms is the full generation time; with streaming, the first token
+    arrives after ttft_ms and the rest is spread over the remaining time.
+    canned maps exact customer messages to the JSON reply to send.
+    """
+    canned = canned or {}
+    state = {"requests": 0}
+
+    def reply_for(prompt: str) -> str:
+        m = _MESSAGE.search(prompt)
+        if m and m.group(1) in canned:
+            return json.dumps(canned[m.group(1)])
+        return json.dumps(canned_intent(prompt))
+
+    def total_delay() -> float:
+        return max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000
+
+    async def generate(request: Request):
+        body = await request.json()
+        state["requests"] += 1
+        text = reply_for(body.get("prompt", ""))
+        delay = total_delay()
+        if not body.get("stream", True):
+            await asyncio.sleep(delay)
+            return JSONResponse({"model": body.get("model"), "response": text, "done": True})
+
+        async def chunks():
+            first = min(delay, ttft_ms / 1000)
+            await asyncio.sleep(first)
+            pieces = [text[i:i + 8] for i in range(0, len(text), 8)] or [""]
+            step = (delay - first) / len(pieces)
+            for piece in pieces:
+                yield json.dumps({"response": piece, "done": False}) + "\n"
+                await asyncio.sleep(step)
+            # a real model keeps talking after the JSON; early-stopping clients never see this
+            yield json.dumps({"response": " Let me know if you need anything else.", "done": False}) + "\n"
+            await asyncio.sleep(step * 4)
+            yield json.dumps({"response": "", "done": True}) + "\n"
+
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    async def stats(request: Request):
+        return JSONResponse(state)
+
+    return Starlette(routes=[
+        Route("/api/generate", generate, methods=["POST"]),
+        Route("/stats", stats, methods=["GET"]),
+    ])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="stub Ollama /api/generate server")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--ttft-ms", type=float, default=50)
+    parser.add_argument("--canned", help="JSON file mapping customer messages to intent replies")
+    args = parser.parse_args()
+    canned = None
+    if args.canned:
+        with open(args.canned) as f:
+            canned = json.load(f)
+    uvicorn.run(
+        build_app(args.latency_ms, args.jitter_ms, args.ttft_ms, canned),
+        host="127.0.0.1", port=args.port, log_level="warning"
+    )
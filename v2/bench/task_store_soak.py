@@ -0,0 +1,118 @@
+# task_store_soak.py
+# Memory of the DatabaseAgent's A2A task store over millions of requests.
+# Every simulated request saves a task through the lifecycle the request
+# handler drives (submitted -> working -> completed with the tool's JSON
+# reply) and reads it back, like a client polling for the result. Each
+# backend runs in its own process, so RSS readings are independent:
+#
+#   a2a      a2a's InMemoryTaskStore (unbounded; stopped early, it only grows)
+#   memory   BoundedTaskStore
+#   sqlite   SQLiteTaskStore on a scratch file
+#
+#   cd v2 && python -m bench.task_store_soak --requests 2000000
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from uuid import uuid4
+
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import Artifact, Message, Part, Role, Task, TaskState, TaskStatus, TextPart
+
+from agents.task_store import make_task_store
+
+REPLY = json.dumps({"order_id": "ORD001", "status": "Delivered", "customer_id": "C001"})
+
+
+def rss_mib() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # peak, KiB on Linux
+
+
+def task(task_id: str, context_id: str, state: TaskState, done: bool) -> Task:
+    message = Message(
+        role=Role.agent, messageId=uuid4().hex, parts=[Part(root=TextPart(text=REPLY))]
+    )
+    return Task(
+        id=task_id,
+        contextId=context_id,
+        status=TaskStatus(state=state, message=message if done else None),
+        artifacts=[Artifact(artifactId=uuid4().hex, parts=[Part(root=TextPart(text=REPLY))])] if done else None
+    )
+
+
+async def soak(store, requests: int, checkpoints: int) -> list[tuple[int, float, float]]:
+    """(requests done, RSS MiB, requests/s) at each checkpoint."""
+    points = []
+    every = max(1, requests // checkpoints)
+    t0 = time.perf_counter()
+    for i in range(1, requests + 1):
+        task_id, context_id = uuid4().hex, uuid4().hex
+        await store.save(task(task_id, context_id, TaskState.submitted, False))
+        await store.save(task(task_id, context_id, TaskState.working, False))
+        await store.save(task(task_id, context_id, TaskState.completed, True))
+        await store.get(task_id)
+        if i % every == 0:
+            points.append((i, rss_mib(), i / (time.perf_counter() - t0)))
+    return points
+
+
+def run_backend(args) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.backend == "a2a":
+            store = InMemoryTaskStore()
+        else:
+            store = make_task_store(
+                args.backend, os.path.join(tmp, "tasks.db"),
+                max_tasks=args.max_tasks, ttl=args.ttl, max_age=args.ttl * 12
+            )
+        base = rss_mib()
+        points = asyncio.run(soak(store, args.requests, args.checkpoints))
+        for n, rss, rate in points:
+            print(f"{args.backend:<7} {n:>11,} requests  RSS {rss:8.1f} MiB  ({rate:,.0f} req/s)", flush=True)
+        if hasattr(store, "stats"):
+            print(f"{args.backend:<7} {store.stats()}")
+            store.close()
+    # flat: no growth over the second half of the run (allocator noise aside)
+    half = points[len(points) // 2][1]
+    growth = points[-1][1] - half
+    print(f"{args.backend:<7} baseline {base:.1f} MiB, second-half growth {growth:+.1f} MiB")
+    return 0 if args.backend == "a2a" or growth <= args.tolerance else 1
+
+
+def main(args) -> int:
+    if args.backend:
+        return run_backend(args)
+    failed = 0
+    for backend in ("a2a", "memory", "sqlite"):
+        requests = min(args.requests, args.a2a_requests) if backend == "a2a" else args.requests
+        cmd = [sys.executable, "-m", "bench.task_store_soak", "--backend", backend,
+               "--requests", str(requests), "--checkpoints", str(args.checkpoints),
+               "--max-tasks", str(args.max_tasks), "--ttl", str(args.ttl),
+               "--tolerance", str(args.tolerance)]
+        failed |= subprocess.run(cmd).returncode
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="A2A task store memory under a long soak")
+    parser.add_argument("--requests", type=int, default=2_000_000)
+    parser.add_argument("--a2a-requests", type=int, default=200_000,
+                        help="cap for the unbounded InMemoryTaskStore run")
+    parser.add_argument("--checkpoints", type=int, default=10)
+    parser.add_argument("--max-tasks", type=int, default=10_000)
+    parser.add_argument("--ttl", type=float, default=300.0)
+    parser.add_argument("--tolerance", type=float, default=8.0, help="MiB of second-half RSS growth allowed")
+    parser.add_argument("--backend", choices=["a2a", "memory", "sqlite"], help="run one backend in-process")
+    sys.exit(main(parser.parse_args()))
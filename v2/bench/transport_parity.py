@@ -0,0 +1,105 @@
+# transport_parity.py
+# Runs the same tool calls through the stdio and embedded transports and
+# checks that every result is byte-identical, then reports per-call latency.
+# Each transport works on its own copy of the database so writes line up.
+#
+#   cd v2 && python -m bench.transport_parity
+import argparse
+import asyncio
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from mcp import StdioServerParameters
+from mcp.client.stdio import get_default_environment
+
+from agents import db_tools_server
+from agents.sqlite_pool import SQLitePool
+from agents.tool_transport import EmbeddedTransport, StdioTransport
+
+CALLS = [
+    ("get_order_status",    {"order_id": "ORD001"}),
+    ("get_order_status",    {"order_id": "ORD002"}),
+    ("get_order_status",    {"order_id": "ORD004"}),
+    ("get_order_status",    {"order_id": "ORD006"}),
+    ("get_order_status",    {"order_id": "ORD999"}),
+    ("get_customer_orders", {"customer_id": "C001"}),
+    ("get_customer_orders", {"customer_id": "C999"}),
+    ("get_customer_orders_page", {"customer_id": "C001", "limit": 2}),
+    ("get_customer_orders_page", {"customer_id": "C001", "limit": 2, "cursor": "ORD002"}),
+    ("get_customer_orders_page", {"customer_id": "C001", "limit": 5, "status": "Delayed"}),
+    ("get_customer_orders_page", {"customer_id": "C001", "limit": 5, "eta_from": "2025-05-21", "eta_to": "2025-06-01"}),
+    ("get_customer_orders_page", {"customer_id": "C001", "limit": 5, "eta_from": "soon"}),
+    ("get_customer_orders_page", {"customer_id": "C001", "limit": 0}),
+    # mistyped and unexpected arguments: both transports validate like FastMCP
+    ("get_customer_orders_page", {"customer_id": "C001", "limit": "2"}),
+    ("get_customer_orders_page", {"customer_id": "C001", "limit": "two"}),
+    ("get_order_status",    {"order_id": "ORD001", "unexpected": 1}),
+    ("get_order_status_batch",    {"order_ids": '["ORD001", "ORD002"]'}),
+    ("get_order_status",    {}),
+    ("subscription_status", {"subscription_id": "SUB001"}),
+    ("subscription_status", {"subscription_id": "SUB003"}),
+    ("subscription_status", {"subscription_id": "SUB999"}),
+    ("support_request",     {"customer_id": "C002"}),
+    ("support_request",     {"customer_id": "C003"}),
+    ("support_request",     {"customer_id": "C999"}),
+    ("cancel_service",      {"subscription_id": "SUB001"}),
+    ("cancel_service",      {"subscription_id": "SUB002"}),
+    ("cancel_service",      {"subscription_id": "SUB999"}),
+    ("get_order_status_batch",    {"order_ids": ["ORD004", "ORD999", "ORD001", "ORD004"]}),
+    ("subscription_status_batch", {"subscription_ids": ["SUB003", "SUB999", "SUB001"]}),
+]
+
+
+async def replay(transport, rounds: int) -> tuple[list[str], float]:
+    results = []
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for action, params in CALLS:
+            results.append(await transport.call(action, params))
+    return results, (time.perf_counter() - t0) * 1000 / (rounds * len(CALLS))
+
+
+async def main(args) -> int:
+    src = Path(db_tools_server.DB_PATH)
+    with tempfile.TemporaryDirectory() as tmp:
+        stdio_db = Path(tmp, "stdio.db")
+        embedded_db = Path(tmp, "embedded.db")
+        shutil.copy(src, stdio_db)
+        shutil.copy(src, embedded_db)
+
+        params = StdioServerParameters(
+            command=sys.executable,
+            args=["-m", "agents.db_tools_server"],
+            env={**get_default_environment(), "SUPPORT_DB_PATH": str(stdio_db)}
+        )
+        stdio = StdioTransport(params, size=1, call_timeout=30)
+        await stdio.start()
+        try:
+            stdio_results, stdio_ms = await replay(stdio, args.rounds)
+        finally:
+            await stdio.close()
+
+        db_tools_server.POOL = SQLitePool(str(embedded_db))
+        embedded = EmbeddedTransport()
+        embedded_results, embedded_ms = await replay(embedded, args.rounds)
+
+    mismatches = 0
+    for i, (a, b) in enumerate(zip(stdio_results, embedded_results)):
+        if a != b:
+            mismatches += 1
+            action, params = CALLS[i % len(CALLS)]
+            print(f"MISMATCH {action} {params}\n  stdio:    {a}\n  embedded: {b}")
+
+    print(f"{len(stdio_results)} calls, {mismatches} mismatches")
+    print(f"stdio    {stdio_ms:8.3f} ms/call")
+    print(f"embedded {embedded_ms:8.3f} ms/call")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="stdio vs embedded transport parity")
+    parser.add_argument("--rounds", type=int, default=3)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,215 @@
+# generate.py
+# Deterministic synthetic data for the support database at production-like
+# scale. Rows are generated lazily and written in batched transactions, so
+# memory stays flat from thousands to hundreds of millions of orders. The
+# tables come from setup.sql (without its seed rows); db/migrations run
+# after the load, so indexes and customers.total_orders are built once.
+#
+#   cd v2 && python -m db.generate --out db/scale.db --customers 1000000 --orders 10000000
+import argparse
+import itertools
+import math
+import os
+import random
+import re
+import sqlite3
+import time
+from datetime import date, timedelta
+
+from agents import migrations
+
+SETUP_SQL = os.path.join(os.path.dirname(__file__), "setup.sql")
+
+# value -> weight
+LOYALTY_TIERS = {"regular": 70, "gold": 20, "platinum": 8, "diamond": 2}
+ORDER_STATUSES = {"Delivered": 60, "Shipped": 15, "Processing": 13, "Delayed": 12}
+PLANS = {"Basic": 55, "Pro": 35, "Premium": 10}
+SUBSCRIPTION_STATUSES = {"Active": 80, "Expired": 20}
+
+FIRST_NAMES = ["Alice", "Bob", "Carol", "David", "Erin", "Frank", "Grace", "Heidi",
+               "Ivan", "Judy", "Mallory", "Niaj", "Olivia", "Peggy", "Rupert", "Sybil"]
+LAST_NAMES = ["Smith", "Johnson", "Lee", "Brown", "Garcia", "Miller", "Davis", "Wilson",
+              "Moore", "Taylor", "Anderson", "Thomas", "Jackson", "White", "Harris", "Martin"]
+
+
+def weighted(rng: random.Random, table: dict):
+    values, weights = list(table), list(table.values())
+    cum = list(itertools.accumulate(weights))
+    return lambda: rng.choices(values, cum_weights=cum)[0]
+
+
+def width(n: int) -> int:
+    return max(3, len(str(max(n - 1, 1))))
+
+
+def customers(n: int, seed: int, today: date):
+    rng = random.Random(f"{seed}:customers")
+    tier = weighted(rng, LOYALTY_TIERS)
+    w = width(n)
+    for i in range(n):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        # ~8% never gave a birth date; everyone else is 18-85
+        birth = None if rng.random() < 0.08 else (
+            today - timedelta(days=rng.randrange(18 * 365, 85 * 365))
+        ).isoformat()
+        # most customers never open a ticket; a long tail opens many
+        tickets = int(rng.expovariate(1.2)) if rng.random() < 0.4 else 0
+        yield (f"C{i:0{w}d}", f"{first} {last}", f"{first.lower()}.{last.lower()}{i}@example.com",
+               tier(), birth, tickets)
+
+
+def customer_picker(rng: random.Random, n: int, skew: float):
+    """
+    Customer index for the next order/subscription. skew > 1 concentrates
+    rows on a minority of customers (repeat buyers) and leaves many with one
+    order or none.
+    """
+    w = width(n)
+    return lambda: f"C{min(n - 1, int(n * rng.random() ** skew)):0{w}d}"
+
+
+def orders(n: int, n_customers: int, seed: int, today: date, skew: float):
+    rng = random.Random(f"{seed}:orders")
+    status = weighted(rng, ORDER_STATUSES)
+    customer = customer_picker(rng, n_customers, skew)
+    w = width(n)
+    for i in range(n):
+        st = status()
+        if st == "Delivered":
+            eta = today - timedelta(days=rng.randrange(1, 720))
+        elif st == "Delayed":
+            eta = today + timedelta(days=rng.randrange(-10, 15))
+        else:
+            eta = today + timedelta(days=rng.randrange(1, 14))
+        amount = round(min(5000.0, math.exp(rng.gauss(4.3, 0.9))), 2)
+        yield (f"ORD{i:0{w}d}", customer(), st, eta.isoformat(), amount)
+
+
+def subscriptions(n: int, n_customers: int, seed: int, today: date):
+    rng = random.Random(f"{seed}:subscriptions")
+    plan = weighted(rng, PLANS)
+    status = weighted(rng, SUBSCRIPTION_STATUSES)
+    customer = customer_picker(rng, n_customers, 1.0)
+    w = width(n)
+    for i in range(n):
+        st = status()
+        renewal = today + (
+            timedelta(days=-rng.randrange(1, 365)) if st == "Expired"
+            else timedelta(days=rng.randrange(0, 365))
+        )
+        yield (f"SUB{i:0{w}d}", customer(), plan(), st, renewal.isoformat())
+
+
+def cancellation_requests(n: int, n_subscriptions: int, n_customers: int, seed: int, today: date):
+    """
+    n requests spread over the subscriptions, each filed by the
+    subscription's owner. The subscriptions stream is replayed (same seed)
+    to learn the owners, and requests are drawn with selection sampling
+    over `per` slots per subscription, so memory stays flat.
+    """
+    rng = random.Random(f"{seed}:cancellations")
+    per = max(1, math.ceil(n / n_subscriptions))   # most requests one subscription can get
+    slots = n_subscriptions * per
+    w = width(n)
+    i = 0
+    for sub_id, customer_id, *_ in subscriptions(n_subscriptions, n_customers, seed, today):
+        for _ in range(per):
+            # take this slot with probability (requests left) / (slots left)
+            if rng.random() * slots < n - i:
+                yield (f"CR{i:0{w}d}", customer_id, sub_id,
+                       (today - timedelta(days=rng.randrange(0, 60))).isoformat(),
+                       "Pending" if rng.random() < 0.7 else "Processed")
+                i += 1
+                if i == n:
+                    return
+            slots -= 1
+
+
+def create_tables(conn: sqlite3.Connection) -> None:
+    with open(SETUP_SQL) as f:
+        for stmt in migrations.statements(f.read()):
+            if re.search(r"^\s*CREATE TABLE", stmt, re.M):
+                conn.execute(stmt)
+
+
+def load(conn: sqlite3.Connection, table: str, columns: tuple, rows, total: int, batch: int) -> None:
+    sql = f"INSERT INTO {table}({', '.join(columns)}) VALUES({', '.join('?' * len(columns))})"
+    t0 = time.perf_counter()
+    done = 0
+    while chunk := list(itertools.islice(rows, batch)):
+        conn.execute("BEGIN")
+        conn.executemany(sql, chunk)
+        conn.execute("COMMIT")
+        done += len(chunk)
+        if done % (batch * 20) == 0 or done == total:
+            rate = done / max(time.perf_counter() - t0, 1e-9)
+            print(f"  {table:<22} {done:>13,} / {total:,}  ({rate:,.0f} rows/s)", flush=True)
+
+
+def generate(
+    path: str,
+    n_customers: int,
+    n_orders: int,
+    n_subscriptions: int | None = None,
+    n_cancellations: int | None = None,
+    seed: int = 1,
+    today: date = date(2025, 6, 1),
+    skew: float = 1.6,
+    batch: int = 50_000,
+    migrate: bool = True
+) -> None:
+    """Build a fresh database at path (which must not exist yet)."""
+    if os.path.exists(path):
+        raise FileExistsError(path)
+    n_subscriptions = n_customers // 2 if n_subscriptions is None else n_subscriptions
+    n_cancellations = n_subscriptions // 30 if n_cancellations is None else n_cancellations
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    # bulk load: no rollback journal or fsyncs; a failed run is simply deleted
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -262144")
+    create_tables(conn)
+
+    load(conn, "customers",
+         ("id", "name", "email", "loyalty_tier", "birth_date", "support_ticket_count"),
+         customers(n_customers, seed, today), n_customers, batch)
+    load(conn, "orders", ("id", "customer_id", "status", "eta_date", "total_amount"),
+         orders(n_orders, n_customers, seed, today, skew), n_orders, batch)
+    if n_subscriptions:
+        load(conn, "subscriptions", ("id", "customer_id", "plan", "status", "renewal_date"),
+             subscriptions(n_subscriptions, n_customers, seed, today), n_subscriptions, batch)
+    if n_subscriptions and n_cancellations:
+        load(conn, "cancellation_requests",
+             ("id", "customer_id", "service_id", "request_date", "status"),
+             cancellation_requests(n_cancellations, n_subscriptions, n_customers, seed, today),
+             n_cancellations, batch)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.close()
+
+    if migrate:
+        t0 = time.perf_counter()
+        applied = migrations.migrate(path)
+        print(f"  migrations {applied} in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="synthetic support database generator")
+    parser.add_argument("--out", required=True, help="new database file")
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--subscriptions", type=int, help="default: customers / 2")
+    parser.add_argument("--cancellations", type=int, help="default: subscriptions / 30")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--today", default="2025-06-01", help="reference date for ETAs and renewals")
+    parser.add_argument("--skew", type=float, default=1.6, help="orders per customer skew (1 = uniform)")
+    parser.add_argument("--batch", type=int, default=50_000, help="rows per transaction")
+    parser.add_argument("--no-migrate", action="store_true", help="leave the schema at version 0")
+    args = parser.parse_args()
+    t0 = time.perf_counter()
+    generate(
+        args.out, args.customers, args.orders, args.subscriptions, args.cancellations,
+        seed=args.seed, today=date.fromisoformat(args.today), skew=args.skew,
+        batch=args.batch, migrate=not args.no_migrate
+    )
+    print(f"{args.out}: {os.path.getsize(args.out) / 2**20:,.0f} MiB in {time.perf_counter() - t0:.1f}s")
@@ -0,0 +1,7 @@
+-- 0001_customer_indexes.sql
+-- Per-customer lookups (get_customer_orders, total_orders, cancellations)
+-- were full table scans: setup.sql only declares primary keys.
+CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders(customer_id);
+CREATE INDEX IF NOT EXISTS idx_subscriptions_customer ON subscriptions(customer_id);
+CREATE INDEX IF NOT EXISTS idx_cancellation_requests_customer ON cancellation_requests(customer_id);
+CREATE INDEX IF NOT EXISTS idx_cancellation_requests_service ON cancellation_requests(service_id);
@@ -0,0 +1,25 @@
+-- 0002_customers_total_orders.sql
+-- customers.total_orders replaces the COUNT(*) get_order_status ran on
+-- every call; triggers keep it in step with every write path to orders.
+ALTER TABLE customers ADD COLUMN total_orders INTEGER NOT NULL DEFAULT 0;
+
+UPDATE customers SET total_orders = (
+  SELECT COUNT(*) FROM orders WHERE orders.customer_id = customers.id
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_orders_insert_total AFTER INSERT ON orders
+BEGIN
+  UPDATE customers SET total_orders = total_orders + 1 WHERE id = NEW.customer_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_orders_delete_total AFTER DELETE ON orders
+BEGIN
+  UPDATE customers SET total_orders = total_orders - 1 WHERE id = OLD.customer_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_orders_move_total AFTER UPDATE OF customer_id ON orders
+WHEN OLD.customer_id IS NOT NEW.customer_id
+BEGIN
+  UPDATE customers SET total_orders = total_orders - 1 WHERE id = OLD.customer_id;
+  UPDATE customers SET total_orders = total_orders + 1 WHERE id = NEW.customer_id;
+END;
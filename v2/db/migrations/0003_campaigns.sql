@@ -0,0 +1,16 @@
+-- 0003_campaigns.sql
+-- Outbox for agents/campaigns.py, plus indexes for the date rules it pushes
+-- down to SQL (renewal window, birthday).
+CREATE TABLE IF NOT EXISTS campaign_outbox (
+  id           INTEGER PRIMARY KEY,
+  run_id       TEXT    NOT NULL,
+  scenario_id  TEXT    NOT NULL,
+  customer_id  TEXT    NOT NULL,
+  subject_id   TEXT    NOT NULL,
+  message      TEXT    NOT NULL,
+  created_at   TEXT    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_campaign_outbox_run ON campaign_outbox(run_id, scenario_id);
+
+CREATE INDEX IF NOT EXISTS idx_subscriptions_renewal ON subscriptions(renewal_date);
+CREATE INDEX IF NOT EXISTS idx_customers_birth_date ON customers(birth_date);
@@ -0,0 +1,7 @@
+-- 0004_orders_keyset.sql
+-- Keyset pagination for get_customer_orders_page: a customer's orders in
+-- order ID order, continuing after a cursor, with the filter columns in the
+-- index so pages never touch the table. It supersedes idx_orders_customer
+-- from 0001 (same leading column).
+CREATE INDEX IF NOT EXISTS idx_orders_customer_page ON orders(customer_id, id, status, eta_date);
+DROP INDEX IF EXISTS idx_orders_customer;
@@ -1,18 +1,44 @@
 import asyncio
-from agents.support_agent import SupportAgent
+import httpx
 
-async def main():
-    agent = SupportAgent()
+from agents import settings
+
+def error_text(resp: httpx.Response) -> str:
+    """The front end's {"error": ...} message, or the raw body from anything else (uvicorn, a proxy)."""
     try:
+        body = resp.json()
+    except ValueError:
+        return resp.text or f"HTTP {resp.status_code}"
+    return body.get("error", resp.text) if isinstance(body, dict) else resp.text
+
+# Thin REPL client for the SupportAgent front end (python -m agents.support_server)
+async def main():
+    async with httpx.AsyncClient(base_url=settings.SUPPORT_URL, timeout=None) as client:
+        session_id = (await client.post("/sessions")).json()["session_id"]
         print("SupportAgent: Hello! This is your AI customer support agent. I can talk in full sentences. Please mention your order ID or any relevant ID in your message and I will be happy to assist you.")
         while True:
-            text = input("Customer: ")
+            # read stdin off the event loop
+            text = await asyncio.to_thread(input, "Customer: ")
             if text.lower() in ("quit", "exit"):
                 break
-            reply = await agent.handle_query(text)
-            print("SupportAgent:", reply)
-    finally:
-        await agent.close()
+            # print the reply as it streams in (long order lists arrive in chunks)
+            started = False
+            try:
+                async with client.stream(
+                    "POST", f"/sessions/{session_id}/messages/stream", json={"text": text}
+                ) as resp:
+                    if resp.status_code != 200:
+                        await resp.aread()
+                        print("SupportAgent:", error_text(resp))
+                        continue
+                    print("SupportAgent: ", end="", flush=True)
+                    started = True
+                    async for piece in resp.aiter_text():
+                        print(piece, end="", flush=True)
+                    print()
+            except httpx.HTTPError as e:
+                # the front end restarted or went away: keep the session going
+                print(("\n" if started else "") + f"SupportAgent: connection problem ({e!r}), please try again.")
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,111 @@
+# test_admission.py
+# Stage limits, queue shedding, deadlines and permit accounting.
+import asyncio
+import random
+import time
+
+import pytest
+
+from agents import admission
+from agents.admission import Overloaded, Stage
+
+
+async def hold(stage: Stage, seconds: float, budget: float | None = None):
+    with admission.deadline_scope(None if budget is None else time.time() + budget):
+        async with stage.admit():
+            await asyncio.sleep(seconds)
+
+
+def test_a_full_queue_sheds_immediately():
+    stage = Stage("db", limit=1, max_queue=1)
+
+    async def body():
+        running = asyncio.create_task(hold(stage, 0.2))
+        queued = asyncio.create_task(hold(stage, 0))
+        await asyncio.sleep(0.01)
+        t0 = time.monotonic()
+        with pytest.raises(Overloaded) as shed:
+            await hold(stage, 0)
+        waited = time.monotonic() - t0
+        await asyncio.gather(running, queued)
+        return shed.value, waited
+
+    shed, waited = asyncio.run(body())
+    assert (shed.stage, shed.reason) == ("db", "queue_full")
+    assert waited < 0.05
+    assert stage.stats()["shed_queue_full"] == 1 and stage.stats()["admitted"] == 2
+
+
+def test_a_passed_deadline_sheds_without_queueing():
+    stage = Stage("llm", limit=1, max_queue=10)
+    with pytest.raises(Overloaded, match="deadline"):
+        asyncio.run(hold(stage, 0, budget=-1))
+    assert stage.stats()["shed_deadline"] == 1 and stage.stats()["admitted"] == 0
+
+
+def test_waiting_in_the_queue_stops_at_the_deadline():
+    stage = Stage("tools", limit=1, max_queue=10)
+
+    async def body():
+        running = asyncio.create_task(hold(stage, 0.5))
+        await asyncio.sleep(0.01)
+        t0 = time.monotonic()
+        with pytest.raises(Overloaded, match="deadline"):
+            await hold(stage, 0, budget=0.1)
+        waited = time.monotonic() - t0
+        await running
+        return waited
+
+    assert 0.05 < asyncio.run(body()) < 0.4
+    assert stage.stats()["queued"] == 0
+
+
+def test_permits_survive_timeouts_and_cancellations():
+    stage = Stage("tools", limit=3, max_queue=1000)
+    rng = random.Random(7)
+
+    async def user(budget):
+        try:
+            await hold(stage, rng.uniform(0, 0.005), budget)
+        except Overloaded:
+            pass
+
+    async def body():
+        for _ in range(20):
+            await asyncio.gather(*(user(rng.uniform(0, 0.01)) for _ in range(40)))
+        for _ in range(20):
+            users = [asyncio.create_task(user(1)) for _ in range(10)]
+            await asyncio.sleep(rng.uniform(0, 0.01))
+            for task in users[::2]:
+                task.cancel()
+            await asyncio.gather(*users, return_exceptions=True)
+        # every permit is back: `limit` holders get in at once
+        await asyncio.wait_for(asyncio.gather(*(hold(stage, 0.05) for _ in range(3))), timeout=0.5)
+
+    asyncio.run(body())
+    stats = stage.stats()
+    assert stats["active"] == 0 and stats["queued"] == 0
+    assert stage._sem._value == 3
+
+
+def test_deadline_scope_only_shrinks_and_no_deadline_clears_it():
+    now = time.time()
+    with admission.deadline_scope(now + 10):
+        with admission.deadline_scope(now + 60):
+            assert admission.current_deadline() == now + 10
+        with admission.deadline_scope(now + 1):
+            assert admission.current_deadline() == now + 1
+        with admission.no_deadline():
+            assert admission.current_deadline() is None
+        assert admission.current_deadline() == now + 10
+    assert admission.current_deadline() is None
+
+
+def test_within_deadline_gives_up_at_the_deadline():
+    async def body():
+        with admission.deadline_scope(time.time() + 0.05):
+            return await admission.within_deadline(asyncio.sleep(1), "database")
+
+    with pytest.raises(Overloaded) as shed:
+        asyncio.run(body())
+    assert (shed.value.stage, shed.value.reason) == ("database", "deadline")
@@ -0,0 +1,67 @@
+# test_database_agent.py
+# DatabaseAgentExecutor's coalesced reads under per-request deadlines.
+import asyncio
+import json
+import time
+
+from agents import admission
+from agents.admission import Stage
+from agents.database_agent import DatabaseAgentExecutor
+
+
+class SlowTransport:
+    """Stands in for the tool server: every call takes `delay` seconds."""
+    name = "fake"
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+
+    async def call(self, action: str, params: dict, retry: bool = True) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return json.dumps({"order_id": params["order_id"], "status": "Shipped"})
+
+
+def executor(delay: float, tool_limit: int = 32) -> DatabaseAgentExecutor:
+    ex = DatabaseAgentExecutor(transport="stdio", single_flight=True)   # the pool starts lazily
+    ex.transport = SlowTransport(delay)
+    ex.admission = Stage("tools", tool_limit, 64)
+    return ex
+
+
+async def read(ex: DatabaseAgentExecutor, budget: float | None) -> dict:
+    with admission.deadline_scope(None if budget is None else time.time() + budget):
+        return json.loads(await ex.run_action("get_order_status", {"order_id": "ORD001"}, None))
+
+
+def test_a_short_deadline_leader_does_not_shed_a_patient_follower():
+    ex = executor(delay=0.2)
+
+    async def body():
+        leader = asyncio.create_task(read(ex, 0.05))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(read(ex, 5))
+        return await leader, await follower
+
+    lead, follow = asyncio.run(body())
+    assert lead == {"error": "overloaded", "stage": "tools", "reason": "deadline"}
+    assert follow == {"order_id": "ORD001", "status": "Shipped"}
+    assert ex.transport.calls == 1
+
+
+def test_a_queued_shared_read_outlives_the_leaders_deadline():
+    ex = executor(delay=0.2, tool_limit=1)
+
+    async def body():
+        busy = asyncio.create_task(ex.run_action("get_order_status", {"order_id": "ORD002"}, None))
+        await asyncio.sleep(0)
+        leader = asyncio.create_task(read(ex, 0.05))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(read(ex, 5))
+        await busy
+        return await leader, await follower
+
+    lead, follow = asyncio.run(body())
+    assert lead["error"] == "overloaded"
+    assert follow["status"] == "Shipped"
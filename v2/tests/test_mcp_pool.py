@@ -0,0 +1,115 @@
+# test_mcp_pool.py
+# MCPSessionPool against real stdio children (tests/toy_tool_server.py).
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+from mcp import StdioServerParameters
+
+from agents.mcp_pool import MCPSessionPool
+
+TOY_SERVER = StdioServerParameters(
+    command=sys.executable, args=[os.path.join(os.path.dirname(__file__), "toy_tool_server.py")]
+)
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=60))
+
+
+async def with_pool(body, **kwargs):
+    pool = MCPSessionPool(TOY_SERVER, **kwargs)
+    await pool.start()
+    try:
+        return await body(pool)
+    finally:
+        await pool.close()
+
+
+def test_calls_are_served_by_the_pooled_sessions():
+    async def body(pool):
+        replies = await asyncio.gather(*(pool.call_tool("nap", {"seconds": 0}) for _ in range(8)))
+        return replies, pool.stats()
+
+    replies, stats = run(with_pool(body, size=2))
+    assert len(set(replies)) <= 2   # at most one process per slot
+    assert stats["calls"] == 8 and stats["failures"] == 0 and stats["in_use"] == 0
+
+
+def test_a_crashed_child_is_restarted():
+    async def body(pool):
+        with pytest.raises(Exception):
+            await pool.call_tool("crash", {}, retry=False)
+        before = pool.stats()["restarts"]
+        reply = await pool.call_tool("nap", {"seconds": 0})
+        return reply, before, pool.stats()
+
+    reply, restarts, stats = run(with_pool(body, size=1, restart_backoff=0.05))
+    assert reply.startswith("pid ")
+    assert stats["failures"] == 1 and stats["live"] == 1
+    assert restarts <= stats["restarts"] == 1
+
+
+def test_a_pool_whose_children_cannot_start_fails_fast():
+    params = StdioServerParameters(command=sys.executable, args=["-c", "import sys; sys.exit(1)"])
+
+    async def body():
+        pool = MCPSessionPool(params, size=2, call_timeout=30, restart_backoff=0.05)
+        t0 = time.monotonic()
+        try:
+            with pytest.raises(RuntimeError, match="could be started"):
+                await pool.call_tool("nap", {"seconds": 0})
+        finally:
+            await pool.close()
+        return time.monotonic() - t0
+
+    assert run(body()) < 10   # well before call_timeout
+
+
+def test_waiting_for_a_free_session_is_bounded_by_call_timeout():
+    async def body(pool):
+        # times out itself after call_timeout; its session then restarts only after the backoff
+        busy = asyncio.create_task(pool.call_tool("nap", {"seconds": 5}, retry=False))
+        await asyncio.sleep(0.2)
+        t0 = time.monotonic()
+        with pytest.raises(TimeoutError):
+            await pool.call_tool("nap", {"seconds": 0})
+        waited = time.monotonic() - t0
+        await asyncio.gather(busy, return_exceptions=True)
+        return waited
+
+    assert run(with_pool(body, size=1, call_timeout=1, restart_backoff=5)) < 2
+
+
+def test_cancelled_calls_give_their_session_back():
+    async def body(pool):
+        for _ in range(5):
+            call = asyncio.create_task(pool.call_tool("nap", {"seconds": 0.5}))
+            await asyncio.sleep(0.1)
+            call.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await call
+        stats = pool.stats()
+        # both sessions still serve calls
+        replies = await asyncio.gather(*(pool.call_tool("nap", {"seconds": 0}) for _ in range(2)))
+        return stats, replies
+
+    stats, replies = run(with_pool(body, size=2, call_timeout=10))
+    assert stats["live"] == 2 and stats["in_use"] == 0 and stats["restarts"] == 0
+    assert all(r.startswith("pid ") for r in replies)
+
+
+def test_call_each_skips_busy_sessions():
+    async def body(pool):
+        busy = asyncio.create_task(pool.call_tool("nap", {"seconds": 1}))
+        await asyncio.sleep(0.2)
+        some = await pool.call_each("nap", {"seconds": 0})
+        await busy
+        every = await pool.call_each("nap", {"seconds": 0})
+        return some, every, pool.stats()
+
+    some, every, stats = run(with_pool(body, size=2))
+    assert len(some) == 1 and len(every) == 2
+    assert stats["in_use"] == 0 and stats["failures"] == 0
@@ -0,0 +1,134 @@
+# test_session_store.py
+# The memory and SQLite session stores must be interchangeable.
+import asyncio
+import time
+
+import pytest
+
+from agents.session_store import MemorySessionStore, SQLiteSessionStore, make_session_store
+
+VALUES = {
+    "customer_id": "C001",
+    "count":       3,
+    "ratio":       1.5,
+    "flag":        True,
+    "off":         False,
+    "nothing":     None,
+    "page":        {"customer_id": "C001", "limit": 20, "cursor": "ORD020"},
+    "ids":         ["ORD001", 2, {"nested": [True]}]
+}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    store = make_session_store(request.param, str(tmp_path / "sessions.db"), ttl=60, max_sessions=1000)
+    yield store
+    store.close()
+
+
+def test_values_round_trip_unchanged(store):
+    async def body():
+        for key, value in VALUES.items():
+            await store.set("s1", key, value)
+        return {key: await store.get("s1", key, "default") for key in VALUES}
+
+    got = asyncio.run(body())
+    assert got == VALUES
+    assert all(type(got[k]) is type(v) for k, v in VALUES.items())
+
+
+def test_missing_keys_and_sessions_return_the_default(store):
+    async def body():
+        await store.set("s1", "customer_id", "C001")
+        return (await store.get("s1", "other", "dflt"), await store.get("s2", "customer_id", "dflt"),
+                await store.get("s2", "customer_id"))
+
+    assert asyncio.run(body()) == ("dflt", "dflt", None)
+
+
+def test_sessions_are_isolated_and_keys_overwrite(store):
+    async def body():
+        await store.set("s1", "customer_id", "C001")
+        await store.set("s2", "customer_id", "C002")
+        await store.set("s1", "customer_id", "C003")
+        await store.set("s1", "page", {"cursor": "ORD001"})
+        await store.set("s1", "page", None)
+        return (await store.get("s1", "customer_id"), await store.get("s2", "customer_id"),
+                await store.get("s1", "page", "dflt"))
+
+    assert asyncio.run(body()) == ("C003", "C002", None)
+
+
+def test_drop_forgets_the_session(store):
+    async def body():
+        await store.set("s1", "customer_id", "C001")
+        await store.drop("s1")
+        return await store.get("s1", "customer_id")
+
+    assert asyncio.run(body()) is None
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_idle_sessions_expire(backend, tmp_path):
+    store = make_session_store(backend, str(tmp_path / "sessions.db"), ttl=0.2, max_sessions=1000)
+
+    async def body():
+        await store.set("s1", "customer_id", "C001")
+        fresh = await store.get("s1", "customer_id")
+        await asyncio.sleep(0.3)
+        return fresh, await store.get("s1", "customer_id")
+
+    try:
+        assert asyncio.run(body()) == ("C001", None)
+    finally:
+        store.close()
+
+
+def test_memory_store_evicts_least_recently_used_beyond_the_cap():
+    store = MemorySessionStore(ttl=60, max_sessions=2)
+
+    async def body():
+        await store.set("a", "k", 1)
+        await store.set("b", "k", 2)
+        await store.get("a", "k")   # a is now the most recent
+        await store.set("c", "k", 3)
+        return [await store.get(s, "k") for s in "abc"]
+
+    assert asyncio.run(body()) == [1, None, 3]
+    assert store.stats()["evicted"] == 1
+
+
+def test_sqlite_store_keeps_the_event_loop_free(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+
+    async def body():
+        # hold the store's thread; the loop must keep running meanwhile
+        blocked = asyncio.ensure_future(store._run(time.sleep, 0.3))
+        ticks = 0
+        t0 = time.monotonic()
+        while not blocked.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        return ticks, time.monotonic() - t0
+
+    try:
+        ticks, seconds = asyncio.run(body())
+    finally:
+        store.close()
+    assert seconds >= 0.25 and ticks > 10
+
+
+def test_sqlite_sessions_are_shared_between_stores_on_one_file(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    a, b = SQLiteSessionStore(path), SQLiteSessionStore(path)
+
+    async def body():
+        await a.set("s1", "customer_id", "C001")
+        await b.set("s1", "page", {"cursor": "ORD002"})
+        return await a.get("s1", "page"), await b.get("s1", "customer_id")
+
+    try:
+        assert asyncio.run(body()) == ({"cursor": "ORD002"}, "C001")
+    finally:
+        a.close()
+        b.close()
@@ -0,0 +1,101 @@
+# test_single_flight.py
+# Coalescing of identical concurrent calls.
+import asyncio
+
+import pytest
+
+from agents.single_flight import SingleFlight, call_key
+
+
+class Backend:
+    """Counts calls; each one takes `delay` seconds."""
+    def __init__(self, delay: float = 0.05, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+
+    async def read(self) -> str:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise RuntimeError("boom")
+        return f"result {self.calls}"
+
+
+def test_call_key_ignores_parameter_order():
+    assert call_key("get_order_status", {"a": 1, "b": 2}) == call_key("get_order_status", {"b": 2, "a": 1})
+    assert call_key("get_order_status", {"a": 1}) != call_key("subscription_status", {"a": 1})
+
+
+def test_identical_concurrent_calls_share_one_call():
+    flight, backend = SingleFlight(), Backend()
+
+    async def body():
+        return await asyncio.gather(*(flight.run(("k",), backend.read) for _ in range(10)))
+
+    results = asyncio.run(body())
+    assert backend.calls == 1
+    assert {r for r, _ in results} == {"result 1"}
+    assert [joined for _, joined in results].count(False) == 1
+    stats = flight.stats()
+    assert stats["leaders"] == 1 and stats["coalesced"] == 9 and stats["in_flight"] == 0
+
+
+def test_different_keys_and_later_calls_are_not_shared():
+    flight, backend = SingleFlight(), Backend(delay=0.01)
+
+    async def body():
+        await asyncio.gather(flight.run(("a",), backend.read), flight.run(("b",), backend.read))
+        await flight.run(("a",), backend.read)   # nothing is kept once a call finishes
+
+    asyncio.run(body())
+    assert backend.calls == 3
+
+
+def test_every_waiter_gets_the_exception():
+    flight, backend = SingleFlight(), Backend(fail=True)
+
+    async def body():
+        return await asyncio.gather(*(flight.run(("k",), backend.read) for _ in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(body())
+    assert backend.calls == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_a_cancelled_waiter_does_not_cancel_the_call_for_the_others():
+    flight, backend = SingleFlight(), Backend(delay=0.1)
+
+    async def body():
+        leader = asyncio.create_task(flight.run(("k",), backend.read))
+        follower = asyncio.create_task(flight.run(("k",), backend.read))
+        await asyncio.sleep(0.02)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(body()) == ("result 1", True)
+    assert backend.calls == 1 and backend.cancelled == 0
+
+
+def test_the_call_is_cancelled_once_every_waiter_has_left():
+    flight, backend = SingleFlight(), Backend(delay=1)
+
+    async def body():
+        waiters = [asyncio.create_task(flight.run(("k",), backend.read)) for _ in range(3)]
+        await asyncio.sleep(0.02)
+        for task in waiters:
+            task.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0.01)
+
+    asyncio.run(body())
+    assert backend.cancelled == 1
+    assert flight.stats()["abandoned"] == 1 and flight.stats()["in_flight"] == 0
@@ -0,0 +1,117 @@
+# test_task_store.py
+# Size and age bounds of the DatabaseAgent's A2A task stores.
+import asyncio
+
+import pytest
+from a2a.types import Task, TaskState, TaskStatus
+
+from agents.task_store import BoundedTaskStore, SQLiteTaskStore, make_task_store
+
+
+def task(task_id: str, state: TaskState = TaskState.completed) -> Task:
+    return Task(id=task_id, contextId="ctx", status=TaskStatus(state=state))
+
+
+def test_finished_tasks_are_evicted_first_oldest_first():
+    store = BoundedTaskStore(max_tasks=3, ttl=60, max_age=60)
+
+    async def body():
+        await store.save(task("active", TaskState.working))
+        for i in range(4):
+            await store.save(task(f"done{i}"))
+        return [await store.get(t) is not None for t in ("active", "done0", "done1", "done2", "done3")]
+
+    assert asyncio.run(body()) == [True, False, False, True, True]
+    assert store.stats()["evicted"] == 2 and store.stats()["evicted_active"] == 0
+
+
+def test_reads_keep_a_task_from_being_evicted():
+    store = BoundedTaskStore(max_tasks=2, ttl=60, max_age=60)
+
+    async def body():
+        await store.save(task("a"))
+        await store.save(task("b"))
+        await store.get("a")   # b is now the least recently used
+        await store.save(task("c"))
+        return [await store.get(t) is not None for t in "abc"]
+
+    assert asyncio.run(body()) == [True, False, True]
+
+
+def test_active_tasks_are_evicted_only_when_nothing_finished_is_left():
+    store = BoundedTaskStore(max_tasks=2, ttl=60, max_age=60)
+
+    async def body():
+        for name in ("w0", "w1", "w2"):
+            await store.save(task(name, TaskState.working))
+        return [await store.get(t) is not None for t in ("w0", "w1", "w2")]
+
+    assert asyncio.run(body()) == [False, True, True]
+    assert store.stats()["evicted_active"] == 1
+
+
+def test_finished_tasks_expire_after_ttl_and_active_ones_after_max_age():
+    store = BoundedTaskStore(max_tasks=100, ttl=0.1, max_age=0.4)
+
+    async def body():
+        await store.save(task("done"))
+        await store.save(task("active", TaskState.working))
+        await asyncio.sleep(0.2)
+        early = (await store.get("done"), await store.get("active") is not None)
+        await asyncio.sleep(0.5)
+        return early, await store.get("active")
+
+    (done, active), late = asyncio.run(body())
+    assert done is None and active and late is None
+    assert store.stats()["tasks"] == 0
+
+
+def test_a_task_moves_between_active_and_finished():
+    store = BoundedTaskStore(max_tasks=10, ttl=60, max_age=60)
+
+    async def body():
+        await store.save(task("t", TaskState.working))
+        await store.save(task("t", TaskState.completed))
+        return await store.get("t")
+
+    assert asyncio.run(body()).status.state == TaskState.completed
+    assert store.stats()["tasks"] == 1 and store.stats()["active"] == 0
+
+
+def test_sqlite_store_round_trips_and_prunes_finished_tasks_first(tmp_path):
+    store = SQLiteTaskStore(str(tmp_path / "tasks.db"), max_tasks=3, ttl=60, max_age=60, prune_every=1)
+
+    async def body():
+        await store.save(task("active", TaskState.working))
+        for i in range(4):
+            await store.save(task(f"done{i}"))
+            await asyncio.sleep(0.001)   # distinct touched times
+        return [await store.get(t) for t in ("active", "done0", "done1", "done2", "done3")]
+
+    try:
+        got = asyncio.run(body())
+    finally:
+        store.close()
+    assert [t is not None for t in got] == [True, False, False, True, True]
+    assert got[0] == task("active", TaskState.working)
+
+
+def test_sqlite_store_hides_expired_tasks(tmp_path):
+    store = SQLiteTaskStore(str(tmp_path / "tasks.db"), ttl=0.1, max_age=60)
+
+    async def body():
+        await store.save(task("done"))
+        await store.save(task("active", TaskState.working))
+        await asyncio.sleep(0.2)
+        return await store.get("done"), await store.get("active")
+
+    try:
+        done, active = asyncio.run(body())
+    finally:
+        store.close()
+    assert done is None and active is not None
+
+
+def test_unknown_backend_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Unknown task store backend"):
+        make_task_store("redis", str(tmp_path / "tasks.db"), 10, 1, 1)
@@ -0,0 +1,24 @@
+# toy_tool_server.py
+# Minimal stdio FastMCP server for the MCPSessionPool tests: a tool that
+# takes a while and a tool that kills its own process.
+import os
+import time
+
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("toy", log_level="WARNING")
+
+
+@mcp.tool()
+def nap(seconds: float) -> str:
+    time.sleep(seconds)
+    return f"pid {os.getpid()}"
+
+
+@mcp.tool()
+def crash() -> str:
+    os._exit(1)
+
+
+if __name__ == "__main__":
+    mcp.run(transport="stdio")